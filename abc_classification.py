@@ -0,0 +1,242 @@
+# -------------------------------------------#
+# abc_classification.py - ABC classes (value and velocity) and dead stock
+#
+# Every part gets two classes from a cumulative-share ranking:
+#   value    - Quantity x UnitPrice (from the cache)
+#   velocity - number of issues in the last VELOCITY_WINDOW_DAYS
+# Parts are sorted by the measure; those making up the first A_SHARE of the
+# total are 'A', up to B_SHARE 'B', the rest (and anything with zero) 'C'.
+# The combined class is value + velocity, e.g. 'AC' = high value, rarely issued.
+#
+# Dead stock: parts with stock on hand and no movement at all in N months.
+#
+# Movement statistics per part are read from the ledger once, then kept up to
+# date by folding in only the ledger rows after the last MovementID seen. The
+# ranking itself is one vectorized sort, redone only when the statistics or the
+# cache have changed. All DB work runs on a background thread, so the screens
+# never wait: they show the last results (or nothing on the very first call).
+# Issues older than the velocity window drop out at the daily full reload, which
+# also picks up any ledger row that committed after a higher MovementID was read.
+# -------------------------------------------#
+
+import datetime
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import mysql.connector
+
+import inventory_data
+import query_log
+
+A_SHARE = 0.80
+B_SHARE = 0.95
+VELOCITY_WINDOW_DAYS = 365
+DEFAULT_DEAD_MONTHS = 12
+
+# Minimum time between two ledger polls
+REFRESH_INTERVAL = 30.0
+# The full statistics are re-read this often (ages issues out of the velocity window)
+FULL_RELOAD_INTERVAL = 24 * 3600.0
+
+FULL_STATS_SQL = """
+    SELECT PartNumber,
+           SUM(MovementType = %s AND CreatedAt >= %s) AS IssueCount,
+           MAX(CreatedAt) AS LastMovement,
+           MAX(MovementID) AS LastID
+    FROM stock_movements
+    GROUP BY PartNumber
+"""
+NEW_STATS_SQL = """
+    SELECT PartNumber,
+           SUM(MovementType = %s) AS IssueCount,
+           MAX(CreatedAt) AS LastMovement,
+           MAX(MovementID) AS LastID
+    FROM stock_movements
+    WHERE MovementID > %s
+    GROUP BY PartNumber
+"""
+
+RESULT_COLUMNS = ['Quantity', 'Value', 'IssueCount', 'LastMovement', 'ValueClass', 'VelocityClass', 'Class']
+
+
+def classify_by_share(measure, a_share=A_SHARE, b_share=B_SHARE):
+    """
+    Vectorized ABC classes for a 1-D array. A part is in the class its
+    cumulative share reaches *before* it is added, so the part that crosses
+    the A line is still an 'A'. Zero (or negative) measures are always 'C'.
+    """
+    measure = np.maximum(np.asarray(measure, dtype=np.float64), 0.0)
+    classes = np.full(len(measure), 'C', dtype='<U1')
+    total = measure.sum()
+    if total <= 0:
+        return classes
+    order = np.argsort(-measure, kind='stable')
+    ranked = measure[order]
+    share_before = (np.cumsum(ranked) - ranked) / total
+    ranked_classes = np.where(share_before < a_share, 'A', np.where(share_before < b_share, 'B', 'C'))
+    ranked_classes[ranked <= 0] = 'C'
+    classes[order] = ranked_classes
+    return classes
+
+
+class StockClassifier:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = None          # DataFrame PartNumber -> IssueCount, LastMovement
+        self._last_id = 0           # Highest MovementID folded into _stats
+        self._stats_version = 0
+        self._loaded_at = 0.0       # monotonic time of the last full reload
+        self._polled_at = 0.0
+        self._result = None         # DataFrame indexed by PartNumber (RESULT_COLUMNS)
+        self._result_key = None     # (cache version, stats version) the result was built from
+        self._worker = None
+
+    # --- Statistics ---
+
+    def _read_stats(self, sql, params):
+        conn = inventory_data.get_db_connection(quiet=True)
+        if conn is None:
+            return None
+        try:
+            start = time.perf_counter()
+            frame = pd.read_sql(sql, conn, params=params)
+            query_log.log_statement(sql, params, time.perf_counter() - start, rows=len(frame))
+            return frame
+        except (pd.io.sql.DatabaseError, mysql.connector.Error) as err:
+            inventory_data._report('warning', "Data Warning", f"Could not read movement statistics: {err}")
+            return None
+        finally:
+            if conn.is_connected():
+                conn.close()
+
+    def _update_stats(self):
+        """Full reload when due, otherwise folds in the ledger rows added since the last poll."""
+        now = time.monotonic()
+        full = self._stats is None or now - self._loaded_at > FULL_RELOAD_INTERVAL
+        if full:
+            since = datetime.datetime.now() - datetime.timedelta(days=VELOCITY_WINDOW_DAYS)
+            frame = self._read_stats(FULL_STATS_SQL, (inventory_data.MOVEMENT_ISSUE, since))
+        else:
+            frame = self._read_stats(NEW_STATS_SQL, (inventory_data.MOVEMENT_ISSUE, self._last_id))
+        self._polled_at = now
+        if frame is None or (not full and frame.empty):
+            return
+
+        frame = frame.set_index(frame['PartNumber'].astype(str))
+        counts = pd.to_numeric(frame['IssueCount']).fillna(0).astype(np.int64)
+        last = pd.to_datetime(frame['LastMovement'])
+        if full:
+            stats = pd.DataFrame({'IssueCount': counts, 'LastMovement': last})
+            self._loaded_at = now
+        else:
+            stats = self._stats.reindex(self._stats.index.union(frame.index))
+            stats['IssueCount'] = stats['IssueCount'].add(counts, fill_value=0).fillna(0).astype(np.int64)
+            stats['LastMovement'] = pd.concat([stats['LastMovement'], last.reindex(stats.index)], axis=1).max(axis=1)
+        new_last_id = int(pd.to_numeric(frame['LastID']).max()) if len(frame) else 0
+
+        with self._lock:
+            self._stats = stats
+            self._last_id = new_last_id if full else max(self._last_id, new_last_id)
+            self._stats_version += 1
+
+    # --- Ranking ---
+
+    def _rank(self):
+        """Rebuilds the classes from the cache and the statistics (vectorized, one sort per measure)."""
+        cache = inventory_data.INVENTORY_CACHE
+        version = cache.version
+        with self._lock:
+            stats, stats_version = self._stats, self._stats_version
+        if stats is None or self._result_key == (version, stats_version):
+            return
+
+        frame = cache.to_frame()
+        parts = pd.Index(frame.index.to_numpy(dtype=object), name='PartNumber')
+        stats = stats.reindex(parts)
+        value = frame['Quantity'].to_numpy(dtype=np.float64) * frame['UnitPrice'].to_numpy(dtype=np.float64)
+        issues = stats['IssueCount'].fillna(0).to_numpy(dtype=np.int64)
+
+        value_class = classify_by_share(value)
+        velocity_class = classify_by_share(issues)
+        result = pd.DataFrame({
+            'Quantity': frame['Quantity'].to_numpy(),
+            'Value': value,
+            'IssueCount': issues,
+            'LastMovement': stats['LastMovement'].to_numpy(),
+            'ValueClass': value_class,
+            'VelocityClass': velocity_class,
+            'Class': np.char.add(value_class, velocity_class),
+        }, index=parts, columns=RESULT_COLUMNS)
+
+        with self._lock:
+            self._result = result
+            self._result_key = (version, stats_version)
+
+    def refresh(self):
+        """Polls the ledger (at most every REFRESH_INTERVAL) and re-ranks if anything changed."""
+        if self._stats is None or time.monotonic() - self._polled_at >= REFRESH_INTERVAL:
+            self._update_stats()
+        self._rank()
+
+    def refresh_async(self):
+        """Starts a background refresh unless one is already running."""
+        with self._lock:
+            if self._worker is not None and self._worker.is_alive():
+                return
+            self._worker = threading.Thread(target=self.refresh, name='abc-classification', daemon=True)
+            self._worker.start()
+
+    def _results(self):
+        """The last results; kicks a background refresh when they may be stale."""
+        stale = (time.monotonic() - self._polled_at > REFRESH_INTERVAL
+                 or self._result_key is None
+                 or self._result_key[0] != inventory_data.INVENTORY_CACHE.version)
+        if stale:
+            self.refresh_async()
+        with self._lock:
+            return self._result
+
+    # --- Queries ---
+
+    def classification(self):
+        """DataFrame indexed by PartNumber with RESULT_COLUMNS, or None until the first refresh is done."""
+        return self._results()
+
+    def get_class(self, part_num):
+        """Returns {'Class', 'ValueClass', 'VelocityClass', 'IssueCount', 'LastMovement'} or None."""
+        result = self._results()
+        if result is None or part_num not in result.index:
+            return None
+        row = result.loc[part_num]
+        return {
+            'Class': row['Class'], 'ValueClass': row['ValueClass'], 'VelocityClass': row['VelocityClass'],
+            'IssueCount': int(row['IssueCount']),
+            'LastMovement': None if pd.isna(row['LastMovement']) else row['LastMovement'],
+        }
+
+    def dead_stock(self, months=DEFAULT_DEAD_MONTHS):
+        """
+        Parts with stock on hand and no movement in `months` months (never-moved
+        parts included), highest stock value first. None until the first refresh.
+        """
+        result = self._results()
+        if result is None:
+            return None
+        cutoff = pd.Timestamp.now() - pd.DateOffset(months=months)
+        idle = result['LastMovement'].isna() | (result['LastMovement'] < cutoff)
+        return result[idle & (result['Quantity'] > 0)].sort_values('Value', ascending=False)
+
+
+# Shared by the screens; the first lookup starts the first refresh
+CLASSIFIER = StockClassifier()
+
+def classification():
+    return CLASSIFIER.classification()
+
+def get_class(part_num):
+    return CLASSIFIER.get_class(str(part_num).strip())
+
+def dead_stock(months=DEFAULT_DEAD_MONTHS):
+    return CLASSIFIER.dead_stock(months)
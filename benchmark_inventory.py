@@ -0,0 +1,309 @@
+# -------------------------------------------#
+# benchmark_inventory.py - Headless benchmark suite for the inventory data layer
+#
+# Seeds a synthetic catalogue into a separate local database and times the
+# functions in inventory_data.py (cache load, lookup, create, receive, issue,
+# delete). Results are written as JSON so runs can be compared across versions.
+#
+# Usage:
+#   python benchmark_inventory.py --sizes 1000 100000 1000000 --output bench.json
+#   python benchmark_inventory.py --sizes 1000 --compare bench.json
+# -------------------------------------------#
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+
+# The data module normally loads the production table on import. Stop that so
+# DB_CONFIG can be pointed at the benchmark database first.
+os.environ['INVENTORY_AUTOLOAD'] = '0'
+
+import mysql.connector
+import pandas as pd
+
+import inventory_data
+import schema_migrations
+
+# --- Benchmark Configuration ---
+
+BENCH_DATABASE = 'meta_robotics_inventory_bench'
+DEFAULT_SIZES = [1000, 100000, 1000000]
+DEFAULT_OPS = 1000
+SEED_CHUNK = 10000
+NEW_PART_PREFIX = 'BENCH-NEW-'
+
+# Small vocabularies so descriptions repeat the way a real catalogue does
+_NOUNS = ['Screw', 'Nut', 'Washer', 'Bearing', 'Connector', 'Cable', 'Motor',
+          'Sensor', 'Bracket', 'Spacer', 'Gear', 'Belt', 'Pulley', 'Fuse', 'Relay']
+_SIZES = ['M2', 'M3', 'M4', 'M5', 'M6', 'M8', '10mm', '20mm', '50mm', '100mm']
+_MATERIALS = ['Steel', 'Stainless', 'Brass', 'Nylon', 'Aluminium', 'Copper']
+
+
+def _bench_config():
+    """Returns a copy of DB_CONFIG pointing at the benchmark database."""
+    config = dict(inventory_data.DB_CONFIG)
+    config['database'] = BENCH_DATABASE
+    return config
+
+
+def _part_number(i):
+    return f"BP-{i:07d}"
+
+
+def _synthetic_rows(start, stop, rng):
+    """Generates (PartNumber, Description, UnitPrice, Quantity, ImagePath) tuples."""
+    for i in range(start, stop):
+        part_num = _part_number(i)
+        desc = f"{rng.choice(_SIZES)} {rng.choice(_MATERIALS)} {rng.choice(_NOUNS)}"
+        price = round(rng.uniform(0.05, 250.0), 2)
+        qty = rng.randint(10, 5000)
+        # Roughly two thirds of real parts have a photo
+        image_path = os.path.join('part_images', f"{part_num}.png") if rng.random() < 0.66 else ''
+        yield (part_num, desc, price, qty, image_path)
+
+
+def seed_catalogue(size, rng, reseed=False):
+    """
+    Creates the benchmark database/table and fills it with `size` synthetic parts,
+    each with its stock in the default location (issues draw from it).
+    An existing table with exactly `size` seeded parts is reused unless reseed=True.
+    Returns the number of seconds spent seeding (0.0 when reused).
+    """
+    server_config = {k: v for k, v in inventory_data.DB_CONFIG.items() if k != 'database'}
+    conn = mysql.connector.connect(**server_config)
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"CREATE DATABASE IF NOT EXISTS {BENCH_DATABASE}")
+        cursor.execute(f"USE {BENCH_DATABASE}")
+        # Same tables and indexes as production
+        schema_migrations.upgrade(cursor)
+
+        # Leftovers from an interrupted run would skew the create timings
+        cursor.execute("DELETE FROM inventory WHERE PartNumber LIKE %s", (NEW_PART_PREFIX + '%',))
+        cursor.execute("DELETE FROM stock_locations WHERE PartNumber LIKE %s", (NEW_PART_PREFIX + '%',))
+        conn.commit()
+
+        cursor.execute("SELECT COUNT(*) FROM inventory")
+        existing = cursor.fetchone()[0]
+        if existing == size and not reseed:
+            # Seeds from before stock locations existed have no location rows; issues need them
+            cursor.execute("""
+                INSERT INTO stock_locations (PartNumber, LocationCode, Quantity)
+                SELECT i.PartNumber, %s, i.Quantity FROM inventory i
+                WHERE NOT EXISTS (SELECT 1 FROM stock_locations s WHERE s.PartNumber = i.PartNumber)
+            """, (inventory_data.DEFAULT_LOCATION,))
+            conn.commit()
+            return 0.0
+
+        start = time.perf_counter()
+        # Everything keyed by the old parts goes too (the ledger is kept: load tests diff MovementIDs)
+        for table in ('inventory', 'stock_locations', 'reservations', 'inventory_changes'):
+            cursor.execute(f"TRUNCATE TABLE {table}")
+        sql = """
+            INSERT INTO inventory (PartNumber, Description, UnitPrice, Quantity, ImagePath)
+            VALUES (%s, %s, %s, %s, %s)
+        """
+        for chunk_start in range(0, size, SEED_CHUNK):
+            chunk_stop = min(chunk_start + SEED_CHUNK, size)
+            rows = list(_synthetic_rows(chunk_start, chunk_stop, rng))
+            cursor.executemany(sql, rows)
+            # All seeded stock starts in the default location
+            cursor.executemany(inventory_data.LOCATION_DELTA_SQL,
+                               [(row[0], inventory_data.DEFAULT_LOCATION, row[3]) for row in rows])
+            conn.commit()
+        return time.perf_counter() - start
+    finally:
+        cursor.close()
+        conn.close()
+
+
+# --- Measurement Helpers ---
+
+def _percentile(sorted_samples, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_samples:
+        return 0.0
+    rank = max(0, min(len(sorted_samples) - 1, int(round(pct / 100.0 * len(sorted_samples))) - 1))
+    return sorted_samples[rank]
+
+
+def summarize(samples_ns, errors=0):
+    """Converts a list of per-call durations (ns) into throughput and latency stats (ms)."""
+    samples = sorted(samples_ns)
+    total_s = sum(samples) / 1e9
+    count = len(samples)
+    return {
+        'count': count,
+        'errors': errors,
+        'total_s': round(total_s, 6),
+        'ops_per_s': round(count / total_s, 2) if total_s else 0.0,
+        'mean_ms': round(total_s * 1000 / count, 4) if count else 0.0,
+        'p50_ms': round(_percentile(samples, 50) / 1e6, 4),
+        'p90_ms': round(_percentile(samples, 90) / 1e6, 4),
+        'p99_ms': round(_percentile(samples, 99) / 1e6, 4),
+        'max_ms': round(samples[-1] / 1e6, 4) if samples else 0.0,
+    }
+
+
+def _time_calls(func, arg_list, is_error):
+    """Calls func(*args) for every args tuple and returns summarize() stats."""
+    samples = []
+    errors = 0
+    for args in arg_list:
+        start = time.perf_counter_ns()
+        result = func(*args)
+        samples.append(time.perf_counter_ns() - start)
+        if is_error(result):
+            errors += 1
+    return summarize(samples, errors)
+
+
+def _is_error_message(result):
+    return not isinstance(result, str) or result.startswith('Error') or 'error' in result.lower()
+
+
+def legacy_layout_bytes():
+    """
+    Deep memory use of the cache contents laid out the way the old INVENTORY_DF
+    held them (object-dtype strings everywhere, "$x.xx" prices, string index).
+    """
+    view = inventory_data.INVENTORY_DF
+    legacy = pd.DataFrame({
+        'Description': view['Description'].astype(str).astype(object),
+        'UnitPrice': view['UnitPrice'].map(lambda x: f"${x:.2f}").astype(object),
+        'Quantity': view['Quantity'].astype('int64'),
+        'ImagePath': view['ImagePath'].astype(object),
+    }, index=pd.Index(view.index.astype(object), name='PartNumber'))
+    return int(legacy.memory_usage(deep=True, index=True).sum())
+
+
+def cache_memory_report():
+    """
+    Returns the cache's per-column memory report plus the size of the same data in
+    the legacy object-dtype layout, and the resulting reduction factor.
+    """
+    report = inventory_data.INVENTORY_CACHE.memory_report()
+    legacy_bytes = legacy_layout_bytes()
+    report['legacy_layout_bytes'] = legacy_bytes
+    report['reduction_factor'] = round(legacy_bytes / report['total_bytes'], 2) if report['total_bytes'] else None
+    view_usage = inventory_data.INVENTORY_DF.memory_usage(deep=True, index=True)
+    report['report_view_bytes'] = int(view_usage.sum())
+    return report
+
+
+# --- Benchmark Run ---
+
+def run_benchmark(size, ops, rng, reseed=False):
+    """Runs every scenario against a catalogue of `size` parts and returns the results."""
+    print(f"[{size:>9,} parts] seeding...", flush=True)
+    seed_s = seed_catalogue(size, rng, reseed=reseed)
+    inventory_data.DB_CONFIG.update(_bench_config())
+
+    result = {'size': size, 'ops': ops, 'seed_s': round(seed_s, 3)}
+
+    # 1. Cache load
+    start = time.perf_counter()
+    loaded = inventory_data.initialize_inventory()
+    result['cache_load'] = {'seconds': round(time.perf_counter() - start, 4), 'ok': bool(loaded)}
+    result['cache_memory'] = cache_memory_report()
+    print(f"[{size:>9,} parts] cache load {result['cache_load']['seconds']}s, "
+          f"{result['cache_memory']['total_bytes'] / 2**20:.1f} MiB "
+          f"(x{result['cache_memory']['reduction_factor']} smaller than the object-dtype layout)", flush=True)
+
+    existing = [_part_number(rng.randrange(size)) for _ in range(ops)]
+
+    # 2. Lookups (hits, then misses)
+    lookups = [(p,) for p in existing] * 10
+    result['lookup_hit'] = _time_calls(inventory_data.get_part_data, lookups, lambda r: r is None)
+    misses = [(f"MISSING-{i}",) for i in range(ops)]
+    result['lookup_miss'] = _time_calls(inventory_data.get_part_data, misses, lambda r: r is not None)
+
+    # 3. Create
+    new_parts = [f"{NEW_PART_PREFIX}{i:07d}" for i in range(ops)]
+    creates = [(p, 'Benchmark Part', '1.25', '') for p in new_parts]
+    result['create'] = _time_calls(inventory_data.create_new_part_data, creates, _is_error_message)
+
+    # 4. Receive / issue
+    receives = [(p, '5') for p in existing]
+    result['receive'] = _time_calls(inventory_data.update_stock_quantity, receives, _is_error_message)
+    issues = [(p, '1') for p in existing]
+    result['issue'] = _time_calls(inventory_data.issue_stock_quantity, issues, _is_error_message)
+
+    # 5. Delete (also cleans up the parts created above)
+    deletes = [(p,) for p in new_parts]
+    result['delete'] = _time_calls(inventory_data.delete_part_data, deletes, _is_error_message)
+
+    for name in ('lookup_hit', 'lookup_miss', 'create', 'receive', 'issue', 'delete'):
+        stats = result[name]
+        print(f"[{size:>9,} parts] {name:<11} {stats['ops_per_s']:>12,.1f} ops/s  "
+              f"p50 {stats['p50_ms']:.3f}ms  p99 {stats['p99_ms']:.3f}ms  errors {stats['errors']}", flush=True)
+    return result
+
+
+def _git_revision():
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def compare_results(current, baseline_path):
+    """Prints the ops/s ratio of each scenario against a previous results file."""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    base_runs = {run['size']: run for run in baseline.get('runs', [])}
+
+    print(f"\nComparison against {baseline_path} (revision {baseline.get('revision')}):")
+    for run in current['runs']:
+        base = base_runs.get(run['size'])
+        if not base:
+            continue
+        load_now, load_then = run['cache_load']['seconds'], base['cache_load']['seconds']
+        print(f"  [{run['size']:,} parts] cache_load  {load_then:.3f}s -> {load_now:.3f}s")
+        for name in ('lookup_hit', 'lookup_miss', 'create', 'receive', 'issue', 'delete'):
+            if name in run and name in base and base[name]['ops_per_s']:
+                ratio = run[name]['ops_per_s'] / base[name]['ops_per_s']
+                print(f"  [{run['size']:,} parts] {name:<11} x{ratio:.2f} ops/s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the inventory data layer.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help="Catalogue sizes to seed (default: 1k, 100k, 1M).")
+    parser.add_argument('--ops', type=int, default=DEFAULT_OPS,
+                        help="Operations per write scenario (lookups run 10x this).")
+    parser.add_argument('--seed', type=int, default=1234, help="Random seed for synthetic data.")
+    parser.add_argument('--reseed', action='store_true', help="Always rebuild the benchmark table.")
+    parser.add_argument('--output', default='benchmark_results.json', help="JSON results file.")
+    parser.add_argument('--compare', help="Previous results file to compare against.")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    results = {
+        'revision': _git_revision(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': sys.version.split()[0],
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'runs': [],
+    }
+    for size in args.sizes:
+        results['runs'].append(run_benchmark(size, args.ops, rng, reseed=args.reseed))
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        compare_results(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,281 @@
+# -------------------------------------------#
+# bulk_import.py - Bulk CSV/Excel part import
+#
+# Streams a supplier catalogue in chunks, validates each chunk in vectorized
+# passes (missing fields, prices, quantities, duplicates in the file and in the
+# cache), inserts the accepted rows with batched multi-row INSERTs and merges
+# them into the in-memory cache once at the end. Rejected rows are written to
+# a CSV file together with the reason.
+# -------------------------------------------#
+
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import mysql.connector
+
+import inventory_data
+import query_log
+
+DEFAULT_CHUNK_SIZE = 5000
+
+# Accepted header spellings -> cache column name (compared case-insensitively,
+# ignoring spaces and underscores)
+COLUMN_ALIASES = {
+    'partnumber': 'PartNumber', 'partno': 'PartNumber', 'part': 'PartNumber',
+    'description': 'Description', 'desc': 'Description',
+    'unitprice': 'UnitPrice', 'price': 'UnitPrice',
+    'quantity': 'Quantity', 'qty': 'Quantity',
+    'imagepath': 'ImagePath', 'image': 'ImagePath',
+    'supplier': 'Supplier', 'vendor': 'Supplier',
+}
+REQUIRED_COLUMNS = ['PartNumber', 'Description', 'UnitPrice']
+
+INSERT_SQL = """
+    INSERT INTO inventory (PartNumber, Description, UnitPrice, Quantity, ImagePath)
+    VALUES (%s, %s, %s, %s, %s)
+"""
+# Used once the schema has the Supplier column (see inventory_data._ensure_pricing)
+INSERT_WITH_SUPPLIER_SQL = """
+    INSERT INTO inventory (PartNumber, Description, UnitPrice, Quantity, ImagePath, Supplier)
+    VALUES (%s, %s, %s, %s, %s, %s)
+"""
+
+
+# --- Reading ---
+
+def _normalize_columns(frame):
+    """Renames known header spellings to the cache column names."""
+    renames = {}
+    for col in frame.columns:
+        key = str(col).strip().lower().replace(' ', '').replace('_', '')
+        if key in COLUMN_ALIASES:
+            renames[col] = COLUMN_ALIASES[key]
+    return frame.rename(columns=renames)
+
+
+def _read_excel_chunks(file_path, chunk_size):
+    """Streams an .xlsx sheet in chunks using openpyxl's read-only mode."""
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ValueError("Reading .xlsx files requires the 'openpyxl' package.")
+
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        header = [str(h) if h is not None else '' for h in header]
+        batch = []
+        for row in rows:
+            batch.append(['' if v is None else str(v) for v in row])
+            if len(batch) >= chunk_size:
+                yield pd.DataFrame(batch, columns=header)
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=header)
+    finally:
+        workbook.close()
+
+
+def read_chunks(file_path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yields DataFrames of at most chunk_size rows, every value as a string."""
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext == '.csv':
+        reader = pd.read_csv(file_path, dtype=str, keep_default_na=False,
+                             chunksize=chunk_size, skipinitialspace=True)
+    elif ext in ('.xlsx', '.xlsm'):
+        reader = _read_excel_chunks(file_path, chunk_size)
+    else:
+        raise ValueError(f"Unsupported file type '{ext}'. Use .csv or .xlsx.")
+
+    for chunk in reader:
+        yield _normalize_columns(chunk)
+
+
+# --- Validation ---
+
+def validate_chunk(chunk, existing_parts, seen_parts):
+    """
+    Validates a chunk in vectorized passes.
+    Returns (accepted, rejected): accepted is indexed by PartNumber with typed
+    CACHE_COLUMNS plus Supplier; rejected is the original rows plus a 'RejectReason' column.
+    """
+    part = chunk['PartNumber'].astype(str).str.strip()
+    desc = chunk['Description'].astype(str).str.strip()
+    price_raw = chunk['UnitPrice'].astype(str).str.replace(r'[$,\s]', '', regex=True)
+    qty_raw = chunk['Quantity'].astype(str).str.strip() if 'Quantity' in chunk else pd.Series('0', index=chunk.index)
+    image = chunk['ImagePath'].astype(str).str.strip() if 'ImagePath' in chunk else pd.Series('', index=chunk.index)
+    supplier = (chunk['Supplier'].fillna('').astype(str).str.strip().str.slice(0, 64) if 'Supplier' in chunk
+                else pd.Series('', index=chunk.index))
+
+    price = pd.to_numeric(price_raw, errors='coerce')
+    qty = pd.to_numeric(qty_raw.replace('', '0'), errors='coerce')
+
+    # Checks in priority order: the first failing check becomes the reason
+    checks = [
+        (part == '', "Missing PartNumber"),
+        (desc == '', "Missing Description"),
+        (price_raw == '', "Missing UnitPrice"),
+        (price.isna(), "UnitPrice is not a number"),
+        (price < 0, "UnitPrice cannot be negative"),
+        (qty.isna() | (qty < 0) | (qty % 1 != 0), "Quantity must be a non-negative whole number"),
+        (part.isin(existing_parts), "Part Number already exists"),
+        (part.isin(seen_parts), "Duplicate Part Number in file"),
+        (part.duplicated(keep='first'), "Duplicate Part Number in file"),
+    ]
+    conditions = [mask.fillna(False).to_numpy(dtype=bool) for mask, _ in checks]
+    reasons = np.select(conditions, [reason for _, reason in checks], default='')
+    bad = reasons != ''
+
+    rejected = chunk.loc[bad].copy()
+    rejected['RejectReason'] = reasons[bad]
+
+    good = ~bad
+    accepted = pd.DataFrame({
+        'Description': desc[good].to_numpy(dtype=object),
+        'UnitPrice': price[good].round(2).to_numpy(dtype=np.float64),
+        'Quantity': qty[good].to_numpy(dtype=np.int64),
+        'ImagePath': image[good].to_numpy(dtype=object),
+        'Supplier': supplier[good].to_numpy(dtype=object),
+    }, index=pd.Index(part[good].to_numpy(dtype=object), name='PartNumber'))
+    return accepted, rejected
+
+
+# --- Database ---
+
+def _insert_rows(conn, accepted):
+    """
+    Inserts a validated chunk as one transaction (executemany batches it into
+    multi-row INSERTs). If the batch hits a DB error, e.g. a part created on
+    another workstation in the meantime, rows are retried one by one so only
+    the offending rows are rejected (each row under its own savepoint, so a
+    row that fails half-way leaves none of its statements behind).
+    Returns (inserted_frame, list of (PartNumber, reason)).
+    """
+    columns = [accepted.index.tolist(), accepted['Description'].tolist(), accepted['UnitPrice'].tolist(),
+               accepted['Quantity'].tolist(), accepted['ImagePath'].tolist()]
+    insert_sql = INSERT_SQL
+    if inventory_data._HAS_PRICING:
+        columns.append(accepted['Supplier'].tolist())
+        insert_sql = INSERT_WITH_SUPPLIER_SQL
+    rows = list(zip(*columns))
+    # Opening stock is booked at the default location, with a RECEIPT in the ledger so the
+    # part's movements still add up to its Quantity (the row is inserted with the quantity,
+    # so inventory_data._movement_statements would count it twice)
+    location = inventory_data.DEFAULT_LOCATION
+    stock = [(row[0], location, row[3]) if row[3] else None for row in rows]
+    ledger = [(row[0], row[3], inventory_data.MOVEMENT_RECEIPT, location) if row[3] else None for row in rows]
+    # Change-feed rows so other workstations pick up the new parts
+    changes = [inventory_data._change_row(row[0], inventory_data.CHANGE_INSERT, row[3], location) for row in rows]
+    cursor = conn.cursor()
+    try:
+        inventory_data._ensure_schema(cursor)
+        query_log.executemany(cursor, insert_sql, rows)
+        if any(stock):
+            query_log.executemany(cursor, inventory_data.LOCATION_DELTA_SQL, [s for s in stock if s])
+            query_log.executemany(cursor, inventory_data.LEDGER_INSERT_SQL, [m for m in ledger if m])
+        query_log.executemany(cursor, inventory_data.CHANGE_INSERT_SQL, changes)
+        conn.commit()
+        return accepted, []
+    except mysql.connector.Error:
+        conn.rollback()
+    finally:
+        cursor.close()
+
+    failures = []
+    inserted = []
+    cursor = conn.cursor()
+    try:
+        for row, location_row, movement, change in zip(rows, stock, ledger, changes):
+            cursor.execute("SAVEPOINT import_row")
+            try:
+                query_log.execute(cursor, insert_sql, row)
+                if location_row:
+                    query_log.execute(cursor, inventory_data.LOCATION_DELTA_SQL, location_row)
+                    query_log.execute(cursor, inventory_data.LEDGER_INSERT_SQL, movement)
+                query_log.execute(cursor, inventory_data.CHANGE_INSERT_SQL, change)
+            except mysql.connector.Error as err:
+                # Undo whatever part of this row got in (e.g. the part row without its ledger row)
+                cursor.execute("ROLLBACK TO SAVEPOINT import_row")
+                failures.append((row[0], f"Database error: {err.msg}"))
+                continue
+            cursor.execute("RELEASE SAVEPOINT import_row")
+            inserted.append(row[0])
+        conn.commit()
+    finally:
+        cursor.close()
+    return accepted.loc[inserted], failures
+
+
+# --- Import Entry Point ---
+
+def import_parts(file_path, chunk_size=DEFAULT_CHUNK_SIZE, rejects_path=None):
+    """
+    Imports new parts from a .csv or .xlsx file.
+    Returns a summary dict: accepted, rejected, rejects_path (None if nothing
+    was rejected), seconds. Raises ValueError for unreadable files/headers.
+    """
+    start = time.perf_counter()
+    if rejects_path is None:
+        rejects_path = os.path.splitext(file_path)[0] + '_rejected.csv'
+
+    conn = inventory_data.get_db_connection()
+    if conn is None:
+        raise ValueError("Database connection failed. Nothing was imported.")
+
+    existing_parts = pd.Index(inventory_data.INVENTORY_CACHE.part_numbers())
+    seen_parts = set()
+    accepted_frames = []
+    accepted_count = 0
+    rejected_count = 0
+    rejects_written = False
+    source_row = 2  # Line 1 is the header
+
+    try:
+        for chunk in read_chunks(file_path, chunk_size):
+            missing = [c for c in REQUIRED_COLUMNS if c not in chunk.columns]
+            if missing:
+                raise ValueError(f"Missing required column(s): {', '.join(missing)}")
+
+            chunk.index = pd.RangeIndex(source_row, source_row + len(chunk), name='SourceRow')
+            source_row += len(chunk)
+
+            accepted, rejected = validate_chunk(chunk, existing_parts, seen_parts)
+            if len(accepted):
+                inserted, failures = _insert_rows(conn, accepted)
+                if failures:
+                    failed = dict(failures)
+                    extra = chunk[chunk['PartNumber'].astype(str).str.strip().isin(list(failed))].copy()
+                    extra['RejectReason'] = extra['PartNumber'].astype(str).str.strip().map(failed)
+                    rejected = pd.concat([rejected, extra])
+                accepted_frames.append(inserted)
+                seen_parts.update(inserted.index)
+
+            if len(rejected):
+                rejected.to_csv(rejects_path, mode='a' if rejects_written else 'w',
+                                header=not rejects_written)
+                rejects_written = True
+                rejected_count += len(rejected)
+    finally:
+        if conn.is_connected():
+            conn.close()
+
+        # Single merge into the cache once the chunks are committed (also after a
+        # failure part-way through, so the cache matches what reached the DB)
+        if accepted_frames:
+            merged = pd.concat(accepted_frames)
+            inventory_data.INVENTORY_CACHE.insert_frame(merged)
+            for part_num, qty in merged.loc[merged['Quantity'] != 0, 'Quantity'].items():
+                inventory_data.INVENTORY_CACHE.set_locations(part_num, {inventory_data.DEFAULT_LOCATION: qty})
+            accepted_count = len(merged)
+
+    return {
+        'accepted': accepted_count,
+        'rejected': rejected_count,
+        'rejects_path': rejects_path if rejects_written else None,
+        'seconds': round(time.perf_counter() - start, 3),
+    }
@@ -0,0 +1,210 @@
+# -------------------------------------------#
+# change_feed.py - Applies other workstations' changes to the local cache
+#
+# Every write appends a row to the inventory_changes table (see inventory_data).
+# ChangeFeedPoller reads the rows after the last Seq it has seen, a few times
+# a second, on its own connection, and patches only the parts they name:
+#   STOCK   -> adjust the cached Quantity (and the row's location) by the row's delta
+#   RESERVE -> adjust the cached reserved units by the row's delta
+#   INSERT  -> add the part (starting Quantity from the row), then fetch its fields
+#   UPDATE  -> re-read Description/UnitPrice/ImagePath (if the row version is newer)
+#   DELETE  -> drop the part
+# Rows written by this process are skipped; its cache already has them.
+#
+# AUTO_INCREMENT values are handed out before commit, so a lower Seq can become
+# visible after a higher one. Missing Seqs are remembered and re-checked until
+# they show up or GAP_TIMEOUT passes (rolled-back transactions never appear).
+# -------------------------------------------#
+
+import threading
+import time
+
+import mysql.connector
+
+import inventory_data
+
+DEFAULT_BATCH_SIZE = 1000
+GAP_TIMEOUT = 30.0        # Seconds to keep looking for a missing Seq
+MAX_TRACKED_GAPS = 1000   # Larger jumps are AUTO_INCREMENT skips, not transactions
+RETENTION_HOURS = 24
+PRUNE_INTERVAL = 3600.0
+
+
+class ChangeFeedPoller(threading.Thread):
+    def __init__(self, position=None, poll_interval=0.5, batch_size=DEFAULT_BATCH_SIZE):
+        """position: (last Seq, missing Seqs) matching the loaded cache; None starts at the current end."""
+        super().__init__(name='change-feed', daemon=True)
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._conn = None
+        self._last_prune = 0.0
+        self.last_seq = None
+        self._gaps = {}  # Seq -> time first noticed
+        self.stats = {'polls': 0, 'changes': 0, 'parts_patched': 0, 'errors': 0}
+        self.reset(position)
+
+    def reset(self, position):
+        """Moves the feed to a new position (after the cache has been reloaded)."""
+        with self._lock:
+            if position is None:
+                self.last_seq, self._gaps = None, {}
+            else:
+                last_seq, gaps = position
+                now = time.monotonic()
+                self.last_seq = last_seq
+                self._gaps = {seq: now for seq in gaps}
+
+    def stop(self):
+        self._stop.set()
+
+    def run(self):
+        while not self._stop.is_set():
+            try:
+                self.poll_once()
+            except mysql.connector.Error:
+                # Database unreachable: reconnect on the next poll, keep our position
+                self.stats['errors'] += 1
+                self._close()
+            self._stop.wait(self.poll_interval)
+        self._close()
+
+    # --- Connection ---
+
+    def _connection(self):
+        # A dedicated connection (not from the pool), in autocommit mode so every
+        # poll sees the latest committed rows instead of a repeatable-read snapshot
+        if self._conn is None or not self._conn.is_connected():
+            self._conn = mysql.connector.connect(**inventory_data.DB_CONFIG)
+            self._conn.autocommit = True
+        return self._conn
+
+    def _close(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except mysql.connector.Error:
+                pass
+            self._conn = None
+
+    # --- Polling ---
+
+    def poll_once(self):
+        """Fetches and applies one batch of changes. Returns the number of rows read."""
+        cursor = self._connection().cursor()
+        try:
+            with self._lock:
+                if self.last_seq is None:
+                    cursor.execute("SELECT COALESCE(MAX(Seq), 0) FROM inventory_changes")
+                    self.last_seq = int(cursor.fetchone()[0])
+                    return 0
+                rows = self._fetch(cursor)
+                self._advance(rows)
+                self._apply(cursor, rows)
+            self._prune(cursor)
+        finally:
+            cursor.close()
+        self.stats['polls'] += 1
+        self.stats['changes'] += len(rows)
+        return len(rows)
+
+    def _fetch(self, cursor):
+        sql = "SELECT Seq, PartNumber, ChangeType, QtyChange, Origin, LocationCode FROM inventory_changes WHERE Seq > %s"
+        params = [self.last_seq]
+        if self._gaps:
+            gaps = sorted(self._gaps)
+            sql += f" OR Seq IN ({', '.join(['%s'] * len(gaps))})"
+            params += gaps
+        sql += " ORDER BY Seq LIMIT %s"
+        params.append(self.batch_size)
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+    def _advance(self, rows):
+        """Moves last_seq past the rows read and tracks the Seqs skipped on the way."""
+        now = time.monotonic()
+        for row in rows:
+            seq = int(row[0])
+            if seq <= self.last_seq:
+                self._gaps.pop(seq, None)  # A late commit we were waiting for
+                continue
+            missing = seq - self.last_seq - 1
+            if 0 < missing <= MAX_TRACKED_GAPS:
+                for gap in range(self.last_seq + 1, seq):
+                    self._gaps[gap] = now
+            self.last_seq = seq
+
+        for seq, noticed in list(self._gaps.items()):
+            if now - noticed > GAP_TIMEOUT:
+                del self._gaps[seq]
+
+    def _apply(self, cursor, rows):
+        """Patches the cache with the changes made by other processes."""
+        cache = inventory_data.INVENTORY_CACHE
+        refresh = set()
+        for _, part_num, change_type, qty_change, origin, location in rows:
+            if origin == inventory_data.INSTANCE_ID:
+                continue
+            if change_type == inventory_data.CHANGE_STOCK:
+                try:
+                    # Rows written before stock locations existed only carry the total
+                    if location:
+                        cache.adjust_location_quantity(part_num, location, qty_change)
+                    else:
+                        cache.adjust_quantity(part_num, qty_change)
+                except KeyError:
+                    pass
+            elif change_type == inventory_data.CHANGE_RESERVE:
+                try:
+                    cache.adjust_reserved(part_num, qty_change)
+                except KeyError:
+                    pass
+            elif change_type == inventory_data.CHANGE_INSERT:
+                if part_num not in cache:
+                    cache.insert(part_num, '', 0.0, qty_change, '')
+                    if location and qty_change:
+                        cache.set_locations(part_num, {location: qty_change})
+                refresh.add(part_num)
+            elif change_type == inventory_data.CHANGE_UPDATE:
+                refresh.add(part_num)
+            elif change_type == inventory_data.CHANGE_DELETE:
+                cache.delete(part_num)
+                refresh.discard(part_num)
+
+        if refresh:
+            self._refresh_fields(cursor, sorted(refresh))
+        self.stats['parts_patched'] += len(refresh)
+
+    def _refresh_fields(self, cursor, part_nums):
+        """Re-reads the descriptive fields of the given parts in one query."""
+        has_version = inventory_data._HAS_VERSION_COLUMN
+        columns = "PartNumber, Description, UnitPrice, ImagePath" + (", RowVersion" if has_version else "")
+        if inventory_data._HAS_PRICING:
+            columns += ", Supplier"
+        marks = ', '.join(['%s'] * len(part_nums))
+        cursor.execute(f"SELECT {columns} FROM inventory WHERE PartNumber IN ({marks})", part_nums)
+
+        cache = inventory_data.INVENTORY_CACHE
+        for row in cursor.fetchall():
+            part_num, description, unit_price, image_path = row[:4]
+            row_version = int(row[4]) if has_version else None
+            supplier = row[-1] if inventory_data._HAS_PRICING else None
+            cached = cache.get(part_num)
+            if cached is None:
+                continue  # Deleted again in the meantime
+            if row_version is not None and row_version < cached['RowVersion']:
+                continue  # A newer local edit is already cached
+            cache.update(part_num, description=description, unit_price=float(unit_price),
+                         image_path=image_path or '', row_version=row_version, supplier=supplier)
+
+    def _prune(self, cursor):
+        """Deletes old change rows about once an hour (any workstation may do it)."""
+        now = time.monotonic()
+        if now - self._last_prune < PRUNE_INTERVAL:
+            return
+        self._last_prune = now
+        cursor.execute(
+            "DELETE FROM inventory_changes WHERE CreatedAt < NOW(6) - INTERVAL %s HOUR LIMIT 10000",
+            (RETENTION_HOURS,)
+        )
@@ -0,0 +1,307 @@
+# -------------------------------------------#
+# consumption_analytics.py - Demand forecasts and suggested reorder points
+#
+# Batch job over the stock_movements ledger:
+#   1. MySQL aggregates issues per part and day (GROUP BY on the covering
+#      (MovementType, CreatedAt, PartNumber, QtyChange) index, so only the
+#      daily totals cross the network).
+#   2. The totals are scattered into one parts x periods matrix (daily or
+#      weekly buckets, newest period last, idle periods are zero).
+#   3. A moving average and simple exponential smoothing are fitted to every
+#      row at once; each part keeps the method with the lower one-step-ahead
+#      error. Large catalogues are split across a process pool, one chunk of
+#      rows per core.
+#   4. Reorder point = forecast demand over the lead time + safety stock
+#      (z x forecast error x sqrt(lead time)), written to reorder_points in one
+#      transaction. Stock Enquiry shows it next to the stock.
+#
+# Usage:
+#   python consumption_analytics.py --period week --history 52 --lead-time 2
+#   python consumption_analytics.py --period day --history 180 --lead-time 10 --workers 8
+# -------------------------------------------#
+
+import argparse
+import datetime
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+if __name__ == '__main__':
+    # The job reads straight from MySQL; it does not need the cache
+    os.environ.setdefault('INVENTORY_AUTOLOAD', '0')
+
+import numpy as np
+import pandas as pd
+import mysql.connector
+
+import inventory_data
+import query_log
+
+PERIOD_DAYS = {'day': 1, 'week': 7}
+
+DEFAULT_PERIOD = 'week'
+DEFAULT_HISTORY_PERIODS = 52
+DEFAULT_LEAD_TIME_PERIODS = 2.0
+DEFAULT_MA_WINDOW = 8
+DEFAULT_ALPHA = 0.3
+# z for the safety stock; 1.65 covers demand in about 95% of lead times
+DEFAULT_SERVICE_Z = 1.65
+
+# Below this many parts the process pool costs more than it saves
+PARALLEL_MIN_PARTS = 20000
+WRITE_CHUNK_SIZE = 5000
+
+DAILY_ISSUES_SQL = """
+    SELECT PartNumber, DATE(CreatedAt) AS Day, -SUM(QtyChange) AS Issued
+    FROM stock_movements
+    WHERE MovementType = %s AND CreatedAt >= %s AND CreatedAt < %s
+    GROUP BY PartNumber, DATE(CreatedAt)
+"""
+
+UPSERT_SQL = """
+    INSERT INTO reorder_points
+        (PartNumber, Method, PeriodDays, AvgDemand, ForecastDemand, DemandStdDev, ReorderPoint, ComputedAt)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        Method = VALUES(Method), PeriodDays = VALUES(PeriodDays), AvgDemand = VALUES(AvgDemand),
+        ForecastDemand = VALUES(ForecastDemand), DemandStdDev = VALUES(DemandStdDev),
+        ReorderPoint = VALUES(ReorderPoint), ComputedAt = VALUES(ComputedAt)
+"""
+
+
+# --- Demand Matrix ---
+
+def load_demand(period=DEFAULT_PERIOD, history=DEFAULT_HISTORY_PERIODS, until=None):
+    """
+    Reads issue history into a demand matrix.
+    Returns (part numbers Index, float64 array parts x periods); the last column
+    is the period ending at `until` (default: today 00:00, so today's partial
+    day is left out).
+    """
+    period_days = PERIOD_DAYS[period]
+    until = until or datetime.datetime.combine(datetime.date.today(), datetime.time())
+    since = until - datetime.timedelta(days=period_days * history)
+
+    conn = inventory_data.get_db_connection()
+    if conn is None:
+        raise ValueError("Database connection failed.")
+    try:
+        start = time.perf_counter()
+        daily = pd.read_sql(DAILY_ISSUES_SQL, conn, params=(inventory_data.MOVEMENT_ISSUE, since, until))
+        query_log.log_statement(DAILY_ISSUES_SQL, None, time.perf_counter() - start, rows=len(daily))
+    finally:
+        if conn.is_connected():
+            conn.close()
+
+    parts, rows = np.unique(daily['PartNumber'].astype(str).to_numpy(), return_inverse=True)
+    age_days = (pd.Timestamp(until) - pd.to_datetime(daily['Day'])).dt.days.to_numpy() - 1
+    columns = history - 1 - age_days // period_days
+    demand = np.zeros((len(parts), history), dtype=np.float64)
+    # SUM() comes back as DECIMAL
+    np.add.at(demand, (rows, columns), daily['Issued'].astype(np.float64).to_numpy())
+    return pd.Index(parts, name='PartNumber'), demand
+
+
+# --- Forecasting ---
+
+def _moving_average_forecasts(demand, window):
+    """One-step-ahead forecasts: column t is the mean of the (up to) `window` periods before t."""
+    cumulative = np.zeros((demand.shape[0], demand.shape[1] + 1))
+    np.cumsum(demand, axis=1, out=cumulative[:, 1:])
+    t = np.arange(demand.shape[1])
+    lo = np.maximum(t - window, 0)
+    counts = np.maximum(t - lo, 1)
+    forecasts = (cumulative[:, t] - cumulative[:, lo]) / counts
+    # The forecast after the last period
+    next_forecast = (cumulative[:, -1] - cumulative[:, max(demand.shape[1] - window, 0)]) / min(window, demand.shape[1])
+    return forecasts, next_forecast
+
+
+def _exponential_smoothing_forecasts(demand, alpha):
+    """One-step-ahead simple exponential smoothing, all parts per step (loop over periods only)."""
+    forecasts = np.empty_like(demand)
+    level = demand[:, 0].copy()
+    forecasts[:, 0] = level
+    for t in range(1, demand.shape[1]):
+        forecasts[:, t] = level
+        level = alpha * demand[:, t] + (1 - alpha) * level
+    return forecasts, level
+
+
+def forecast_chunk(demand, window=DEFAULT_MA_WINDOW, alpha=DEFAULT_ALPHA):
+    """
+    Fits both methods to every row of `demand` (parts x periods).
+    Returns a dict of arrays: method ('MA'/'SES'), forecast, error_std, avg.
+    Top-level so the process pool can pickle it.
+    """
+    ma, ma_next = _moving_average_forecasts(demand, window)
+    ses, ses_next = _exponential_smoothing_forecasts(demand, alpha)
+
+    # Score on the periods after the first, where both methods had history to work with
+    actual = demand[:, 1:]
+    ma_err = actual - ma[:, 1:]
+    ses_err = actual - ses[:, 1:]
+    use_ses = np.abs(ses_err).mean(axis=1) <= np.abs(ma_err).mean(axis=1)
+
+    errors = np.where(use_ses[:, None], ses_err, ma_err)
+    return {
+        'method': np.where(use_ses, 'SES', 'MA'),
+        'forecast': np.maximum(np.where(use_ses, ses_next, ma_next), 0.0),
+        'error_std': np.sqrt((errors ** 2).mean(axis=1)) if errors.shape[1] else np.zeros(len(demand)),
+        'avg': demand.mean(axis=1),
+    }
+
+
+def forecast_all(demand, window=DEFAULT_MA_WINDOW, alpha=DEFAULT_ALPHA, workers=None):
+    """forecast_chunk over the whole matrix, split across `workers` processes for large catalogues."""
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(demand) < PARALLEL_MIN_PARTS:
+        return forecast_chunk(demand, window, alpha)
+
+    chunks = np.array_split(demand, workers)
+    # Workers import this module (and so inventory_data); they must not load the cache
+    autoload = os.environ.get('INVENTORY_AUTOLOAD')
+    os.environ['INVENTORY_AUTOLOAD'] = '0'
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(forecast_chunk, chunks, [window] * workers, [alpha] * workers))
+    finally:
+        if autoload is None:
+            del os.environ['INVENTORY_AUTOLOAD']
+        else:
+            os.environ['INVENTORY_AUTOLOAD'] = autoload
+    return {key: np.concatenate([r[key] for r in results]) for key in results[0]}
+
+
+def reorder_points(fit, lead_time=DEFAULT_LEAD_TIME_PERIODS, service_z=DEFAULT_SERVICE_Z):
+    """Demand over the lead time plus safety stock, rounded up to whole units."""
+    points = fit['forecast'] * lead_time + service_z * fit['error_std'] * math.sqrt(lead_time)
+    return np.ceil(np.round(points, 6)).astype(np.int64)
+
+
+# --- Batch Job ---
+
+def _write_reorder_points(parts, fit, points, period_days, computed_at):
+    """Upserts every part's row and drops rows of parts that no longer have demand, in one transaction."""
+    rows = list(zip(parts.tolist(), fit['method'].tolist(), [period_days] * len(parts),
+                    np.round(fit['avg'], 4).tolist(), np.round(fit['forecast'], 4).tolist(),
+                    np.round(fit['error_std'], 4).tolist(), points.tolist(), [computed_at] * len(parts)))
+    statements = [(UPSERT_SQL, rows[i:i + WRITE_CHUNK_SIZE]) for i in range(0, len(rows), WRITE_CHUNK_SIZE)]
+    statements.append(("DELETE FROM reorder_points WHERE ComputedAt < %s", (computed_at,)))
+    return inventory_data._execute_transaction(statements)
+
+
+def run(period=DEFAULT_PERIOD, history=DEFAULT_HISTORY_PERIODS, lead_time=DEFAULT_LEAD_TIME_PERIODS,
+        window=DEFAULT_MA_WINDOW, alpha=DEFAULT_ALPHA, service_z=DEFAULT_SERVICE_Z, workers=None):
+    """
+    Recomputes the reorder points of every part with issues in the history window.
+    Returns a summary dict (parts, seconds per stage). Raises ValueError on DB failure.
+    """
+    timings = {}
+    start = time.perf_counter()
+    computed_at = datetime.datetime.now().replace(microsecond=0)
+
+    parts, demand = load_demand(period, history)
+    timings['load_s'] = round(time.perf_counter() - start, 3)
+
+    step = time.perf_counter()
+    fit = forecast_all(demand, window, alpha, workers)
+    points = reorder_points(fit, lead_time, service_z)
+    timings['forecast_s'] = round(time.perf_counter() - step, 3)
+
+    step = time.perf_counter()
+    if not _write_reorder_points(parts, fit, points, PERIOD_DAYS[period], computed_at):
+        raise ValueError("Reorder points could not be saved.")
+    timings['write_s'] = round(time.perf_counter() - step, 3)
+
+    invalidate_reorder_points()
+    return {'parts': len(parts), 'periods': history, 'seconds': round(time.perf_counter() - start, 3), **timings}
+
+
+# --- Lookups (Stock Enquiry) ---
+
+# The batch job usually runs on another machine, so the table is re-read after this long
+REORDER_POINTS_TTL_S = 900
+# After a failed read, lookups use what they have (or nothing) for this long before retrying
+REORDER_POINTS_RETRY_S = 60
+
+# PartNumber -> row dict, loaded on first use; None until then
+_REORDER_POINTS = None
+# time.monotonic() after which the next lookup re-reads the table
+_REORDER_POINTS_EXPIRES = 0.0
+
+def load_reorder_points():
+    """
+    Reads the whole reorder_points table (one query) into the lookup dict.
+    A failure keeps the previous rows and is not retried for REORDER_POINTS_RETRY_S,
+    so Stock Enquiry does not try a blocking connect on every part it shows.
+    """
+    global _REORDER_POINTS, _REORDER_POINTS_EXPIRES
+    # Set before connecting: a failure below leaves the back-off in place
+    _REORDER_POINTS_EXPIRES = time.monotonic() + REORDER_POINTS_RETRY_S
+    conn = inventory_data.get_db_connection(quiet=True)
+    if conn is None:
+        return False
+    cursor = conn.cursor(dictionary=True)
+    try:
+        query_log.execute(cursor, "SELECT PartNumber, Method, PeriodDays, ForecastDemand, ReorderPoint, ComputedAt "
+                                  "FROM reorder_points")
+        _REORDER_POINTS = {row['PartNumber']: row for row in cursor.fetchall()}
+        _REORDER_POINTS_EXPIRES = time.monotonic() + REORDER_POINTS_TTL_S
+        return True
+    except mysql.connector.Error as err:
+        inventory_data._report('warning', "Data Warning", f"Could not read reorder points: {err}")
+        return False
+    finally:
+        cursor.close()
+        if conn.is_connected():
+            conn.close()
+
+def invalidate_reorder_points():
+    """Makes the next lookup re-read the table (after a batch run)."""
+    global _REORDER_POINTS, _REORDER_POINTS_EXPIRES
+    _REORDER_POINTS = None
+    _REORDER_POINTS_EXPIRES = 0.0
+
+def get_reorder_point(part_num):
+    """Returns the part's reorder_points row as a dict, or None if it has none."""
+    if time.monotonic() >= _REORDER_POINTS_EXPIRES:
+        load_reorder_points()
+    if _REORDER_POINTS is None:
+        return None
+    return _REORDER_POINTS.get(str(part_num).strip())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Forecast demand and suggest reorder points for every part.")
+    parser.add_argument('--period', choices=sorted(PERIOD_DAYS), default=DEFAULT_PERIOD,
+                        help="Size of one demand bucket (default: week).")
+    parser.add_argument('--history', type=int, default=DEFAULT_HISTORY_PERIODS,
+                        help="Number of periods of history to fit (default: 52).")
+    parser.add_argument('--lead-time', type=float, default=DEFAULT_LEAD_TIME_PERIODS,
+                        help="Replenishment lead time in periods (default: 2).")
+    parser.add_argument('--window', type=int, default=DEFAULT_MA_WINDOW, help="Moving average window in periods.")
+    parser.add_argument('--alpha', type=float, default=DEFAULT_ALPHA, help="Exponential smoothing factor (0-1).")
+    parser.add_argument('--service-z', type=float, default=DEFAULT_SERVICE_Z, help="Safety stock z value.")
+    parser.add_argument('--workers', type=int, default=None, help="Processes to use (default: all cores).")
+    args = parser.parse_args(argv)
+
+    if args.history < 2 or not 0 < args.alpha <= 1 or args.window < 1:
+        print("Error: need --history >= 2, 0 < --alpha <= 1 and --window >= 1.", file=sys.stderr)
+        return 1
+    try:
+        summary = run(args.period, args.history, args.lead_time, args.window, args.alpha,
+                      args.service_z, args.workers)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    print(f"Reorder points for {summary['parts']:,} parts in {summary['seconds']}s "
+          f"(load {summary['load_s']}s, forecast {summary['forecast_s']}s, write {summary['write_s']}s)",
+          file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
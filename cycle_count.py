@@ -0,0 +1,320 @@
+# -------------------------------------------#
+# cycle_count.py - Cycle counts: snapshot, count, review variances, post
+#
+# A count session covers a set of parts at one location:
+#   1. start_count() snapshots the expected quantity of every part together
+#      with the ledger position (highest MovementID) the snapshot includes.
+#   2. record_count() stores what was counted (scanned or typed) together with
+#      the ledger position at that moment.
+#   3. count_variances() computes every line's variance in one vectorized pass:
+#          variance = counted - (expected + movements between the two positions)
+#      so receipts and issues made while the count was going on are not
+#      mistaken for shrinkage or surplus.
+#   4. post_count() writes all non-zero variances as COUNT movements (quantity
+#      deltas + ledger + change feed) in one transaction and patches the cache.
+# Variances are posted as deltas, so movements made after a part was counted
+# are kept too.
+#
+# Usage:
+#   count_id, error = start_count(['P-1001', 'P-1002'], 'MAIN')
+#   record_count(count_id, 'P-1001', 1, add=True)    # one scan
+#   record_count(count_id, 'P-1002', 40)             # typed total
+#   count_variances(count_id)                        # DataFrame to review
+#   post_count(count_id)
+# -------------------------------------------#
+
+import numpy as np
+import pandas as pd
+import mysql.connector
+
+import abc_classification
+import inventory_data
+import perf_metrics
+import query_log
+
+STATUS_OPEN = 'OPEN'
+STATUS_POSTED = 'POSTED'
+STATUS_CANCELLED = 'CANCELLED'
+
+# Parts per snapshot statement (IN list)
+SNAPSHOT_CHUNK = 1000
+
+# Locking read: waits for movements of these parts that are still in flight and
+# blocks new ones until the snapshot commits. Every movement changes the
+# inventory row before it writes its ledger row, so the ledger position read
+# next covers exactly the movements included in these quantities.
+SNAPSHOT_SQL = """
+    SELECT i.PartNumber, COALESCE(s.Quantity, 0) FROM inventory i
+    LEFT JOIN stock_locations s ON s.PartNumber = i.PartNumber AND s.LocationCode = %s
+    WHERE i.PartNumber IN ({placeholders})
+    ORDER BY i.PartNumber
+    FOR SHARE
+"""
+LEDGER_POSITION_SQL = "SELECT COALESCE(MAX(MovementID), 0) FROM stock_movements"
+
+_RECORD_SQL = """
+    UPDATE cycle_count_lines l JOIN cycle_counts c ON c.CountID = l.CountID AND c.Status = 'OPEN'
+    SET l.CountedQty = {counted},
+        l.CountedAfterID = (SELECT COALESCE(MAX(m.MovementID), 0) FROM stock_movements m)
+    WHERE l.CountID = %s AND l.PartNumber = %s
+"""
+RECORD_SET_SQL = _RECORD_SQL.format(counted="%s")
+RECORD_ADD_SQL = _RECORD_SQL.format(counted="COALESCE(l.CountedQty, 0) + %s")
+
+# Expected, counted and the net movement between snapshot and count, per line
+LINES_SQL = """
+    SELECT l.PartNumber, l.ExpectedQty, l.CountedQty, COALESCE(SUM(m.QtyChange), 0) AS Moved
+    FROM cycle_count_lines l
+    JOIN cycle_counts c ON c.CountID = l.CountID
+    LEFT JOIN stock_movements m
+           ON m.PartNumber = l.PartNumber AND m.LocationCode = c.LocationCode
+          AND m.MovementID > c.SnapshotMovementID AND m.MovementID <= l.CountedAfterID
+    WHERE l.CountID = %s
+    GROUP BY l.PartNumber, l.ExpectedQty, l.CountedQty
+    ORDER BY l.PartNumber
+"""
+
+VARIANCE_COLUMNS = ['Expected', 'Moved', 'Counted', 'IsCounted', 'Variance', 'VarianceValue']
+
+
+def _parse_count(quantity):
+    """Returns (count, None) or (None, error message). Zero is a valid count."""
+    try:
+        count = int(quantity)
+    except (TypeError, ValueError):
+        return None, "Error: Count must be a valid whole number."
+    if count < 0:
+        return None, "Error: Count cannot be negative."
+    return count, None
+
+
+def select_parts(prefix='', value_class=None):
+    """
+    Parts in the cache whose number starts with prefix, optionally only one
+    ABC value class ('A', 'B' or 'C'), sorted. None while the classification
+    is still being calculated.
+    """
+    parts = inventory_data.INVENTORY_CACHE.to_frame().index.astype(str)
+    if prefix:
+        parts = parts[parts.str.startswith(prefix)]
+    if value_class:
+        classes = abc_classification.classification()
+        if classes is None:
+            return None
+        parts = parts[classes['ValueClass'].reindex(parts).to_numpy() == value_class]
+    return sorted(parts)
+
+
+# --- Variances ---
+
+def _variance_frame(rows):
+    """DataFrame of VARIANCE_COLUMNS from LINES_SQL rows (one vectorized pass, no per-line logic)."""
+    lines = pd.DataFrame(rows, columns=['PartNumber', 'Expected', 'Counted', 'Moved']).set_index('PartNumber')
+    expected = lines['Expected'].to_numpy(dtype=np.int64)
+    moved = pd.to_numeric(lines['Moved']).to_numpy(dtype=np.int64)
+    counted = pd.to_numeric(lines['Counted'])
+    is_counted = counted.notna().to_numpy()
+    counted = counted.fillna(0).to_numpy(dtype=np.int64)
+    # Uncounted lines are left alone, not treated as a count of zero
+    variance = np.where(is_counted, counted - (expected + moved), 0)
+    prices = inventory_data.INVENTORY_CACHE.to_frame()['UnitPrice'].reindex(lines.index).fillna(0)
+    return pd.DataFrame({
+        'Expected': expected,
+        'Moved': moved,
+        'Counted': counted,
+        'IsCounted': is_counted,
+        'Variance': variance,
+        'VarianceValue': variance * prices.to_numpy(dtype=np.float64),
+    }, index=lines.index, columns=VARIANCE_COLUMNS)
+
+
+def count_variances(count_id):
+    """
+    The count's lines with their variances, indexed by PartNumber (columns
+    VARIANCE_COLUMNS), or None if the database could not be read.
+    """
+    conn = inventory_data.get_db_connection()
+    if conn is None:
+        return None
+    cursor = conn.cursor()
+    try:
+        query_log.execute(cursor, LINES_SQL, (int(count_id),))
+        return _variance_frame(cursor.fetchall())
+    except mysql.connector.Error as err:
+        inventory_data._report('error', "DB Operation Error", f"SQL Error during execution: {err}")
+        return None
+    finally:
+        cursor.close()
+        if conn.is_connected():
+            conn.close()
+
+
+# --- Sessions ---
+
+@perf_metrics.timed('count.start')
+def start_count(parts, location=inventory_data.DEFAULT_LOCATION):
+    """
+    Opens a count of `parts` at `location` and snapshots their expected quantities.
+    Returns (CountID, None) or (None, error message).
+    """
+    location, error = inventory_data._parse_location(location)
+    if error:
+        return None, error
+    parts = sorted({str(part).strip() for part in parts})
+    unknown = [part for part in parts if part not in inventory_data.INVENTORY_CACHE]
+    if unknown:
+        return None, f"Error: Part Number not found: {unknown[0]}" + (f" and {len(unknown) - 1} more" if len(unknown) > 1 else "")
+    if not parts:
+        return None, "Error: Nothing to count."
+    created = []
+
+    def work(cursor):
+        # Locks are taken in PartNumber order (parts is sorted), like every stock movement
+        snapshot = []
+        for start in range(0, len(parts), SNAPSHOT_CHUNK):
+            chunk = parts[start:start + SNAPSHOT_CHUNK]
+            sql = SNAPSHOT_SQL.format(placeholders=', '.join(['%s'] * len(chunk)))
+            query_log.execute(cursor, sql, [location] + chunk)
+            snapshot.extend(cursor.fetchall())
+        if len(snapshot) < len(parts):
+            return "Error: Some parts were deleted on another workstation. Please start the count again."
+        query_log.execute(cursor, LEDGER_POSITION_SQL)
+        position = int(cursor.fetchone()[0])
+
+        query_log.execute(cursor, "INSERT INTO cycle_counts (LocationCode, SnapshotMovementID) VALUES (%s, %s)",
+                          (location, position))
+        count_id = cursor.lastrowid
+        query_log.executemany(cursor, "INSERT INTO cycle_count_lines (CountID, PartNumber, ExpectedQty) VALUES (%s, %s, %s)",
+                              [(count_id, part, int(qty)) for part, qty in snapshot])
+        created.append(count_id)
+        return None
+
+    error = inventory_data._run_transaction(work)
+    if error:
+        return None, error
+    return created[0], None
+
+
+def record_count(count_id, part_num, quantity, add=False):
+    """
+    Records the counted quantity of one part. add=True adds to what was counted
+    so far (one scan = one or more units), otherwise quantity replaces it.
+    """
+    part_num = str(part_num).strip()
+    count, error = _parse_count(quantity)
+    if error:
+        return error
+    counted = []
+
+    def work(cursor):
+        query_log.execute(cursor, RECORD_ADD_SQL if add else RECORD_SET_SQL, (count, int(count_id), part_num))
+        if cursor.rowcount == 0:
+            query_log.execute(cursor, "SELECT Status FROM cycle_counts WHERE CountID = %s", (int(count_id),))
+            row = cursor.fetchone()
+            if row is None or row[0] != STATUS_OPEN:
+                return f"Error: Count {count_id} is not open."
+            return f"Error: {part_num} is not part of count {count_id}."
+        query_log.execute(cursor, "SELECT CountedQty FROM cycle_count_lines WHERE CountID = %s AND PartNumber = %s",
+                          (int(count_id), part_num))
+        counted.append(int(cursor.fetchone()[0]))
+        return None
+
+    error = inventory_data._run_transaction(work)
+    if error:
+        return error
+    return f"Count recorded. {part_num}: {counted[0]}"
+
+
+@perf_metrics.timed('count.post')
+def post_count(count_id):
+    """
+    Posts every counted line's variance as a COUNT movement, all in one
+    transaction, and closes the count. Lines never counted are not adjusted.
+    """
+    adjustments = []
+    summary = {}
+
+    def work(cursor):
+        query_log.execute(cursor, "SELECT Status, LocationCode FROM cycle_counts WHERE CountID = %s FOR UPDATE",
+                          (int(count_id),))
+        row = cursor.fetchone()
+        if row is None or row[0] != STATUS_OPEN:
+            return f"Error: Count {count_id} is not open."
+        location = row[1]
+
+        query_log.execute(cursor, LINES_SQL, (int(count_id),))
+        variances = _variance_frame(cursor.fetchall())
+        counted = variances[variances['IsCounted']]
+        if counted.empty:
+            return "Error: Nothing has been counted yet."
+        changed = counted[counted['Variance'] != 0]
+
+        movements = [(part, int(variance), inventory_data.MOVEMENT_COUNT, location)
+                     for part, variance in changed['Variance'].items()]
+        if movements:
+            for sql, params in inventory_data._movement_statements(movements):
+                if params:
+                    query_log.executemany(cursor, sql, params)
+        query_log.executemany(cursor, "UPDATE cycle_count_lines SET Variance = %s WHERE CountID = %s AND PartNumber = %s",
+                              [(int(variance), int(count_id), part) for part, variance in counted['Variance'].items()])
+        query_log.execute(cursor, "UPDATE cycle_counts SET Status = %s, ClosedAt = NOW(6) WHERE CountID = %s",
+                          (STATUS_POSTED, int(count_id)))
+
+        adjustments.extend(movements)
+        summary.update(counted=len(counted), net=int(changed['Variance'].sum()),
+                       value=float(changed['VarianceValue'].sum()))
+        return None
+
+    error = inventory_data._run_transaction(work)
+    if error:
+        return error
+    with perf_metrics.measure('cache.update'):
+        for part_num, variance, _, location in adjustments:
+            try:
+                inventory_data.INVENTORY_CACHE.adjust_location_quantity(part_num, location, variance)
+            except KeyError:
+                pass # Part deleted meanwhile
+    value = summary['value']
+    return (f"Count Posted. {summary['counted']} line(s) counted, {len(adjustments)} adjusted "
+            f"(net {summary['net']:+,} units, {'-' if value < 0 else '+'}${abs(value):,.2f}).")
+
+
+def cancel_count(count_id):
+    """Closes an open count without posting anything."""
+    def work(cursor):
+        query_log.execute(cursor, "UPDATE cycle_counts SET Status = %s, ClosedAt = NOW(6) WHERE CountID = %s AND Status = %s",
+                          (STATUS_CANCELLED, int(count_id), STATUS_OPEN))
+        if cursor.rowcount == 0:
+            return f"Error: Count {count_id} is not open."
+        return None
+
+    error = inventory_data._run_transaction(work)
+    return error or f"Count {count_id} cancelled."
+
+
+def open_counts():
+    """
+    Returns the open counts as a list of dicts (CountID, LocationCode, CreatedAt,
+    Lines, Counted), oldest first, or None if the database could not be read.
+    """
+    sql = """
+        SELECT c.CountID, c.LocationCode, c.CreatedAt, COUNT(*) AS Lines, COUNT(l.CountedQty) AS Counted
+        FROM cycle_counts c JOIN cycle_count_lines l ON l.CountID = c.CountID
+        WHERE c.Status = 'OPEN'
+        GROUP BY c.CountID, c.LocationCode, c.CreatedAt
+        ORDER BY c.CountID
+    """
+    conn = inventory_data.get_db_connection()
+    if conn is None:
+        return None
+    cursor = conn.cursor(dictionary=True)
+    try:
+        query_log.execute(cursor, sql)
+        return cursor.fetchall()
+    except mysql.connector.Error as err:
+        inventory_data._report('error', "DB Operation Error", f"SQL Error during execution: {err}")
+        return None
+    finally:
+        cursor.close()
+        if conn.is_connected():
+            conn.close()
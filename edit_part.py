@@ -6,6 +6,8 @@ import shutil
 
 # Import data handling functions and constants
 import inventory_data 
+import notifications
+import perf_metrics
 
 # Define a stable directory to store all part images
 IMAGE_DIR = "part_images" 
@@ -19,6 +21,7 @@ class EditPartWindow:
         
         # State variables
         self.current_part_num = None
+        self.loaded_version = None # RowVersion of the part when it was loaded (for conflict detection)
         self.selected_photo_path = None 
         self.preview_image_ref = None   
         
@@ -46,6 +49,7 @@ class EditPartWindow:
         
         # Reset state when opening
         self.current_part_num = None
+        self.loaded_version = None
         self.selected_photo_path = None
         self.preview_image_ref = None
         
@@ -175,6 +179,13 @@ class EditPartWindow:
         self._set_form_state(tk.DISABLED)
         self.edit_part_window.protocol("WM_DELETE_WINDOW", lambda: self.inventory_window_instance.return_to_inventory_menu(self.edit_part_window))
 
+    def reset(self):
+        """Puts the window back to its freshly-opened state (called each time it is shown)."""
+        self.entry_part_num_search.delete(0, 'end')
+        self._clear_form()
+        self._set_form_state(tk.DISABLED)
+        self.entry_part_num_search.focus_set()
+
     def _set_form_state(self, state):
         """Enables or disables the editable input fields and control buttons."""
         for widget in self.editable_widgets:
@@ -185,6 +196,7 @@ class EditPartWindow:
     def _clear_form(self):
         """Clears all input fields and resets internal state/display."""
         self.current_part_num = None
+        self.loaded_version = None
         
         self.part_num_display.config(text="N/A")
         
@@ -218,8 +230,9 @@ class EditPartWindow:
             messagebox.showerror("Search Error", f"Part Number '{search_num}' not found.")
             return
 
-        # Store the current part number
+        # Store the current part number and the version the edits will be based on
         self.current_part_num = search_num
+        self.loaded_version = part_data['RowVersion']
         
         # Enable the form and buttons
         self._set_form_state(tk.NORMAL)
@@ -266,6 +279,7 @@ class EditPartWindow:
             self._display_photo_preview(file_path)
 
 
+    @perf_metrics.timed('ui.image_display')
     def _display_photo_preview(self, file_path):
         """Displays a small thumbnail of the selected photo using PIL."""
         try:
@@ -289,7 +303,7 @@ class EditPartWindow:
             self.photo_preview_label.config(text="Image Load Error", image='', compound=tk.NONE)
             # Safe way to handle missing part_num index
             try:
-                self.selected_photo_path = inventory_data.INVENTORY_DF.loc[self.current_part_num, 'ImagePath'] 
+                self.selected_photo_path = inventory_data.get_part_data(self.current_part_num)['ImagePath'] 
             except Exception:
                 self.selected_photo_path = None
             self.preview_image_ref = None
@@ -311,8 +325,9 @@ class EditPartWindow:
             return
 
         # 1. Handle Image Copying/Update Logic
-        # Get the currently saved image path from the DataFrame
-        saved_image_path = inventory_data.INVENTORY_DF.loc[part_num, 'ImagePath'] 
+        # Get the currently saved image path from the cache
+        part_data = inventory_data.get_part_data(part_num)
+        saved_image_path = part_data['ImagePath'] if part_data else ''
         original_image_path_selected = self.selected_photo_path 
         image_path_to_save = saved_image_path
 
@@ -343,19 +358,31 @@ class EditPartWindow:
         
         
         # 2. Call the data module to update the data
-        result_message = inventory_data.update_part_data(part_num, desc, price_str, image_path_to_save)
+        result_message = inventory_data.update_part_data(part_num, desc, price_str, image_path_to_save,
+                                                         expected_version=self.loaded_version)
         
         # 3. Display the result
-        if result_message.startswith("Error"):
-            messagebox.showerror("Update Error", result_message)
+        if result_message.startswith(inventory_data.UPDATE_CONFLICT):
+            # Someone else saved first: offer the latest data instead of overwriting it
+            if messagebox.askyesno("Update Conflict", result_message + "\n\nReload the latest data now? Your unsaved edits will be discarded."):
+                self.reload_current_part()
+        elif result_message.startswith("Error"):
+            notifications.error("Update Error", result_message)
         elif result_message.startswith("Update Successful"):
-            messagebox.showinfo("Update Status", result_message)
+            notifications.info("Update Status", result_message)
             self._clear_form()
             self.entry_part_num_search.delete(0, 'end')
             self._set_form_state(tk.DISABLED)
         else:
             messagebox.showwarning("Status", result_message)
 
+    def reload_current_part(self):
+        """Reloads the current part (already refreshed in the cache) into the form."""
+        part_num = self.current_part_num
+        self.entry_part_num_search.delete(0, 'end')
+        self.entry_part_num_search.insert(0, part_num)
+        self.handle_search_part()
+
     def handle_delete_part(self):
         """Prompts for confirmation and calls the data module to delete the part."""
         
@@ -366,8 +393,9 @@ class EditPartWindow:
         part_num = self.current_part_num
         
         if messagebox.askyesno("Confirm Delete", f"Are you sure you want to permanently delete Part Number {part_num}?"):
-            # 1. Get the image path for cleanup BEFORE deletion from DF
-            image_path_to_delete = inventory_data.INVENTORY_DF.loc[part_num, 'ImagePath']
+            # 1. Get the image path for cleanup BEFORE deletion from the cache
+            part_data = inventory_data.get_part_data(part_num)
+            image_path_to_delete = part_data['ImagePath'] if part_data else ''
             
             # 2. Call the data module to delete the data
             result_message = inventory_data.delete_part_data(part_num)
@@ -384,7 +412,7 @@ class EditPartWindow:
                     except Exception as e:
                         messagebox.showwarning("Cleanup Warning", f"Could not delete associated image file: {e}")
 
-                messagebox.showinfo("Deletion Status", result_message)
+                notifications.info("Deletion Status", result_message)
                 self._clear_form()
                 self.entry_part_num_search.delete(0, 'end')
                 self._set_form_state(tk.DISABLED)
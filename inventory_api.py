@@ -0,0 +1,415 @@
+# -------------------------------------------#
+# inventory_api.py - Local HTTP/JSON API for MES and barcode stations
+#
+# A single-process asyncio server. Lookups are answered straight from the
+# in-memory cache on the event loop; writes are queued and executed in batches
+# on a worker thread that uses pooled DB connections, so the loop never blocks
+# on MySQL.
+#
+# Usage:
+#   python inventory_api.py --host 0.0.0.0 --port 8080
+#
+# Endpoints (JSON in / JSON out):
+#   GET    /health
+#   GET    /metrics                      per-route request latency (p50/p95/p99)
+#   GET    /parts/<part>                 one part
+#   GET    /parts?ids=A,B,C              several parts in one request
+#   POST   /parts                        {"part", "description", "price", "image"}
+#   PUT    /parts/<part>                 {"description", "price", "image", "version"}
+#   DELETE /parts/<part>
+#   GET    /locations                    known stock locations
+#   POST   /stock/receive                {"part", "qty", "location"}
+#   POST   /stock/issue                  {"part", "qty", "location"}
+#   POST   /stock/moves                  [{"op": "receive"|"issue", "part", "qty", "location"}, ...]
+#   POST   /reservations                 {"work_order", "part", "qty"} or {"work_order", "lines": [{"part", "qty"}, ...]}
+#   POST   /reservations/release         {"work_order", "part"}   ("part" optional: whole work order)
+#   POST   /reservations/consume         {"work_order", "part", "qty", "location"}
+#   POST   /kits/check                   [{"part", "qty"}, ...]   available-to-promise per line
+#
+# "location" is optional and defaults to the main storeroom.
+#
+# With --coalesce-writes, receipts and issues go through stock_queue's
+# write-behind queue instead (one transaction per flush window).
+# -------------------------------------------#
+
+import argparse
+import asyncio
+import collections
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, parse_qs, unquote
+
+# The cache is loaded explicitly in main(), after the headless reporter is set
+os.environ.setdefault('INVENTORY_AUTOLOAD', '0')
+
+import inventory_data
+import query_log
+import reservations
+from stock_queue import StockMovementQueue, DEFAULT_FLUSH_INTERVAL, DEFAULT_MAX_BATCH
+
+logger = logging.getLogger('inventory_api')
+
+DEFAULT_PORT = 8080
+MAX_WRITE_BATCH = 200
+MAX_BODY_BYTES = 1024 * 1024
+LATENCY_SAMPLES = 10000
+
+HTTP_REASONS = {200: 'OK', 201: 'Created', 400: 'Bad Request', 404: 'Not Found',
+                405: 'Method Not Allowed', 409: 'Conflict', 413: 'Payload Too Large',
+                500: 'Internal Server Error', 503: 'Service Unavailable'}
+
+
+def _log_reporter(level, title, message):
+    """Error reporter for the data layer: log instead of showing a dialog."""
+    log = logger.warning if level == 'warning' else logger.error
+    log("%s: %s", title, message)
+
+
+# --- Metrics ---
+
+class LatencyRecorder:
+    """Keeps the most recent request latencies per route and reports percentiles."""
+
+    def __init__(self, max_samples=LATENCY_SAMPLES):
+        self._samples = collections.defaultdict(lambda: collections.deque(maxlen=max_samples))
+        self._counts = collections.Counter()
+
+    def record(self, route, seconds):
+        self._samples[route].append(seconds)
+        self._counts[route] += 1
+
+    def snapshot(self):
+        report = {}
+        for route, samples in self._samples.items():
+            ordered = sorted(samples)
+            n = len(ordered)
+
+            def pct(p):
+                return round(ordered[min(n - 1, int(p / 100.0 * n))] * 1000, 3)
+
+            report[route] = {'count': self._counts[route], 'p50_ms': pct(50),
+                             'p95_ms': pct(95), 'p99_ms': pct(99), 'max_ms': round(ordered[-1] * 1000, 3)}
+        return report
+
+
+# --- Result Mapping ---
+
+def _status_for_result(result):
+    """Maps the data layer's result strings onto HTTP status codes."""
+    if 'Successful' in result or 'successfully' in result:
+        return 200
+    if 'not found' in result:
+        return 404
+    # 'Insufficient stock at ...', 'Insufficient unreserved stock', 'Insufficient available stock'
+    if 'already exist' in result or 'Insufficient' in result or result.startswith(inventory_data.UPDATE_CONFLICT):
+        return 409
+    if result.startswith('Error'):
+        return 400
+    return 500
+
+
+def _run_write(job):
+    """Executes one write job (worker thread). Returns (status, payload)."""
+    op, args = job
+    func = {
+        'create': inventory_data.create_new_part_data,
+        'update': inventory_data.update_part_data,
+        'delete': inventory_data.delete_part_data,
+        'receive': inventory_data.update_stock_quantity,
+        'issue': inventory_data.issue_stock_quantity,
+        'reserve': reservations.reserve_kit,
+        'release': reservations.release,
+        'consume': reservations.consume,
+    }[op]
+    try:
+        result = func(*args)
+    except Exception as e:
+        logger.exception("Write %s failed", op)
+        return 500, {'error': str(e)}
+    status = _status_for_result(result)
+    return status, ({'message': result} if status == 200 else {'error': result})
+
+
+def _run_write_batch(jobs):
+    """Worker thread: runs a batch of queued writes in order."""
+    return [_run_write(job) for job in jobs]
+
+
+# --- Server ---
+
+class InventoryApiServer:
+    def __init__(self, stock_queue=None):
+        # One writer thread keeps the cache read-modify-write sequence race free
+        # (issues are checked against the cached stock before they are committed,
+        # so two writer threads could both pass the check). The connection pool
+        # keeps the per-write connect cost off the hot path.
+        self.stock_queue = stock_queue
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='inventory-writer')
+        self._write_queue = None
+        self._writer_task = None
+        self.metrics = LatencyRecorder()
+        self.started = time.time()
+
+    async def start(self, host, port):
+        self._write_queue = asyncio.Queue()
+        self._writer_task = asyncio.create_task(self._writer_loop())
+        return await asyncio.start_server(self._handle_connection, host, port)
+
+    # --- Write Batching ---
+
+    async def _writer_loop(self):
+        """Drains whatever writes are queued and runs them in one executor hop."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._write_queue.get()]
+            while len(batch) < MAX_WRITE_BATCH and not self._write_queue.empty():
+                batch.append(self._write_queue.get_nowait())
+
+            jobs = [job for job, _ in batch]
+            try:
+                results = await loop.run_in_executor(self._executor, _run_write_batch, jobs)
+            except Exception as e:
+                results = [(500, {'error': str(e)})] * len(batch)
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    async def submit_writes(self, jobs):
+        """Queues write jobs and waits until all of them have been executed."""
+        loop = asyncio.get_running_loop()
+        futures = []
+        for job in jobs:
+            future = loop.create_future()
+            self._write_queue.put_nowait((job, future))
+            futures.append(future)
+        return await asyncio.gather(*futures)
+
+    async def submit_stock_moves(self, jobs):
+        """Runs receive/issue jobs through the coalescing queue if enabled, else the writer."""
+        if self.stock_queue is None:
+            return await self.submit_writes(jobs)
+
+        futures = []
+        for op, (part_num, qty, location) in jobs:
+            submit = self.stock_queue.submit_receipt if op == 'receive' else self.stock_queue.submit_issue
+            futures.append(asyncio.wrap_future(submit(part_num, qty, location)))
+        results = []
+        for result in await asyncio.gather(*futures):
+            status = _status_for_result(result)
+            results.append((status, {'message': result} if status == 200 else {'error': result}))
+        return results
+
+    # --- Routing ---
+
+    async def dispatch(self, method, path, query, body):
+        """Returns (route name for metrics, status, payload)."""
+        parts = [unquote(p) for p in path.strip('/').split('/') if p]
+
+        if parts == ['health']:
+            return 'health', 200, {'status': 'ok', 'parts': len(inventory_data.INVENTORY_CACHE),
+                                   'uptime_s': round(time.time() - self.started, 1)}
+        if parts == ['metrics']:
+            return 'metrics', 200, self.metrics.snapshot()
+        if parts == ['locations']:
+            return 'locations', 200, {'locations': inventory_data.list_locations()}
+
+        if parts and parts[0] == 'parts':
+            if len(parts) == 1 and method == 'GET':
+                ids = [i for i in ','.join(query.get('ids', [])).split(',') if i]
+                found = {}
+                for part_num in ids:
+                    found[part_num] = inventory_data.get_part_data(part_num)
+                return 'lookup_batch', 200, {'parts': found}
+            if len(parts) == 1 and method == 'POST':
+                data = body or {}
+                job = ('create', (str(data.get('part', '')), data.get('description', ''),
+                                  str(data.get('price', '')), data.get('image', '')))
+                status, payload = (await self.submit_writes([job]))[0]
+                return 'create', (201 if status == 200 else status), payload
+            if len(parts) == 2:
+                part_num = parts[1]
+                if method == 'GET':
+                    part_data = inventory_data.get_part_data(part_num)
+                    if part_data is None:
+                        return 'lookup', 404, {'error': f"Part Number '{part_num}' not found."}
+                    return 'lookup', 200, {'PartNumber': part_num, **part_data}
+                if method == 'PUT':
+                    data = body or {}
+                    # "version" (RowVersion from a GET) makes the update fail with 409 if the part changed since
+                    job = ('update', (part_num, data.get('description', ''),
+                                      str(data.get('price', '')), data.get('image', ''), data.get('version')))
+                    status, payload = (await self.submit_writes([job]))[0]
+                    return 'update', status, payload
+                if method == 'DELETE':
+                    status, payload = (await self.submit_writes([('delete', (part_num,))]))[0]
+                    return 'delete', status, payload
+            return 'parts', 405, {'error': 'Method not allowed'}
+
+        if parts and parts[0] == 'stock' and method == 'POST':
+            if parts[1:] in (['receive'], ['issue']):
+                data = body or {}
+                job = (parts[1], (str(data.get('part', '')), str(data.get('qty', '')), data.get('location')))
+                status, payload = (await self.submit_stock_moves([job]))[0]
+                return parts[1], status, payload
+            if parts[1:] == ['moves']:
+                if not isinstance(body, list):
+                    return 'moves', 400, {'error': 'Expected a JSON list of moves.'}
+                jobs = []
+                for move in body:
+                    op = move.get('op') if isinstance(move, dict) else None
+                    if op not in ('receive', 'issue'):
+                        return 'moves', 400, {'error': f"Invalid move: {move!r}"}
+                    jobs.append((op, (str(move.get('part', '')), str(move.get('qty', '')), move.get('location'))))
+                results = await self.submit_stock_moves(jobs)
+                return 'moves', 200, {'results': [dict(payload, status=status) for status, payload in results]}
+
+        if parts and parts[0] == 'reservations' and method == 'POST':
+            data = body if isinstance(body, dict) else {}
+            work_order = str(data.get('work_order', ''))
+            if len(parts) == 1:
+                lines = data.get('lines', [data])
+                if not isinstance(lines, list) or not all(isinstance(line, dict) for line in lines):
+                    return 'reserve', 400, {'error': 'Expected "lines" to be a list of {"part", "qty"}.'}
+                kit = [(str(line.get('part', '')), line.get('qty')) for line in lines]
+                status, payload = (await self.submit_writes([('reserve', (work_order, kit))]))[0]
+                return 'reserve', status, payload
+            if parts[1:] == ['release']:
+                job = ('release', (work_order, data.get('part')))
+                status, payload = (await self.submit_writes([job]))[0]
+                return 'release', status, payload
+            if parts[1:] == ['consume']:
+                job = ('consume', (work_order, str(data.get('part', '')), str(data.get('qty', '')), data.get('location')))
+                status, payload = (await self.submit_writes([job]))[0]
+                return 'consume', status, payload
+
+        if parts == ['kits', 'check'] and method == 'POST':
+            if not isinstance(body, list) or not all(isinstance(line, dict) for line in body):
+                return 'kit_check', 400, {'error': 'Expected a JSON list of {"part", "qty"}.'}
+            try:
+                report = reservations.check_kit([(str(line.get('part', '')), line.get('qty')) for line in body])
+            except ValueError as e:
+                return 'kit_check', 400, {'error': str(e)}
+            lines = [{'part': part, 'required': int(row.Required), 'available': int(row.Available),
+                      'shortfall': int(row.Shortfall), 'known': bool(row.Known)} for part, row in report.iterrows()]
+            return 'kit_check', 200, {'available': not report['Shortfall'].any(), 'lines': lines}
+
+        return 'unknown', 404, {'error': f"No route for {method} {path}"}
+
+    # --- HTTP Handling ---
+
+    async def _handle_connection(self, reader, writer):
+        """Serves HTTP/1.1 requests (with keep-alive) on one client connection."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, _version = request_line.decode('latin-1').split()
+                except ValueError:
+                    await self._send(writer, 400, {'error': 'Malformed request line'}, keep_alive=False)
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                length = int(headers.get('content-length', 0) or 0)
+                if length > MAX_BODY_BYTES:
+                    await self._send(writer, 413, {'error': 'Request body too large'}, keep_alive=False)
+                    break
+
+                started = time.perf_counter()
+                body = None
+                if length:
+                    raw = await reader.readexactly(length)
+                    try:
+                        body = json.loads(raw)
+                    except ValueError:
+                        await self._send(writer, 400, {'error': 'Body is not valid JSON'}, keep_alive)
+                        continue
+
+                url = urlsplit(target)
+                try:
+                    route, status, payload = await self.dispatch(method.upper(), url.path, parse_qs(url.query), body)
+                except Exception as e:
+                    logger.exception("Unhandled error for %s %s", method, target)
+                    route, status, payload = 'error', 500, {'error': str(e)}
+
+                await self._send(writer, status, payload, keep_alive)
+                self.metrics.record(route, time.perf_counter() - started)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _send(self, writer, status, payload, keep_alive):
+        data = json.dumps(payload).encode('utf-8')
+        head = (f"HTTP/1.1 {status} {HTTP_REASONS.get(status, 'OK')}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(data)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode('latin-1') + data)
+        await writer.drain()
+
+
+async def serve(host, port, stock_queue=None):
+    server_app = InventoryApiServer(stock_queue)
+    server = await server_app.start(host, port)
+    logger.info("Inventory API listening on http://%s:%s (%d parts cached)",
+                host, port, len(inventory_data.INVENTORY_CACHE))
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inventory HTTP/JSON API server.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--query-log', default=query_log.DEFAULT_PATH, help="Structured SQL statement log file.")
+    parser.add_argument('--slow-ms', type=float, default=query_log.DEFAULT_SLOW_MS,
+                        help="Statements at or above this many ms get their EXPLAIN plan logged.")
+    parser.add_argument('--coalesce-writes', action='store_true',
+                        help="Batch receipts/issues through the write-behind queue.")
+    parser.add_argument('--flush-interval', type=float, default=DEFAULT_FLUSH_INTERVAL,
+                        help="Seconds a queued movement waits for its batch (with --coalesce-writes).")
+    parser.add_argument('--max-batch', type=int, default=DEFAULT_MAX_BATCH,
+                        help="Movements per transaction (with --coalesce-writes).")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    inventory_data.set_error_reporter(_log_reporter)
+    query_log.configure(args.query_log, args.slow_ms)
+    if not inventory_data.enable_connection_pool():
+        return 2
+    if not inventory_data.initialize_inventory():
+        return 2
+    # Keep the cache current with edits made from the desktop app and other servers
+    inventory_data.enable_change_feed()
+
+    stock_queue = None
+    if args.coalesce_writes:
+        stock_queue = StockMovementQueue(args.flush_interval, args.max_batch)
+
+    try:
+        asyncio.run(serve(args.host, args.port, stock_queue))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if stock_queue:
+            stock_queue.close()
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
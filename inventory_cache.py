@@ -0,0 +1,545 @@
+# -------------------------------------------#
+# inventory_cache.py - Slot-based in-memory inventory cache
+#
+# Replaces the concat/drop-and-copy DataFrame cache. Each column lives in a
+# preallocated NumPy array; a dict maps PartNumber -> slot and deleted slots
+# go on a free-list for reuse, so insert and delete are amortized O(1) and the
+# column dtypes never change. A DataFrame view is still available for reports.
+#
+# Memory layout (per slot):
+#   Quantity     int32
+#   UnitPrice    float64 (numeric, formatted only for display)
+#   Description  int32 code into a de-duplicated value table (dictionary encoding)
+#   ImagePath    int32 code into a table of directory prefixes + the file name
+#   RowVersion   uint32 copy of the DB row version (optimistic concurrency)
+#   Locations    int32 row of per-location quantities (one column per location)
+#   Reserved     int32 units held by open reservations (work orders)
+#   Supplier     int32 code into a de-duplicated value table
+#
+# Quantity is the part's total over all locations. Location movements update
+# the location cell and the total together, so the total never has to be summed.
+# Available-to-promise is Quantity - Reserved, two array reads per part.
+# -------------------------------------------#
+
+import sys
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Columns exposed to the rest of the application (same as the old INVENTORY_DF)
+CACHE_COLUMNS = ['Description', 'UnitPrice', 'Quantity', 'ImagePath']
+
+# Not part of the reporting view; returned by get() for edit screens
+VERSION_COLUMN = 'RowVersion'
+# Returned by get(): {LocationCode: quantity} for the locations holding stock
+LOCATIONS_KEY = 'Locations'
+# DB column / get() key for the reserved units, and get() key for available-to-promise
+RESERVED_COLUMN = 'ReservedQty'
+AVAILABLE_KEY = 'Available'
+# DB column / get() key for the supplier (used to select parts for bulk price changes)
+SUPPLIER_COLUMN = 'Supplier'
+
+INITIAL_CAPACITY = 1024
+
+# Pointer size of an entry in an object-dtype array
+_POINTER_BYTES = np.dtype(object).itemsize
+
+# Optional: Arrow-backed strings make the reporting view much smaller
+try:
+    import pyarrow  # noqa: F401
+    _VIEW_STRING_DTYPE = pd.StringDtype('pyarrow')
+except ImportError:
+    _VIEW_STRING_DTYPE = object
+
+
+def _split_image_path(path):
+    """Splits a path into (directory prefix incl. separator, file name)."""
+    cut = max(path.rfind('/'), path.rfind('\\')) + 1
+    return path[:cut], path[cut:]
+
+
+def _split_image_paths(paths):
+    """Vectorized _split_image_path for a Series; returns (prefixes, names) Series."""
+    split = paths.fillna('').astype(str).str.extract(r'^(.*[\\/])?([^\\/]*)$').fillna('')
+    return split[0], split[1]
+
+
+class _ValueTable:
+    """Append-only dictionary encoding: each distinct string is stored once."""
+
+    def __init__(self, values=None):
+        self.values = list(values) if values is not None else []
+        self.codes = {value: code for code, value in enumerate(self.values)}
+
+    def encode_many(self, values):
+        """Vectorized encode for a Series: only the distinct values touch the dict."""
+        codes, uniques = pd.factorize(values)
+        mapping = np.array([self.encode(v) for v in uniques], dtype=np.int32)
+        return mapping[codes] if len(codes) else np.zeros(0, dtype=np.int32)
+
+    def encode(self, value):
+        """Returns the code for value, adding it to the table if it is new."""
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.values.append(value)
+            self.codes[value] = code
+        return code
+
+    def nbytes(self):
+        """Approximate memory held by the table (strings, list and dict)."""
+        strings = sum(sys.getsizeof(v) for v in self.values)
+        return strings + sys.getsizeof(self.values) + sys.getsizeof(self.codes)
+
+
+class InventoryCache:
+    def __init__(self, capacity=INITIAL_CAPACITY):
+        """Creates an empty cache with room for `capacity` parts before the first resize."""
+        # Background threads (API server, flush queues) share the cache with the UI
+        self._lock = threading.RLock()
+        self._slots = {}   # PartNumber -> slot index
+        self._free = []    # Slots released by delete(), reused by insert()
+        self._size = 0     # High-water mark: slots [0, _size) have been used
+        self._location_codes = []  # Column -> LocationCode
+        self._location_index = {}  # LocationCode -> column
+        self._allocate(max(int(capacity), 1))
+
+        # Bumped on every mutation; used to invalidate the DataFrame view
+        self.version = 0
+        self._view = None
+        self._view_version = -1
+
+    # --- Storage Helpers ---
+
+    def _allocate(self, capacity):
+        """Creates fresh, empty column arrays (and value tables) of the given capacity."""
+        self._part = np.empty(capacity, dtype=object)
+        self._desc = np.zeros(capacity, dtype=np.int32)
+        self._price = np.zeros(capacity, dtype=np.float64)
+        self._qty = np.zeros(capacity, dtype=np.int32)
+        self._image_dir = np.zeros(capacity, dtype=np.int32)
+        self._image_name = np.empty(capacity, dtype=object)
+        self._row_version = np.zeros(capacity, dtype=np.uint32)
+        self._loc_qty = np.zeros((capacity, len(self._location_codes)), dtype=np.int32)
+        self._reserved = np.zeros(capacity, dtype=np.int32)
+        self._supplier = np.zeros(capacity, dtype=np.int32)
+        self._live = np.zeros(capacity, dtype=bool)
+
+        # Code 0 is always the empty string in all tables
+        self._desc_table = _ValueTable([''])
+        self._dir_table = _ValueTable([''])
+        self._supplier_table = _ValueTable([''])
+
+    def _columns(self):
+        return (self._part, self._desc, self._price, self._qty,
+                self._image_dir, self._image_name, self._row_version, self._loc_qty, self._reserved,
+                self._supplier, self._live)
+
+    def _grow(self):
+        """Doubles the capacity of every column array (amortized O(1) appends)."""
+        used = self._size
+        old = self._columns()
+        tables = self._desc_table, self._dir_table, self._supplier_table
+        self._allocate(len(self._part) * 2)
+        self._desc_table, self._dir_table, self._supplier_table = tables
+        for new_arr, old_arr in zip(self._columns(), old):
+            new_arr[:used] = old_arr[:used]
+
+    def _set_image_path(self, slot, image_path):
+        prefix, name = _split_image_path(image_path or '')
+        self._image_dir[slot] = self._dir_table.encode(prefix)
+        # File names are mostly unique; intern them so repeats share one object
+        self._image_name[slot] = sys.intern(name)
+
+    def _image_path(self, slot):
+        return self._dir_table.values[self._image_dir[slot]] + self._image_name[slot]
+
+    def _touch(self):
+        self.version += 1
+
+    @property
+    def capacity(self):
+        return len(self._part)
+
+    # --- Bulk Load ---
+
+    def clear(self):
+        """Drops every part and shrinks back to the initial capacity."""
+        with self._lock:
+            self._slots = {}
+            self._free = []
+            self._size = 0
+            self._allocate(INITIAL_CAPACITY)
+            self._touch()
+
+    def load_frame(self, frame):
+        """
+        Replaces the cache contents with a DataFrame indexed by PartNumber that has
+        the CACHE_COLUMNS columns (as returned by pd.read_sql), plus RowVersion and
+        ReservedQty if the table has them.
+        """
+        count = len(frame)
+        with self._lock:
+            # Leave some headroom so the first few inserts don't trigger a resize
+            self._allocate(max(INITIAL_CAPACITY, count + count // 4))
+            self._slots = {}
+            self._free = []
+            self._size = 0
+            self._append_frame(frame)
+
+    def insert_frame(self, frame):
+        """
+        Appends many new parts (same frame layout as load_frame) in one vectorized
+        merge. Raises KeyError, without changing anything, if any part is already cached.
+        """
+        with self._lock:
+            clashes = [p for p in frame.index.astype(str) if p in self._slots]
+            if clashes:
+                raise KeyError(f"{len(clashes)} part(s) already cached, e.g. {clashes[0]}")
+            self._append_frame(frame)
+
+    def _append_frame(self, frame):
+        """Writes the rows of `frame` into fresh slots at the end of the arrays."""
+        count = len(frame)
+        part_numbers = frame.index.astype(str).tolist()
+        while self._size + count > len(self._part):
+            self._grow()
+        start, stop = self._size, self._size + count
+
+        # Dictionary-encode Description and the ImagePath directory in vectorized passes
+        prefixes, names = _split_image_paths(frame['ImagePath'])
+        self._part[start:stop] = np.array(part_numbers, dtype=object)
+        self._desc[start:stop] = self._desc_table.encode_many(frame['Description'].fillna('').astype(str))
+        self._price[start:stop] = pd.to_numeric(frame['UnitPrice'], errors='coerce').fillna(0.0).to_numpy(dtype=np.float64)
+        self._qty[start:stop] = pd.to_numeric(frame['Quantity'], errors='coerce').fillna(0).to_numpy(dtype=np.int32)
+        self._image_dir[start:stop] = self._dir_table.encode_many(prefixes)
+        self._image_name[start:stop] = np.array([sys.intern(name) for name in names.tolist()], dtype=object)
+        if VERSION_COLUMN in frame.columns:
+            self._row_version[start:stop] = pd.to_numeric(frame[VERSION_COLUMN], errors='coerce').fillna(0).to_numpy(dtype=np.uint32)
+        else:
+            self._row_version[start:stop] = 0
+        if RESERVED_COLUMN in frame.columns:
+            self._reserved[start:stop] = pd.to_numeric(frame[RESERVED_COLUMN], errors='coerce').fillna(0).to_numpy(dtype=np.int32)
+        else:
+            self._reserved[start:stop] = 0
+        if SUPPLIER_COLUMN in frame.columns:
+            self._supplier[start:stop] = self._supplier_table.encode_many(frame[SUPPLIER_COLUMN].fillna('').astype(str))
+        else:
+            self._supplier[start:stop] = 0
+        self._live[start:stop] = True
+
+        self._slots.update(zip(part_numbers, range(start, stop)))
+        self._size = stop
+        self._touch()
+
+    # --- Lookups ---
+
+    def __len__(self):
+        return len(self._slots)
+
+    def __contains__(self, part_num):
+        return part_num in self._slots
+
+    def part_numbers(self):
+        """Returns a list of all cached part numbers."""
+        with self._lock:
+            return list(self._slots)
+
+    def get(self, part_num):
+        """Returns the cached row as a dict (numeric UnitPrice), or None if missing."""
+        with self._lock:
+            slot = self._slots.get(part_num)
+            if slot is None:
+                return None
+            return {
+                'Description': self._desc_table.values[self._desc[slot]],
+                'UnitPrice': float(self._price[slot]),
+                'Quantity': int(self._qty[slot]),
+                'ImagePath': self._image_path(slot),
+                VERSION_COLUMN: int(self._row_version[slot]),
+                LOCATIONS_KEY: self._locations_of(slot),
+                RESERVED_COLUMN: int(self._reserved[slot]),
+                AVAILABLE_KEY: int(self._qty[slot]) - int(self._reserved[slot]),
+                SUPPLIER_COLUMN: self._supplier_table.values[self._supplier[slot]],
+            }
+
+    def get_quantity(self, part_num):
+        """Returns the cached Quantity for a part (KeyError if missing)."""
+        return int(self._qty[self._slots[part_num]])
+
+    # --- Mutations ---
+
+    def insert(self, part_num, description, unit_price, quantity, image_path, row_version=0, supplier=''):
+        """Adds a new part in amortized O(1). Raises KeyError if it already exists."""
+        with self._lock:
+            if part_num in self._slots:
+                raise KeyError(f"Part {part_num} already cached")
+
+            if self._free:
+                slot = self._free.pop()
+            else:
+                if self._size == len(self._part):
+                    self._grow()
+                slot = self._size
+                self._size += 1
+
+            self._part[slot] = part_num
+            self._desc[slot] = self._desc_table.encode(description)
+            self._price[slot] = float(unit_price)
+            self._qty[slot] = int(quantity)
+            self._set_image_path(slot, image_path)
+            self._row_version[slot] = row_version
+            self._supplier[slot] = self._supplier_table.encode(supplier or '')
+            self._live[slot] = True
+            self._slots[part_num] = slot
+            self._touch()
+            return slot
+
+    def update(self, part_num, description=None, unit_price=None, image_path=None, row_version=None, supplier=None):
+        """Overwrites the descriptive fields that are not None (KeyError if missing)."""
+        with self._lock:
+            slot = self._slots[part_num]
+            if description is not None:
+                self._desc[slot] = self._desc_table.encode(description)
+            if unit_price is not None:
+                self._price[slot] = float(unit_price)
+            if image_path is not None:
+                self._set_image_path(slot, image_path)
+            if row_version is not None:
+                self._row_version[slot] = row_version
+            if supplier is not None:
+                self._supplier[slot] = self._supplier_table.encode(supplier)
+            self._touch()
+
+    def update_prices(self, part_numbers, prices, row_versions=None):
+        """
+        Vectorized UnitPrice (and RowVersion) update for many parts, in one pass
+        and one version bump. Unknown parts are skipped; returns how many were updated.
+        """
+        with self._lock:
+            slots = pd.Series(part_numbers, dtype=object).map(self._slots)
+            known = slots.notna().to_numpy()
+            rows = slots[known].to_numpy(dtype=np.int64)
+            self._price[rows] = np.asarray(prices, dtype=np.float64)[known]
+            if row_versions is not None:
+                self._row_version[rows] = np.asarray(row_versions, dtype=np.uint32)[known]
+            self._touch()
+            return int(known.sum())
+
+    def set_quantity(self, part_num, quantity):
+        """Sets the cached Quantity for a part (KeyError if missing)."""
+        with self._lock:
+            self._qty[self._slots[part_num]] = int(quantity)
+            self._touch()
+
+    def adjust_quantity(self, part_num, delta):
+        """Adds delta to the cached Quantity and returns the new value (KeyError if missing)."""
+        with self._lock:
+            slot = self._slots[part_num]
+            new_qty = int(self._qty[slot]) + int(delta)
+            self._qty[slot] = new_qty
+            self._touch()
+            return new_qty
+
+    def delete(self, part_num):
+        """Removes a part in O(1); its slot is tombstoned and reused later."""
+        with self._lock:
+            slot = self._slots.pop(part_num, None)
+            if slot is None:
+                return False
+            # Drop object references so the strings can be garbage collected
+            self._part[slot] = None
+            self._image_name[slot] = None
+            self._desc[slot] = 0
+            self._image_dir[slot] = 0
+            self._price[slot] = 0.0
+            self._qty[slot] = 0
+            self._row_version[slot] = 0
+            self._loc_qty[slot] = 0
+            self._reserved[slot] = 0
+            self._supplier[slot] = 0
+            self._live[slot] = False
+            self._free.append(slot)
+            self._touch()
+            return True
+
+    # --- Locations ---
+
+    def _location_column(self, location):
+        """Returns the column for a location, adding one (O(capacity), rare) if it is new."""
+        column = self._location_index.get(location)
+        if column is None:
+            column = len(self._location_codes)
+            self._location_codes.append(location)
+            self._location_index[location] = column
+            self._loc_qty = np.hstack([self._loc_qty, np.zeros((len(self._part), 1), dtype=np.int32)])
+        return column
+
+    def _locations_of(self, slot):
+        row = self._loc_qty[slot]
+        return {self._location_codes[c]: int(row[c]) for c in np.flatnonzero(row)}
+
+    def location_codes(self):
+        """Returns the locations that have (or had) stock in the cache."""
+        with self._lock:
+            return list(self._location_codes)
+
+    def load_locations(self, frame):
+        """
+        Replaces all per-location quantities from a DataFrame with PartNumber,
+        LocationCode and Quantity columns (rows for uncached parts are ignored).
+        Totals are not touched: they were loaded with the parts.
+        """
+        with self._lock:
+            for location in pd.unique(frame['LocationCode'].astype(str)):
+                self._location_column(location)
+            self._loc_qty[:] = 0
+            slots = frame['PartNumber'].astype(str).map(self._slots)
+            known = slots.notna().to_numpy()
+            rows = slots[known].to_numpy(dtype=np.int64)
+            columns = frame['LocationCode'].astype(str)[known].map(self._location_index).to_numpy(dtype=np.int64)
+            quantities = pd.to_numeric(frame['Quantity'], errors='coerce').fillna(0)[known].to_numpy(dtype=np.int32)
+            # add.at, not fancy assignment, in case a (part, location) pair repeats
+            np.add.at(self._loc_qty, (rows, columns), quantities)
+            self._touch()
+
+    def set_locations(self, part_num, quantities):
+        """Replaces one part's per-location quantities ({LocationCode: qty}; KeyError if missing)."""
+        with self._lock:
+            slot = self._slots[part_num]
+            columns = [self._location_column(location) for location in quantities]
+            self._loc_qty[slot] = 0
+            for column, qty in zip(columns, quantities.values()):
+                self._loc_qty[slot, column] = int(qty)
+            self._touch()
+
+    def get_location_quantity(self, part_num, location):
+        """Returns the cached quantity of a part at one location (KeyError if the part is missing)."""
+        slot = self._slots[part_num]
+        column = self._location_index.get(location)
+        return 0 if column is None else int(self._loc_qty[slot, column])
+
+    def adjust_location_quantity(self, part_num, location, delta):
+        """
+        Adds delta to the part's quantity at `location` and to its total in O(1).
+        Returns (new total, new location quantity) (KeyError if missing).
+        """
+        with self._lock:
+            slot = self._slots[part_num]
+            column = self._location_column(location)
+            new_location_qty = int(self._loc_qty[slot, column]) + int(delta)
+            new_qty = int(self._qty[slot]) + int(delta)
+            self._loc_qty[slot, column] = new_location_qty
+            self._qty[slot] = new_qty
+            self._touch()
+            return new_qty, new_location_qty
+
+    # --- Reservations ---
+
+    def get_available(self, part_num):
+        """Returns available-to-promise (Quantity - Reserved) for a part (KeyError if missing)."""
+        with self._lock:
+            slot = self._slots[part_num]
+            return int(self._qty[slot]) - int(self._reserved[slot])
+
+    def get_reserved(self, part_num):
+        """Returns the units held by open reservations (KeyError if missing)."""
+        return int(self._reserved[self._slots[part_num]])
+
+    def set_reserved(self, part_num, reserved):
+        """Sets the reserved units for a part (KeyError if missing)."""
+        with self._lock:
+            self._reserved[self._slots[part_num]] = int(reserved)
+            self._touch()
+
+    def adjust_reserved(self, part_num, delta):
+        """Adds delta to the reserved units. Returns (new reserved, new available) (KeyError if missing)."""
+        with self._lock:
+            slot = self._slots[part_num]
+            new_reserved = int(self._reserved[slot]) + int(delta)
+            self._reserved[slot] = new_reserved
+            self._touch()
+            return new_reserved, int(self._qty[slot]) - new_reserved
+
+    def available_many(self, part_numbers):
+        """
+        Vectorized available-to-promise for a list of parts.
+        Returns (available int64 array, known bool array); unknown parts get 0.
+        """
+        with self._lock:
+            slots = pd.Series(part_numbers, dtype=object).map(self._slots)
+            known = slots.notna().to_numpy()
+            rows = slots[known].to_numpy(dtype=np.int64)
+            available = np.zeros(len(slots), dtype=np.int64)
+            available[known] = self._qty[rows].astype(np.int64) - self._reserved[rows]
+            return available, known
+
+    # --- Reporting View ---
+
+    def to_frame(self):
+        """
+        Returns a DataFrame snapshot (index PartNumber, CACHE_COLUMNS) for reports.
+        The snapshot is rebuilt only after the cache has changed; edits made to it
+        are NOT written back to the cache.
+        """
+        with self._lock:
+            if self._view is not None and self._view_version == self.version:
+                return self._view
+
+            live = np.flatnonzero(self._live[:self._size])
+            dirs = np.asarray(self._dir_table.values, dtype=object)[self._image_dir[live]]
+            image_paths = dirs + self._image_name[live]
+            frame = pd.DataFrame(
+                {
+                    'Description': pd.Categorical.from_codes(self._desc[live], categories=pd.Index(self._desc_table.values)),
+                    'UnitPrice': self._price[live],
+                    'Quantity': self._qty[live],
+                    'ImagePath': pd.array(image_paths, dtype=_VIEW_STRING_DTYPE),
+                },
+                index=pd.Index(self._part[live], name='PartNumber', dtype=_VIEW_STRING_DTYPE),
+                columns=CACHE_COLUMNS,
+            )
+            self._view = frame
+            self._view_version = self.version
+            return frame
+
+    def suppliers(self):
+        """Supplier of every part as a categorical Series, in the same order as to_frame()."""
+        with self._lock:
+            live = np.flatnonzero(self._live[:self._size])
+            return pd.Series(
+                pd.Categorical.from_codes(self._supplier[live], categories=pd.Index(self._supplier_table.values)),
+                index=pd.Index(self._part[live], name='PartNumber', dtype=_VIEW_STRING_DTYPE),
+                name=SUPPLIER_COLUMN,
+            )
+
+    # --- Memory Accounting ---
+
+    def memory_report(self):
+        """
+        Returns the approximate resident bytes of each cache column (arrays plus the
+        strings they reference) and the total, as {'columns': {...}, 'total_bytes': n}.
+        """
+        with self._lock:
+            used = self._size
+            live_parts = self._part[:used][self._live[:used]]
+            live_names = self._image_name[:used][self._live[:used]]
+            # Interned names that repeat are only counted once
+            unique_names = {id(name): name for name in live_names}
+
+            columns = {
+                'PartNumber': int(self._part.nbytes + sum(sys.getsizeof(p) for p in live_parts)
+                                  + sys.getsizeof(self._slots)),
+                'Description': int(self._desc.nbytes + self._desc_table.nbytes()),
+                'UnitPrice': int(self._price.nbytes),
+                'Quantity': int(self._qty.nbytes),
+                'ImagePath': int(self._image_dir.nbytes + self._dir_table.nbytes() + self._image_name.nbytes
+                                 + sum(sys.getsizeof(n) for n in unique_names.values())),
+                'RowVersion': int(self._row_version.nbytes),
+                'Locations': int(self._loc_qty.nbytes + sys.getsizeof(self._location_index)),
+                'Reserved': int(self._reserved.nbytes),
+                'Supplier': int(self._supplier.nbytes + self._supplier_table.nbytes()),
+                'Flags': int(self._live.nbytes + sys.getsizeof(self._free) + len(self._free) * _POINTER_BYTES),
+            }
+            return {'columns': columns, 'total_bytes': sum(columns.values())}
@@ -0,0 +1,317 @@
+# -------------------------------------------#
+# inventory_cli.py - Headless command-line interface (no Tk required)
+#
+# Usage:
+#   python inventory_cli.py lookup P-1001 P-1002
+#   python inventory_cli.py create P-2001 "M3 Steel Screw" 0.20 --image part_images/P-2001.png
+#   python inventory_cli.py receive P-2001 50
+#   python inventory_cli.py issue P-2001 5 --location BIN-A
+#   python inventory_cli.py delete P-2001
+#   python inventory_cli.py import supplier.csv
+#   python inventory_cli.py export nightly.parquet --include-values
+#   python inventory_cli.py report --low-stock 10
+#   python inventory_cli.py price-update --supplier ACME --percent 3.5 --dry-run
+#   python inventory_cli.py batch < movements.txt
+#
+# Batch mode reads one command per line from stdin, e.g.
+#   receive P-2001 50
+#   issue P-2001 5 BIN-A
+#   {"op": "issue", "part": "P-2001", "qty": 5, "location": "BIN-A"}
+# and writes one "OK<TAB>message" / "ERR<TAB>message" line per command.
+# -------------------------------------------#
+
+import argparse
+import json
+import os
+import shlex
+import sys
+
+# Load the cache explicitly below, after the headless error reporter is installed
+os.environ.setdefault('INVENTORY_AUTOLOAD', '0')
+
+import inventory_data
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_DB_UNAVAILABLE = 2
+
+
+def _stderr_reporter(level, title, message):
+    """Error reporter used instead of Tk message boxes."""
+    print(f"{level.upper()}: {title}: {message}", file=sys.stderr)
+
+
+def _is_success(result):
+    """The data functions report success with '... Successful' / '... successfully'."""
+    return isinstance(result, str) and ('Successful' in result or 'successfully' in result)
+
+
+# --- Single Commands ---
+
+def cmd_lookup(args):
+    status = EXIT_OK
+    for part_num in args.parts:
+        part_data = inventory_data.get_part_data(part_num)
+        if part_data is None:
+            print(json.dumps({'PartNumber': part_num, 'error': 'not found'}))
+            status = EXIT_FAILED
+        else:
+            print(json.dumps({'PartNumber': part_num, **part_data}))
+    return status
+
+
+def _print_result(result):
+    print(result)
+    return EXIT_OK if _is_success(result) else EXIT_FAILED
+
+
+def cmd_create(args):
+    return _print_result(inventory_data.create_new_part_data(args.part, args.description, args.price, args.image))
+
+
+def cmd_receive(args):
+    return _print_result(inventory_data.update_stock_quantity(args.part, args.qty, args.location))
+
+
+def cmd_issue(args):
+    return _print_result(inventory_data.issue_stock_quantity(args.part, args.qty, args.location))
+
+
+def cmd_delete(args):
+    return _print_result(inventory_data.delete_part_data(args.part))
+
+
+def cmd_import(args):
+    import bulk_import
+    try:
+        summary = bulk_import.import_parts(args.file, chunk_size=args.chunk_size)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return EXIT_FAILED
+    print(json.dumps(summary))
+    return EXIT_OK
+
+
+def cmd_export(args):
+    import inventory_export
+    argv = [args.output, '--chunk-size', str(args.chunk_size)]
+    if args.format:
+        argv += ['--format', args.format]
+    if args.include_images:
+        argv.append('--include-images')
+    if args.include_values:
+        argv.append('--include-values')
+    return inventory_export.main(argv)
+
+
+def cmd_report(args):
+    """Prints catalogue totals and the parts at or below the low-stock threshold."""
+    frame = inventory_data.INVENTORY_DF
+    stock_value = frame['Quantity'] * frame['UnitPrice']
+    low = frame[frame['Quantity'] <= args.low_stock].sort_values('Quantity')
+
+    report = {
+        'parts': int(len(frame)),
+        'total_units': int(frame['Quantity'].sum()),
+        'total_value': round(float(stock_value.sum()), 2),
+        'low_stock_threshold': args.low_stock,
+        'low_stock_count': int(len(low)),
+        'low_stock': [
+            {'PartNumber': str(part), 'Description': str(row.Description), 'Quantity': int(row.Quantity)}
+            for part, row in low.head(args.top).iterrows()
+        ],
+    }
+    print(json.dumps(report, indent=2))
+    return EXIT_OK
+
+
+def cmd_price_update(args):
+    """Previews (--dry-run) or applies a bulk price change to the matching parts."""
+    import price_update
+    mode = price_update.MODE_PERCENT if args.percent is not None else price_update.MODE_ABSOLUTE
+    amount = args.percent if args.percent is not None else args.amount
+    filters = dict(prefix=args.prefix, supplier=args.supplier, description=args.description,
+                   all_parts=args.all_parts)
+    if args.dry_run:
+        try:
+            preview = price_update.preview_price_update(mode=mode, amount=amount, **filters)
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            return EXIT_FAILED
+        print(json.dumps({
+            'parts': int(len(preview)),
+            'changed': int((preview['Change'] != 0).sum()),
+            'sample': [
+                {'PartNumber': str(part), 'OldPrice': row.OldPrice, 'NewPrice': row.NewPrice}
+                for part, row in preview.head(args.top).iterrows()
+            ],
+        }, indent=2))
+        return EXIT_OK
+    return _print_result(price_update.apply_price_update(mode=mode, amount=amount, reason=args.reason, **filters))
+
+
+# --- Batch Mode ---
+
+# op -> (data function, number of arguments after the part number)
+BATCH_OPS = {
+    'lookup': (inventory_data.get_part_data, 0),
+    'receive': (inventory_data.update_stock_quantity, 2),
+    'issue': (inventory_data.issue_stock_quantity, 2),
+    'delete': (inventory_data.delete_part_data, 0),
+    'create': (inventory_data.create_new_part_data, 3),
+}
+
+
+def _json_field(data, key):
+    """A JSON command field as a string ('' when missing or null)."""
+    value = data.get(key)
+    return '' if value is None else str(value)
+
+
+def _parse_batch_line(line):
+    """Returns (op, args) from a whitespace-separated or JSON command line."""
+    if line.startswith('{'):
+        data = json.loads(line)
+        if not isinstance(data, dict):
+            raise ValueError("a JSON command must be an object")
+        op = _json_field(data, 'op')
+        if op == 'create':
+            args = [_json_field(data, key) for key in ('part', 'description', 'price', 'image')]
+        else:
+            args = [_json_field(data, 'part')] + ([_json_field(data, 'qty')] if 'qty' in data else [])
+            if 'location' in data:
+                args.append(_json_field(data, 'location'))
+        return op, args
+    tokens = shlex.split(line)
+    return (tokens[0], tokens[1:]) if tokens else ('', [])
+
+
+def run_batch(lines, out):
+    """
+    Executes newline-delimited commands against the already loaded cache and
+    writes one result line per command. Returns the number of failed commands.
+    """
+    failures = 0
+    results = []
+    for line_no, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        try:
+            op, args = _parse_batch_line(line)
+            func, extra = BATCH_OPS[op]
+            if op == 'create' and len(args) == 3:
+                args.append('')  # Image path is optional
+            if op in ('receive', 'issue') and len(args) == 2:
+                args.append(None)  # Location is optional (default location)
+            if len(args) != extra + 1:
+                raise ValueError(f"'{op}' expects {extra + 1} argument(s), got {len(args)}")
+            result = func(*args)
+            if op == 'lookup':
+                ok = result is not None
+                message = json.dumps({'PartNumber': args[0], **result}) if ok else f"Error: Part Number '{args[0]}' not found."
+            else:
+                ok = _is_success(result)
+                message = result
+        except KeyError:
+            ok, message = False, f"Error: unknown command on line {line_no}: {line}"
+        except json.JSONDecodeError as e:
+            ok, message = False, f"Error: line {line_no}: invalid JSON ({e})"
+        except (ValueError, TypeError, AttributeError) as e:
+            # One bad line is reported and the rest of the batch still runs
+            ok, message = False, f"Error: line {line_no}: {e}"
+
+        if not ok:
+            failures += 1
+        results.append(f"{'OK' if ok else 'ERR'}\t{message}\n")
+
+        # Write in blocks rather than per line for throughput
+        if len(results) >= 1000:
+            out.writelines(results)
+            results = []
+    out.writelines(results)
+    out.flush()
+    return failures
+
+
+def cmd_batch(args):
+    failures = run_batch(sys.stdin, sys.stdout)
+    return EXIT_OK if failures == 0 else EXIT_FAILED
+
+
+# --- Entry Point ---
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Meta Robotics inventory command-line tool.")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('lookup', help="Show part details as JSON lines.")
+    p.add_argument('parts', nargs='+')
+    p.set_defaults(func=cmd_lookup)
+
+    p = sub.add_parser('create', help="Create a new part (quantity starts at 0).")
+    p.add_argument('part')
+    p.add_argument('description')
+    p.add_argument('price')
+    p.add_argument('--image', default='', help="Image path stored with the part.")
+    p.set_defaults(func=cmd_create)
+
+    for name, func, text in (('receive', cmd_receive, "Receive stock."), ('issue', cmd_issue, "Issue stock.")):
+        p = sub.add_parser(name, help=text)
+        p.add_argument('part')
+        p.add_argument('qty')
+        p.add_argument('--location', default=None, help="Stock location (default: the main storeroom).")
+        p.set_defaults(func=func)
+
+    p = sub.add_parser('delete', help="Delete a part.")
+    p.add_argument('part')
+    p.set_defaults(func=cmd_delete)
+
+    p = sub.add_parser('import', help="Bulk import parts from .csv/.xlsx.")
+    p.add_argument('file')
+    p.add_argument('--chunk-size', type=int, default=5000)
+    p.set_defaults(func=cmd_import, needs_cache=True)
+
+    p = sub.add_parser('export', help="Stream the catalogue to .csv/.parquet.")
+    p.add_argument('output')
+    p.add_argument('--format', choices=('csv', 'parquet'))
+    p.add_argument('--chunk-size', type=int, default=10000)
+    p.add_argument('--include-images', action='store_true')
+    p.add_argument('--include-values', action='store_true')
+    p.set_defaults(func=cmd_export, needs_cache=False)
+
+    p = sub.add_parser('report', help="Stock totals and low-stock parts as JSON.")
+    p.add_argument('--low-stock', type=int, default=5, help="Quantity at or below which a part is low.")
+    p.add_argument('--top', type=int, default=50, help="Maximum low-stock parts to list.")
+    p.set_defaults(func=cmd_report)
+
+    p = sub.add_parser('price-update', help="Change the price of many parts at once.")
+    p.add_argument('--prefix', default='', help="Only parts whose number starts with this.")
+    p.add_argument('--supplier', default='', help="Only parts from this supplier.")
+    p.add_argument('--description', default='', help="Only parts whose description contains this text.")
+    p.add_argument('--all', dest='all_parts', action='store_true',
+                   help="Change every part (required when no filter is given).")
+    change = p.add_mutually_exclusive_group(required=True)
+    change.add_argument('--percent', type=float, help="Change by this percentage, e.g. 3.5 or -10.")
+    change.add_argument('--amount', type=float, help="Change by this amount, e.g. 0.25 or -0.10.")
+    p.add_argument('--reason', default='', help="Stored in the price history.")
+    p.add_argument('--dry-run', action='store_true', help="Only show what would change.")
+    p.add_argument('--top', type=int, default=20, help="Parts listed in the dry-run sample.")
+    p.set_defaults(func=cmd_price_update)
+
+    p = sub.add_parser('batch', help="Run newline-delimited commands from stdin.")
+    p.set_defaults(func=cmd_batch)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    inventory_data.set_error_reporter(_stderr_reporter)
+
+    if getattr(args, 'needs_cache', True) and not inventory_data.initialize_inventory():
+        return EXIT_DB_UNAVAILABLE
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,9 +2,18 @@
 # inventory_data.py - MySQL Integration (Updated for Stock Quantity)
 # -------------------------------------------#
 
+import os
+import time
+import uuid
 import pandas as pd
-from tkinter import messagebox
 import mysql.connector 
+import mysql.connector.pooling
+
+import notifications
+import perf_metrics
+import query_log
+import schema_migrations
+from inventory_cache import InventoryCache
 
 # --- Database Configuration ---
 
@@ -16,22 +25,96 @@ DB_CONFIG = {
 }
 
 
-# Global variable to store the DataFrame in memory (cache)
-INVENTORY_DF = pd.DataFrame() 
+# Global in-memory cache (slot-based, see inventory_cache.py).
+# INVENTORY_DF is still available as a read-only DataFrame view, see __getattr__ below.
+INVENTORY_CACHE = InventoryCache()
+
+
+def __getattr__(name):
+    """Serves INVENTORY_DF as a DataFrame snapshot of the cache for reports."""
+    if name == 'INVENTORY_DF':
+        return INVENTORY_CACHE.to_frame()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _format_price(price):
+    """Formats a numeric price the way the UI has always displayed it."""
+    return f"${price:.2f}"
+
+# --- Error Reporting ---
+# Data-layer errors are posted to the notification bus (notifications.py), which
+# the Tk app shows as non-modal banners. Nothing here ever blocks on a dialog, so
+# it is safe from background threads. Headless tools (CLI, API server) install
+# their own reporter with set_error_reporter(), so this module never needs
+# tkinter or a display.
+
+_ERROR_REPORTER = notifications.post
+
+def set_error_reporter(reporter):
+    """
+    Replaces the error reporter. reporter(level, title, message) is called with
+    level 'error' or 'warning'. Pass None to restore the notification bus.
+    """
+    global _ERROR_REPORTER
+    _ERROR_REPORTER = reporter or notifications.post
+
+def _report(level, title, message):
+    _ERROR_REPORTER(level, title, message)
 
 # --- Connection and Query Helpers ---
 
-def get_db_connection():
-    """Helper function to establish a database connection."""
+# Optional connection pool for long-running processes (e.g. the API server).
+# When enabled, get_db_connection() hands out pooled connections and close()
+# returns them to the pool instead of tearing down the TCP session.
+_CONNECTION_POOL = None
+
+def enable_connection_pool(pool_size=5):
+    """Creates a connection pool from DB_CONFIG. Returns True on success."""
+    global _CONNECTION_POOL
     try:
+        _CONNECTION_POOL = mysql.connector.pooling.MySQLConnectionPool(
+            pool_name='inventory_pool', pool_size=pool_size, **DB_CONFIG
+        )
+        return True
+    except mysql.connector.Error as err:
+        _report('error', "Database Connection Error", f"Failed to create connection pool: {err}")
+        return False
+
+@perf_metrics.timed('db.connect')
+def get_db_connection(quiet=False):
+    """
+    Helper function to establish a database connection.
+    quiet=True skips the error report (used when the caller has an offline fallback).
+    """
+    try:
+        if _CONNECTION_POOL is not None:
+            return _CONNECTION_POOL.get_connection()
         # Establish the connection using the configuration dictionary
         conn = mysql.connector.connect(**DB_CONFIG)
         return conn
     except mysql.connector.Error as err:
         # Check for specific errors like wrong password or unknown database
-        messagebox.showerror("Database Connection Error", f"Failed to connect to MySQL: {err}")
+        if not quiet:
+            _report('error', "Database Connection Error", f"Failed to connect to MySQL: {err}")
         return None
 
+# --- Schema ---
+# Tables, columns and indexes are created by the versioned migrations in
+# schema_migrations.py; each process checks the schema version once.
+_SCHEMA_CHECKED = False
+
+def _ensure_schema(cursor):
+    """Applies any pending schema migrations, once per process (DDL commits implicitly)."""
+    global _SCHEMA_CHECKED
+    if _SCHEMA_CHECKED:
+        return
+    _SCHEMA_CHECKED = True
+    try:
+        schema_migrations.upgrade(cursor)
+    except schema_migrations.MigrationError as err:
+        _report('warning', "Schema Warning", f"Database schema could not be upgraded: {err}")
+
+@perf_metrics.timed('db.query')
 def _execute_query(query, params=None, is_commit=False):
     """
     A unified function for executing SQL commands (INSERT, UPDATE, DELETE, etc.).
@@ -43,95 +126,347 @@ def _execute_query(query, params=None, is_commit=False):
     
     try:
         # Execute the query with optional parameters
-        cursor.execute(query, params or ())
+        query_log.execute(cursor, query, params)
         
         if is_commit:
             conn.commit()
             
         return True
     except mysql.connector.Error as err:
-        messagebox.showerror("DB Operation Error", f"SQL Error during execution: {err}")
+        # The statement and error are also in the query log (if configured)
+        _report('error', "DB Operation Error", f"SQL Error during execution: {err}")
         conn.rollback() # Rollback changes if an error occurred
         return False
     finally:
         if cursor: cursor.close()
         if conn and conn.is_connected(): conn.close()
 
+@perf_metrics.timed('db.update')
+def _execute_update(query, params=None, if_changed=()):
+    """
+    Executes and commits one UPDATE/DELETE.
+    if_changed: (sql, params) statements run in the same transaction only if
+    the UPDATE changed at least one row.
+    Returns: the number of rows it changed, or None on error.
+    """
+    conn = get_db_connection()
+    if not conn: return None
+    cursor = conn.cursor()
+    
+    try:
+        _ensure_schema(cursor)
+        query_log.execute(cursor, query, params)
+        changed = cursor.rowcount
+        if changed:
+            for sql, extra_params in if_changed:
+                query_log.execute(cursor, sql, extra_params)
+        conn.commit()
+        return changed
+    except mysql.connector.Error as err:
+        _report('error', "DB Operation Error", f"SQL Error during execution: {err}")
+        conn.rollback()
+        return None
+    finally:
+        if cursor: cursor.close()
+        if conn and conn.is_connected(): conn.close()
+
+@perf_metrics.timed('db.transaction')
+def _execute_transaction(statements, conn=None):
+    """
+    Executes several statements on one connection and commits them together.
+    statements: list of (sql, params) pairs; a list of params tuples runs the
+    statement with executemany (batched by the connector).
+    conn: an already open connection to use (it is closed afterwards).
+    Returns: True on success, False on error (nothing is committed).
+    """
+    conn = conn or get_db_connection()
+    if not conn: return False
+    cursor = conn.cursor()
+    
+    try:
+        _ensure_schema(cursor)
+        for sql, params in statements:
+            if isinstance(params, list):
+                if params:
+                    query_log.executemany(cursor, sql, params)
+            else:
+                query_log.execute(cursor, sql, params)
+        conn.commit()
+        return True
+    except mysql.connector.Error as err:
+        _report('error', "DB Operation Error", f"SQL Error during execution: {err}")
+        conn.rollback() # Nothing from this transaction is kept
+        return False
+    finally:
+        if cursor: cursor.close()
+        if conn and conn.is_connected(): conn.close()
+
+def _run_transaction(work, conn=None):
+    """
+    Runs work(cursor) in one transaction, for writes that must read or check
+    rows before deciding what to write. work returns None to commit or an
+    error message to roll back. Returns None when committed, else the message.
+    conn: an already open connection to use (it is closed afterwards).
+    """
+    conn = conn or get_db_connection()
+    if conn is None:
+        return "Error: Database connection failed."
+    cursor = conn.cursor()
+    try:
+        _ensure_schema(cursor)
+        # The schema check may have opened a read snapshot; work starts a fresh transaction
+        conn.commit()
+        error = work(cursor)
+        if error:
+            conn.rollback()
+            return error
+        conn.commit()
+        return None
+    except mysql.connector.Error as err:
+        conn.rollback()
+        _report('error', "DB Operation Error", f"SQL Error during execution: {err}")
+        return "Error: Database update failed."
+    finally:
+        cursor.close()
+        if conn.is_connected():
+            conn.close()
+
+# --- Row Versions ---
+# Every inventory row carries a RowVersion that each edit of Description,
+# UnitPrice or ImagePath increments. An edit names the version it was based on
+# in the UPDATE's WHERE clause, so a stale edit changes 0 rows instead of
+# overwriting someone else's - no extra SELECT and no locks beyond the row.
+# Stock movements don't bump it: they change Quantity by delta and can't be lost.
+
+UPDATE_CONFLICT = "Error: Update Conflict"
+
+# None until checked; False if the column is missing (schema could not be upgraded)
+_HAS_VERSION_COLUMN = None
+
+def _ensure_version_column(conn):
+    """Upgrades the schema if needed and reports whether inventory has RowVersion."""
+    global _HAS_VERSION_COLUMN
+    if _HAS_VERSION_COLUMN is not None:
+        return _HAS_VERSION_COLUMN
+
+    cursor = conn.cursor()
+    try:
+        _ensure_schema(cursor)
+        _HAS_VERSION_COLUMN = schema_migrations.has_column(cursor, 'inventory', 'RowVersion')
+        if not _HAS_VERSION_COLUMN:
+            _report('warning', "Data Warning",
+                    "The 'RowVersion' column is missing. Part edits will not detect concurrent changes.")
+    except mysql.connector.Error as err:
+        _report('warning', "Data Warning", f"Could not check the database schema: {err}")
+        _HAS_VERSION_COLUMN = False
+    finally:
+        cursor.close()
+    return _HAS_VERSION_COLUMN
+
+# None until checked; False if inventory has no ReservedQty (reservations unavailable)
+_HAS_RESERVATIONS = None
+
+def _ensure_reservations(conn):
+    """Upgrades the schema if needed and reports whether stock reservations are available."""
+    global _HAS_RESERVATIONS
+    if _HAS_RESERVATIONS is not None:
+        return _HAS_RESERVATIONS
+
+    cursor = conn.cursor()
+    try:
+        _ensure_schema(cursor)
+        _HAS_RESERVATIONS = schema_migrations.has_column(cursor, 'inventory', 'ReservedQty')
+    except mysql.connector.Error as err:
+        _report('warning', "Data Warning", f"Could not check the database schema: {err}")
+        _HAS_RESERVATIONS = False
+    finally:
+        cursor.close()
+    return _HAS_RESERVATIONS
+
+# None until checked; False if inventory has no Supplier / price_history (bulk pricing unavailable)
+_HAS_PRICING = None
+
+PRICE_HISTORY_SQL = ("INSERT INTO price_history (PartNumber, OldPrice, NewPrice, BatchID, Reason) "
+                     "VALUES (%s, %s, %s, %s, %s)")
+
+def _ensure_pricing(conn):
+    """Upgrades the schema if needed and reports whether suppliers and price history are available."""
+    global _HAS_PRICING
+    if _HAS_PRICING is not None:
+        return _HAS_PRICING
+
+    cursor = conn.cursor()
+    try:
+        _ensure_schema(cursor)
+        _HAS_PRICING = (schema_migrations.has_column(cursor, 'inventory', 'Supplier')
+                        and schema_migrations.table_exists(cursor, 'price_history'))
+    except mysql.connector.Error as err:
+        _report('warning', "Data Warning", f"Could not check the database schema: {err}")
+        _HAS_PRICING = False
+    finally:
+        cursor.close()
+    return _HAS_PRICING
+
+def refresh_part(part_num):
+    """
+    Re-reads one part from the database into the cache (e.g. after an update
+    conflict). Returns True if the part still exists, False if it was deleted,
+    None if the database could not be read.
+    """
+    part_num = str(part_num).strip()
+    conn = get_db_connection()
+    if conn is None:
+        return None
+    cursor = conn.cursor(dictionary=True)
+    try:
+        columns = "Description, UnitPrice, Quantity, ImagePath"
+        if _HAS_VERSION_COLUMN:
+            columns += ", RowVersion"
+        if _HAS_RESERVATIONS:
+            columns += ", ReservedQty"
+        if _HAS_PRICING:
+            columns += ", Supplier"
+        query_log.execute(cursor, f"SELECT {columns} FROM inventory WHERE PartNumber = %s", (part_num,))
+        row = cursor.fetchone()
+        locations = None
+        if row is not None and _LOCATIONS:
+            query_log.execute(cursor, "SELECT LocationCode, Quantity FROM stock_locations WHERE PartNumber = %s",
+                              (part_num,))
+            locations = {r['LocationCode']: r['Quantity'] for r in cursor.fetchall()}
+    except mysql.connector.Error as err:
+        _report('error', "DB Operation Error", f"SQL Error during execution: {err}")
+        return None
+    finally:
+        cursor.close()
+        if conn.is_connected():
+            conn.close()
+
+    if row is None:
+        INVENTORY_CACHE.delete(part_num)
+        return False
+
+    row_version = row.get('RowVersion', 0)
+    if part_num in INVENTORY_CACHE:
+        INVENTORY_CACHE.update(part_num, description=row['Description'], unit_price=float(row['UnitPrice']),
+                               image_path=row['ImagePath'] or '', row_version=row_version,
+                               supplier=row.get('Supplier'))
+        if _CHANGE_FEED is None:
+            # With the change feed running, Quantity is kept current by its deltas
+            INVENTORY_CACHE.set_quantity(part_num, row['Quantity'])
+            if locations is not None:
+                INVENTORY_CACHE.set_locations(part_num, locations)
+            if 'ReservedQty' in row:
+                INVENTORY_CACHE.set_reserved(part_num, row['ReservedQty'])
+    else:
+        INVENTORY_CACHE.insert(part_num, row['Description'], float(row['UnitPrice']), row['Quantity'],
+                               row['ImagePath'] or '', row_version=row_version, supplier=row.get('Supplier', ''))
+        if locations is not None:
+            INVENTORY_CACHE.set_locations(part_num, locations)
+        if 'ReservedQty' in row:
+            INVENTORY_CACHE.set_reserved(part_num, row['ReservedQty'])
+    return True
+
 # --- Core Data Management Functions ---
 
+@perf_metrics.timed('inventory.load')
 def initialize_inventory():
     """
-    Loads all data from the MySQL table into the global DataFrame.
+    Loads all data from the MySQL table into the global cache.
     MODIFIED to include the Quantity column.
     """
-    global INVENTORY_DF
     conn = get_db_connection()
     if conn is None:
-        # If connection fails, create an empty DF placeholder with all expected columns
-        INVENTORY_DF = pd.DataFrame(columns=['Description', 'UnitPrice', 'Quantity', 'ImagePath'])
-        INVENTORY_DF.index.name = 'PartNumber'
+        # If connection fails, start with an empty cache
+        INVENTORY_CACHE.clear()
         return False
         
     try:
-        # UPDATED: Query now selects the new 'Quantity' column
-        query = "SELECT PartNumber, Description, UnitPrice, Quantity, ImagePath FROM inventory"
+        # UPDATED: Query now selects the new 'Quantity' column (and RowVersion for edits)
+        columns = "PartNumber, Description, UnitPrice, Quantity, ImagePath"
+        if _ensure_version_column(conn):
+            columns += ", RowVersion"
+        # Reserved units, for available-to-promise
+        if _ensure_reservations(conn):
+            columns += ", ReservedQty"
+        # Supplier, for selecting parts in bulk price changes
+        if _ensure_pricing(conn):
+            columns += ", Supplier"
+        query = f"SELECT {columns} FROM inventory"
         
-        # Read the table directly into the DataFrame, using PartNumber as index
-        INVENTORY_DF = pd.read_sql(query, conn, index_col='PartNumber') 
+        # Read the change-feed position and the table in one consistent snapshot,
+        # so the feed resumes exactly where the loaded data ends
+        feed_position = _begin_feed_snapshot(conn)
         
-        # Ensure the index (PartNumber) is treated as a string
-        INVENTORY_DF.index = INVENTORY_DF.index.astype(str)
+        # Read the table into a temporary DataFrame, using PartNumber as index
+        load_start = time.perf_counter()
+        loaded_df = pd.read_sql(query, conn, index_col='PartNumber') 
+        query_log.log_statement(query, None, time.perf_counter() - load_start, rows=len(loaded_df))
+        # Per-location quantities from the same snapshot, so they add up to the totals
+        locations_df, location_codes = _read_locations(conn)
+        conn.commit() # Ends the snapshot transaction
         
-        # CRITICAL: Ensure Quantity column is present and is an integer type for stock calculations
-        if 'Quantity' in INVENTORY_DF.columns:
-            # Fill potential missing values with 0 and convert to integer
-            INVENTORY_DF['Quantity'] = INVENTORY_DF['Quantity'].fillna(0).astype(int)
-        else:
+        # CRITICAL: Ensure Quantity column is present for stock calculations
+        if 'Quantity' not in loaded_df.columns:
              # Fallback: If Quantity column is missing from the DB table (ALTER failed), initialize to 0
-             messagebox.showwarning("Data Warning", "The 'Quantity' column was missing. Initializing to zero.")
-             INVENTORY_DF['Quantity'] = 0
-             INVENTORY_DF['Quantity'] = INVENTORY_DF['Quantity'].astype(int)
+             _report('warning', "Data Warning", "The 'Quantity' column was missing. Initializing to zero.")
+             loaded_df['Quantity'] = 0
              
-        # Re-format UnitPrice for display (assuming it's stored as float in DB)
-        if 'UnitPrice' in INVENTORY_DF.columns:
-             INVENTORY_DF['UnitPrice'] = INVENTORY_DF['UnitPrice'].apply(lambda x: f"${x:.2f}" if isinstance(x, (int, float)) else x)
+        # Copy into the typed cache arrays (Quantity -> int, UnitPrice -> float).
+        # UnitPrice is kept numeric and only formatted as "$x.xx" in get_part_data.
+        INVENTORY_CACHE.load_frame(loaded_df)
+        if locations_df is not None:
+            INVENTORY_CACHE.load_locations(locations_df)
+            _LOCATIONS.clear()
+            _LOCATIONS.update(location_codes)
+        _set_feed_position(feed_position)
 
         return True
     except pd.io.sql.DatabaseError as e:
-        messagebox.showerror("Data Error", f"Error querying MySQL table: {e}")
-        INVENTORY_DF = pd.DataFrame(columns=['Description', 'UnitPrice', 'Quantity', 'ImagePath']) # Include Quantity in placeholder
-        INVENTORY_DF.index.name = 'PartNumber'
+        _report('error', "Data Error", f"Error querying MySQL table: {e}")
+        INVENTORY_CACHE.clear()
         return False
     finally:
         # Ensure the connection is closed
         if conn and conn.is_connected():
             conn.close()
 
+@perf_metrics.timed('cache.lookup')
 def get_part_data(part_num):
     """
-    Retrieves all data for a given part number from the in-memory DataFrame.
+    Retrieves all data for a given part number from the in-memory cache.
     MODIFIED to include the Quantity field.
     """
-    global INVENTORY_DF
     part_num = str(part_num).strip()
     
-    # We rely on the in-memory DataFrame for fast lookups
-    if part_num in INVENTORY_DF.index:
-        # Return the data as a dictionary (Series)
-        return INVENTORY_DF.loc[part_num].to_dict()
-    else:
+    # We rely on the in-memory cache (dict index) for fast lookups
+    part_data = INVENTORY_CACHE.get(part_num)
+    if part_data is None:
         return None
 
-def update_part_data(part_num, desc, price_str, image_path):
+    # UnitPrice is returned formatted for display, as before
+    part_data['UnitPrice'] = _format_price(part_data['UnitPrice'])
+    return part_data
+
+@perf_metrics.timed('part.update')
+def update_part_data(part_num, desc, price_str, image_path, expected_version=None):
     """
-    Updates the record in the DB and refreshes the in-memory DataFrame.
+    Updates the record in the DB and refreshes the in-memory cache.
     Note: Does NOT update Quantity, as Quantity is only changed via Stock Received/Issued.
+    expected_version: the RowVersion the caller loaded (from get_part_data); defaults
+    to the cached one. If the row has changed since, nothing is written and a
+    message starting with UPDATE_CONFLICT is returned (the cache is refreshed).
     """
-    global INVENTORY_DF
     part_num = str(part_num).strip()
     
-    if part_num not in INVENTORY_DF.index:
+    part_data = INVENTORY_CACHE.get(part_num)
+    if part_data is None:
         return "Error: Part Number not found for update."
+    if expected_version is None:
+        expected_version = part_data['RowVersion']
+    try:
+        expected_version = int(expected_version)
+    except (TypeError, ValueError):
+        return "Error: Invalid row version."
         
     try:
         # 1. Price validation and formatting
@@ -139,24 +474,42 @@ def update_part_data(part_num, desc, price_str, image_path):
         if price_float < 0:
             raise ValueError("Price cannot be negative.")
         
-        # 2. Execute SQL UPDATE
-        sql = """
-            UPDATE inventory 
-            SET Description = %s, UnitPrice = %s, ImagePath = %s
-            WHERE PartNumber = %s
-        """
-        params = (desc, price_float, image_path, part_num)
-        
-        if _execute_query(sql, params, is_commit=True):
-            # 3. Update the existing row in the in-memory DataFrame (cache)
-            formatted_price = f"${price_float:.2f}"
-            INVENTORY_DF.loc[part_num, 'Description'] = desc
-            INVENTORY_DF.loc[part_num, 'UnitPrice'] = formatted_price
-            INVENTORY_DF.loc[part_num, 'ImagePath'] = image_path 
-            
-            return "Update Successful"
+        # 2. Execute SQL UPDATE (only if the row is still at the version we loaded)
+        if _HAS_VERSION_COLUMN:
+            sql = """
+                UPDATE inventory 
+                SET Description = %s, UnitPrice = %s, ImagePath = %s, RowVersion = RowVersion + 1
+                WHERE PartNumber = %s AND RowVersion = %s
+            """
+            params = (desc, price_float, image_path, part_num, expected_version)
         else:
+            sql = """
+                UPDATE inventory 
+                SET Description = %s, UnitPrice = %s, ImagePath = %s
+                WHERE PartNumber = %s
+            """
+            params = (desc, price_float, image_path, part_num)
+        
+        if_changed = [_change_statement(part_num, CHANGE_UPDATE)]
+        if _HAS_PRICING and round(price_float, 2) != round(part_data['UnitPrice'], 2):
+            if_changed.append((PRICE_HISTORY_SQL, (part_num, part_data['UnitPrice'], price_float, None, 'Part edit')))
+        changed = _execute_update(sql, params, if_changed=if_changed)
+        if changed is None:
             return "Error saving data. Changes were not committed to the database."
+        
+        if _HAS_VERSION_COLUMN and changed == 0:
+            # Someone else edited (or deleted) the part after it was loaded
+            if refresh_part(part_num) is False:
+                return "Error: Part Number not found for update. It was deleted by someone else."
+            return (f"{UPDATE_CONFLICT}: Part {part_num} was changed by someone else after you loaded it. "
+                    "Your changes were not saved. Reload the part to see the latest data.")
+        
+        # 3. Update the existing row in the in-memory cache
+        new_version = expected_version + 1 if _HAS_VERSION_COLUMN else None
+        INVENTORY_CACHE.update(part_num, description=desc, unit_price=price_float, image_path=image_path,
+                               row_version=new_version)
+        
+        return "Update Successful"
             
     except ValueError:
         return "Error: Unit Price must be a valid number (e.g., 0.20)."
@@ -164,11 +517,10 @@ def update_part_data(part_num, desc, price_str, image_path):
         return f"An unexpected error occurred during update: {e}"
 
 def delete_part_data(part_num):
-    """Deletes a part record from the database and the in-memory DataFrame."""
-    global INVENTORY_DF
+    """Deletes a part record from the database and the in-memory cache."""
     part_num = str(part_num).strip()
     
-    if part_num not in INVENTORY_DF.index:
+    if part_num not in INVENTORY_CACHE:
         return "Error: Part Number not found for deletion."
     
     try:
@@ -176,9 +528,13 @@ def delete_part_data(part_num):
         sql = "DELETE FROM inventory WHERE PartNumber = %s"
         params = (part_num,)
         
-        if _execute_query(sql, params, is_commit=True):
-            # 2. Delete the row from the in-memory DataFrame (cache)
-            INVENTORY_DF = INVENTORY_DF.drop(index=part_num, errors='ignore').copy()
+        statements = [(sql, params), _change_statement(part_num, CHANGE_DELETE)]
+        if _LOCATIONS:
+            # Its per-location stock rows go with it
+            statements.insert(0, ("DELETE FROM stock_locations WHERE PartNumber = %s", params))
+        if _execute_transaction(statements):
+            # 2. Delete the row from the in-memory cache (O(1), slot is reused later)
+            INVENTORY_CACHE.delete(part_num)
             return "Deletion Successful"
         else:
             return "Error saving data. Part could not be deleted from the database."
@@ -189,16 +545,15 @@ def delete_part_data(part_num):
 
 def create_new_part_data(part_num, desc, price_str, image_path):
     """
-    Adds a new part record to the DB and refreshes the in-memory DataFrame.
+    Adds a new part record to the DB and refreshes the in-memory cache.
     MODIFIED to initialize Quantity to 0.
     """
-    global INVENTORY_DF
     part_num = str(part_num).strip()
     
     if not part_num or not desc or not price_str:
         return "Error: All fields must be filled."
 
-    if part_num in INVENTORY_DF.index:
+    if part_num in INVENTORY_CACHE:
         return "A similar Part already exist" 
     
     try:
@@ -215,20 +570,9 @@ def create_new_part_data(part_num, desc, price_str, image_path):
         # Parameters for the query. Quantity is initialized to 0.
         params = (part_num, desc, price_float, 0, image_path) 
 
-        if _execute_query(sql, params, is_commit=True):
-            # 3. Add to the in-memory DataFrame (cache) (Updated to include Quantity)
-            formatted_price = f"${price_float:.2f}"
-            new_row = pd.Series({
-                'Description': desc,
-                'UnitPrice': formatted_price,
-                'Quantity': 0, # Initialize to 0
-                'ImagePath': image_path 
-            }, name=part_num)
-            
-            # Use pd.concat for reliable row addition
-            INVENTORY_DF = pd.concat([INVENTORY_DF, new_row.to_frame().T]).copy()
-            # Ensure the new Quantity column is treated as integer type for math operations
-            INVENTORY_DF['Quantity'] = INVENTORY_DF['Quantity'].astype(int)
+        if _execute_transaction([(sql, params), _change_statement(part_num, CHANGE_INSERT, 0)]):
+            # 3. Add to the in-memory cache (amortized O(1), Quantity initialized to 0)
+            INVENTORY_CACHE.insert(part_num, desc, price_float, 0, image_path)
             
             return "Update Successful"
         else:
@@ -241,82 +585,356 @@ def create_new_part_data(part_num, desc, price_str, image_path):
 
 # --- NEW STOCK MANAGEMENT FUNCTION ---
 
-def update_stock_quantity(part_num, quantity_received):
+# Every receipt/issue is written to the stock_movements ledger in the same
+# transaction as the Quantity change, and Quantity is changed by a delta
+# (Quantity = Quantity + n) so concurrent stations don't overwrite each other.
+# Each movement targets one location: stock_locations holds the per-bin
+# quantity and inventory.Quantity the total, both changed in that transaction.
+LEDGER_INSERT_SQL = "INSERT INTO stock_movements (PartNumber, QtyChange, MovementType, LocationCode) VALUES (%s, %s, %s, %s)"
+STOCK_DELTA_SQL = "UPDATE inventory SET Quantity = Quantity + %s WHERE PartNumber = %s"
+LOCATION_DELTA_SQL = """
+    INSERT INTO stock_locations (PartNumber, LocationCode, Quantity) VALUES (%s, %s, %s)
+    ON DUPLICATE KEY UPDATE Quantity = Quantity + VALUES(Quantity)
+"""
+
+# Issues only take units that are still there when the row is written: on hand at
+# the location and not reserved for a work order. The check against this station's
+# cache can be behind another workstation; a refused UPDATE changes 0 rows.
+ISSUE_STOCK_SQL = "UPDATE inventory SET Quantity = Quantity - %s WHERE PartNumber = %s AND Quantity - ReservedQty >= %s"
+ISSUE_STOCK_NO_RESERVATIONS_SQL = "UPDATE inventory SET Quantity = Quantity - %s WHERE PartNumber = %s AND Quantity >= %s"
+ISSUE_LOCATION_SQL = """
+    UPDATE stock_locations SET Quantity = Quantity - %s
+    WHERE PartNumber = %s AND LocationCode = %s AND Quantity >= %s
+"""
+
+DEFAULT_LOCATION = schema_migrations.DEFAULT_LOCATION
+
+MOVEMENT_RECEIPT = 'RECEIPT'
+MOVEMENT_ISSUE = 'ISSUE'
+MOVEMENT_COUNT = 'COUNT'  # Cycle count adjustment (see cycle_count.py)
+
+# --- Change Feed ---
+# Every write also appends a row to inventory_changes in the same transaction.
+# Other workstations poll that table by Seq (see change_feed.py) and patch just
+# the parts that changed. STOCK rows carry the quantity delta, so applying them
+# never races with local movements; INSERT rows carry the starting quantity.
+CHANGE_INSERT_SQL = ("INSERT INTO inventory_changes (PartNumber, ChangeType, QtyChange, Origin, LocationCode) "
+                     "VALUES (%s, %s, %s, %s, %s)")
+
+CHANGE_INSERT = 'INSERT'
+CHANGE_UPDATE = 'UPDATE'
+CHANGE_DELETE = 'DELETE'
+CHANGE_STOCK = 'STOCK'
+CHANGE_RESERVE = 'RESERVE'  # QtyChange is the change in reserved units
+
+# Marks this process's own change rows so its poller can skip them
+INSTANCE_ID = uuid.uuid4().hex
+
+# Recent Seqs checked at load time for transactions that were still in flight
+FEED_GAP_WINDOW = 1000
+
+_CHANGE_FEED = None
+# Feed position matching the loaded cache: (last Seq, Seqs not yet visible), or None
+_FEED_POSITION = None
+
+def _change_row(part_num, change_type, qty_change=0, location=None):
+    return (part_num, change_type, int(qty_change), INSTANCE_ID, location)
+
+def _change_statement(part_num, change_type, qty_change=0, location=None):
+    """One change-log row as a (sql, params) statement for _execute_transaction."""
+    return (CHANGE_INSERT_SQL, _change_row(part_num, change_type, qty_change, location))
+
+def _begin_feed_snapshot(conn):
     """
-    Increments the Quantity for a given PartNumber in DB and DataFrame.
+    Starts a consistent-snapshot transaction on conn and returns the feed position
+    it sees: (last Seq, recent Seqs below it that are not visible yet - those belong
+    to transactions still in flight, or rolled back). None if it could not be read.
     """
-    global INVENTORY_DF
+    cursor = conn.cursor()
+    try:
+        _ensure_schema(cursor)
+        cursor.execute("START TRANSACTION WITH CONSISTENT SNAPSHOT")
+        cursor.execute("SELECT COALESCE(MAX(Seq), 0) FROM inventory_changes")
+        last_seq = int(cursor.fetchone()[0])
+        first = max(last_seq - FEED_GAP_WINDOW, 0)
+        cursor.execute("SELECT Seq FROM inventory_changes WHERE Seq > %s", (first,))
+        visible = {int(row[0]) for row in cursor.fetchall()}
+        return last_seq, [seq for seq in range(first + 1, last_seq) if seq not in visible]
+    except mysql.connector.Error:
+        return None
+    finally:
+        cursor.close()
 
-    part_num = part_num.strip()
+def _set_feed_position(position):
+    global _FEED_POSITION
+    _FEED_POSITION = position
+    if _CHANGE_FEED is not None:
+        _CHANGE_FEED.reset(position)
 
-    # 1. Validation
-    if part_num not in INVENTORY_DF.index:
-        return "Error: Part Number not found."
+def enable_change_feed(poll_interval=0.5):
+    """
+    Starts a background poller that applies other workstations' changes to the
+    cache (only the affected parts) within about poll_interval seconds.
+    """
+    global _CHANGE_FEED
+    from change_feed import ChangeFeedPoller
+
+    if _CHANGE_FEED is None:
+        _CHANGE_FEED = ChangeFeedPoller(_FEED_POSITION, poll_interval)
+        _CHANGE_FEED.start()
+    return _CHANGE_FEED
+
+# Offline journal (see offline_journal.py); None until enable_offline_journal()
+_OFFLINE_JOURNAL = None
+_JOURNAL_REPLAYER = None
+
+def _parse_stock_change(part_num, quantity, verb):
+    """
+    Shared validation for stock movements.
+    Returns (qty_change, None) on success or (None, error message).
+    """
+    if part_num not in INVENTORY_CACHE:
+        return None, "Error: Part Number not found."
     try:
-        qty_change = int(quantity_received)
+        qty_change = int(quantity)
+        # Quantity must be a positive whole number
         if qty_change <= 0:
-            return "Error: Quantity received must be a positive whole number."
+            return None, f"Error: Quantity {verb} must be a positive whole number."
     except ValueError:
-        return "Error: Quantity must be a valid whole number."
+        return None, "Error: Quantity must be a valid whole number."
+    return qty_change, None
 
-    # Current quantity from the in-memory cache
-    current_qty = INVENTORY_DF.loc[part_num, 'Quantity']
-    new_qty = int(current_qty) + qty_change
-    
-    # 2. Update the database using the new total quantity
-    sql = "UPDATE inventory SET Quantity = %s WHERE PartNumber = %s"
-    params = (new_qty, part_num)
+# --- Locations ---
+# Location codes from the locations table, loaded with the inventory
+_LOCATIONS = set()
+
+def _parse_location(location):
+    """
+    Normalises a location code (None -> DEFAULT_LOCATION).
+    Returns (code, None) or (None, error message) for an unknown location.
+    """
+    code = str(location or DEFAULT_LOCATION).strip().upper()
+    # Before the first successful load there is nothing to check against
+    if _LOCATIONS and code not in _LOCATIONS:
+        return None, f"Error: Unknown location '{code}'."
+    return code, None
+
+def _read_locations(conn):
+    """
+    Reads the non-zero stock_locations rows and the location codes.
+    Returns (DataFrame, [codes]), or (None, []) if the tables do not exist yet.
+    """
+    cursor = conn.cursor()
+    try:
+        if not schema_migrations.table_exists(cursor, 'stock_locations'):
+            return None, []
+        cursor.execute("SELECT LocationCode FROM locations")
+        codes = [row[0] for row in cursor.fetchall()]
+    except mysql.connector.Error as err:
+        _report('warning', "Data Warning", f"Could not read stock locations: {err}")
+        return None, []
+    finally:
+        cursor.close()
+    query = "SELECT PartNumber, LocationCode, Quantity FROM stock_locations WHERE Quantity <> 0"
+    start = time.perf_counter()
+    frame = pd.read_sql(query, conn)
+    query_log.log_statement(query, None, time.perf_counter() - start, rows=len(frame))
+    return frame, codes
+
+def list_locations():
+    """Returns the known location codes, the default location first."""
+    return sorted(_LOCATIONS | {DEFAULT_LOCATION}, key=lambda code: (code != DEFAULT_LOCATION, code))
+
+def add_location(code, description=''):
+    """Creates a new stock location (storeroom or bin)."""
+    code = str(code).strip().upper()
+    if not code or len(code) > 32:
+        return "Error: Location code must be 1-32 characters."
+    if code in _LOCATIONS:
+        return "A similar Location already exist"
+    if _execute_update("INSERT INTO locations (LocationCode, Description) VALUES (%s, %s)", (code, description)) is None:
+        return "Error saving data. Location not created in the database."
+    _LOCATIONS.add(code)
+    return "Update Successful"
+
+def _movement_statements(movements):
+    """
+    Builds the statements for _execute_transaction from
+    movements: [(PartNumber, QtyChange, MovementType, LocationCode)].
+    Movements of the same part (and location) are coalesced into one delta; rows
+    are locked in PartNumber order so concurrent batches cannot deadlock each other.
+    """
+    deltas, location_deltas = {}, {}
+    for part_num, delta, _, location in movements:
+        deltas[part_num] = deltas.get(part_num, 0) + delta
+        location_deltas[(part_num, location)] = location_deltas.get((part_num, location), 0) + delta
+    location_deltas = sorted(location_deltas.items())
+    return [
+        (STOCK_DELTA_SQL, [(delta, part_num) for part_num, delta in sorted(deltas.items())]),
+        (LOCATION_DELTA_SQL, [(part_num, location, delta) for (part_num, location), delta in location_deltas]),
+        (LEDGER_INSERT_SQL, list(movements)),
+        (CHANGE_INSERT_SQL, [_change_row(part_num, CHANGE_STOCK, delta, location)
+                             for (part_num, location), delta in location_deltas]),
+    ]
+
+def enable_offline_journal(path='offline_journal.jsonl', retry_interval=5.0):
+    """
+    Turns on offline operation: while MySQL is unreachable, receipts and issues
+    are fsync'd to a local journal and applied to the cache optimistically; a
+    background thread replays them once the connection is back.
+    Movements left over from a previous session are re-applied to the cache.
+    """
+    global _OFFLINE_JOURNAL, _JOURNAL_REPLAYER
+    from offline_journal import OfflineJournal, JournalReplayer
+
+    if _OFFLINE_JOURNAL is None:
+        _OFFLINE_JOURNAL = OfflineJournal(path)
+        _OFFLINE_JOURNAL.apply_pending_to_cache()
+        _JOURNAL_REPLAYER = JournalReplayer(_OFFLINE_JOURNAL, retry_interval)
+        _JOURNAL_REPLAYER.start()
+    return _OFFLINE_JOURNAL
+
+def _issue_work(part_num, qty_change, location):
+    """
+    work for _run_transaction: one issue whose stock is checked again by the
+    UPDATEs themselves, so a stale cache cannot take reserved or missing units.
+    """
+    def work(cursor):
+        stock_sql = ISSUE_STOCK_SQL if _HAS_RESERVATIONS else ISSUE_STOCK_NO_RESERVATIONS_SQL
+        query_log.execute(cursor, stock_sql, (qty_change, part_num, qty_change))
+        if cursor.rowcount == 0:
+            return (f"Error: Insufficient unreserved stock for {part_num} (changed on another workstation). "
+                    f"Requested: {qty_change}")
+        query_log.execute(cursor, ISSUE_LOCATION_SQL, (qty_change, part_num, location, qty_change))
+        if cursor.rowcount == 0:
+            return f"Error: Insufficient stock at {location} (changed on another workstation). Requested: {qty_change}"
+        query_log.execute(cursor, LEDGER_INSERT_SQL, (part_num, -qty_change, MOVEMENT_ISSUE, location))
+        query_log.execute(cursor, CHANGE_INSERT_SQL, _change_row(part_num, CHANGE_STOCK, -qty_change, location))
+        return None
+    return work
+
+def _write_movement(part_num, delta, movement_type, location, conn=None):
+    """Writes one movement online. Returns 'committed', 'failed' or an insufficient-stock error."""
+    if movement_type == MOVEMENT_ISSUE:
+        error = _run_transaction(_issue_work(part_num, -delta, location), conn)
+        if error is None:
+            return 'committed'
+        return error if error.startswith("Error: Insufficient") else 'failed'
+    statements = _movement_statements([(part_num, delta, movement_type, location)])
+    return 'committed' if _execute_transaction(statements, conn) else 'failed'
+
+def _commit_stock_movement(part_num, delta, movement_type, location=DEFAULT_LOCATION):
+    """
+    Writes one movement (quantity deltas + ledger entry).
+    Returns 'committed', 'journaled' (DB unreachable, kept in the offline journal
+    and already applied to the cache) or 'failed'. An issue the database refuses
+    because the stock is no longer there returns the insufficient-stock error.
+    """
+    journal = _OFFLINE_JOURNAL
+    if journal is None:
+        return _write_movement(part_num, delta, movement_type, location)
+
+    # While older offline movements wait for replay, new ones queue behind them (keeps order)
+    conn = None if journal.has_pending() else get_db_connection(quiet=True)
+    if conn is None:
+        base_qty = INVENTORY_CACHE.get_location_quantity(part_num, location)
+        journal.append(part_num, delta, movement_type, base_qty, location)
+        INVENTORY_CACHE.adjust_location_quantity(part_num, location, delta)
+        if _JOURNAL_REPLAYER:
+            _JOURNAL_REPLAYER.wake()
+        return 'journaled'
+    return _write_movement(part_num, delta, movement_type, location, conn)
+
+OFFLINE_NOTE = " (offline - will sync when the database is back)"
+
+def _unreserved_error(part_num, available, requested):
+    return (f"Error: Insufficient unreserved stock. Available to promise: {max(available, 0)} "
+            f"({INVENTORY_CACHE.get_reserved(part_num)} reserved), Requested: {requested}")
+
+def _location_note(part_num, location):
+    return f" ({location}: {INVENTORY_CACHE.get_location_quantity(part_num, location)})"
+
+@perf_metrics.timed('stock.receive')
+def update_stock_quantity(part_num, quantity_received, location=DEFAULT_LOCATION):
+    """
+    Increments the Quantity for a given PartNumber at a location in DB and cache.
+    """
+    part_num = part_num.strip()
+
+    # 1. Validation
+    qty_change, error = _parse_stock_change(part_num, quantity_received, 'received')
+    if error:
+        return error
+    location, error = _parse_location(location)
+    if error:
+        return error
+
+    # 2. Update the database: quantity deltas + ledger entry in one transaction
+    outcome = _commit_stock_movement(part_num, qty_change, MOVEMENT_RECEIPT, location)
     
-    if _execute_query(sql, params, is_commit=True):
-        # 3. Update the in-memory DataFrame (cache)
-        INVENTORY_DF.loc[part_num, 'Quantity'] = new_qty
-        return f"Stock updated successfully. New Quantity: {new_qty}"
+    if outcome == 'committed':
+        # 3. Update the in-memory cache (location and total together, O(1))
+        with perf_metrics.measure('cache.update'):
+            new_qty, _ = INVENTORY_CACHE.adjust_location_quantity(part_num, location, qty_change)
+        return f"Stock updated successfully. New Quantity: {new_qty}{_location_note(part_num, location)}"
+    elif outcome == 'journaled':
+        # Cache was already updated optimistically
+        return (f"Stock updated successfully{OFFLINE_NOTE}. New Quantity: {INVENTORY_CACHE.get_quantity(part_num)}"
+                f"{_location_note(part_num, location)}")
     else:
         # If DB update fails, the cache remains untouched for consistency
         return "Error: Database update failed."
     
 
-def issue_stock_quantity(part_num, quantity_issued):
+@perf_metrics.timed('stock.issue')
+def issue_stock_quantity(part_num, quantity_issued, location=DEFAULT_LOCATION):
     """
-    Decrements the Quantity for a given PartNumber in DB and DataFrame,
-    checking for sufficient stock.
+    Decrements the Quantity for a given PartNumber at a location in DB and cache,
+    checking for sufficient stock at that location.
     """
-    global INVENTORY_DF
-
     part_num = part_num.strip()
 
     # 1. Validation
-    if part_num not in INVENTORY_DF.index:
-        return "Error: Part Number not found."
-    try:
-        qty_change = int(quantity_issued)
-        # Quantity issued must be a positive whole number
-        if qty_change <= 0:
-            return "Error: Quantity issued must be a positive whole number."
-    except ValueError:
-        return "Error: Quantity must be a valid whole number."
+    qty_change, error = _parse_stock_change(part_num, quantity_issued, 'issued')
+    if error:
+        return error
+    location, error = _parse_location(location)
+    if error:
+        return error
 
-    # Current quantity from the in-memory cache
-    current_qty = INVENTORY_DF.loc[part_num, 'Quantity']
+    # Current quantity at the location from the in-memory cache
+    current_qty = INVENTORY_CACHE.get_location_quantity(part_num, location)
     
     # CRITICAL: Check for sufficient stock before issuing
-    if qty_change > int(current_qty):
-        return f"Error: Insufficient stock. Available: {current_qty}, Requested: {qty_change}"
+    if qty_change > current_qty:
+        return f"Error: Insufficient stock at {location}. Available: {current_qty}, Requested: {qty_change}"
 
-    # Calculate new quantity (SUBTRACTION)
-    new_qty = int(current_qty) - qty_change
-    
-    # 2. Update the database using the new total quantity
-    sql = "UPDATE inventory SET Quantity = %s WHERE PartNumber = %s"
-    params = (new_qty, part_num)
+    # Units reserved for work orders can only be issued through reservations.consume
+    available = INVENTORY_CACHE.get_available(part_num)
+    if qty_change > available:
+        return _unreserved_error(part_num, available, qty_change)
+
+    # 2. Update the database: quantity deltas (SUBTRACTION) + ledger entry in one transaction
+    outcome = _commit_stock_movement(part_num, -qty_change, MOVEMENT_ISSUE, location)
     
-    if _execute_query(sql, params, is_commit=True):
-        # 3. Update the in-memory DataFrame (cache)
-        INVENTORY_DF.loc[part_num, 'Quantity'] = new_qty
-        return f"Stock issued successfully. New Quantity: {new_qty}"
+    if outcome == 'committed':
+        # 3. Update the in-memory cache (location and total together, O(1))
+        with perf_metrics.measure('cache.update'):
+            new_qty, _ = INVENTORY_CACHE.adjust_location_quantity(part_num, location, -qty_change)
+        return f"Stock issued successfully. New Quantity: {new_qty}{_location_note(part_num, location)}"
+    elif outcome == 'journaled':
+        # Cache was already updated optimistically
+        return (f"Stock issued successfully{OFFLINE_NOTE}. New Quantity: {INVENTORY_CACHE.get_quantity(part_num)}"
+                f"{_location_note(part_num, location)}")
+    elif outcome.startswith("Error: Insufficient"):
+        # Another workstation took or reserved the units first; the change feed brings the cache up to date
+        return outcome
     else:
         # If DB update fails, the cache remains untouched for consistency
         return "Error: Database update failed."
 
-# Run initialization when the module is first imported
-initialize_inventory()
\ No newline at end of file
+# Run initialization when the module is first imported.
+# Headless tools (e.g. benchmark_inventory.py) set INVENTORY_AUTOLOAD=0 so they can
+# point DB_CONFIG at another database before the first load.
+if os.environ.get('INVENTORY_AUTOLOAD', '1') != '0':
+    initialize_inventory()
@@ -0,0 +1,186 @@
+# -------------------------------------------#
+# inventory_export.py - Streaming full-catalogue export (CSV / Parquet)
+#
+# Streams the inventory table with an unbuffered cursor (rows are read from the
+# server as they are fetched, not all at once) in fixed-size chunks and writes
+# each chunk straight to the output file, so memory use does not grow with the
+# size of the catalogue.
+#
+# Usage:
+#   python inventory_export.py nightly.parquet --format parquet --include-values
+# -------------------------------------------#
+
+import argparse
+import csv
+import os
+import sys
+import time
+import tracemalloc
+
+if __name__ == '__main__':
+    # The export reads straight from MySQL; don't load the whole table into the cache first
+    os.environ.setdefault('INVENTORY_AUTOLOAD', '0')
+
+import inventory_data
+
+DEFAULT_CHUNK_SIZE = 10000
+EXPORT_FORMATS = ('csv', 'parquet')
+
+
+def _build_query(include_images, include_values):
+    """Returns (sql, column names) for the requested export columns."""
+    columns = ['PartNumber', 'Description', 'UnitPrice', 'Quantity']
+    select = list(columns)
+    if include_images:
+        columns.append('ImagePath')
+        select.append('ImagePath')
+    if include_values:
+        columns.append('StockValue')
+        select.append('Quantity * UnitPrice AS StockValue')
+    sql = f"SELECT {', '.join(select)} FROM inventory ORDER BY PartNumber"
+    return sql, columns
+
+
+def _stream_chunks(cursor, chunk_size):
+    """Yields lists of row tuples, chunk_size at a time, from an unbuffered cursor."""
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            return
+        yield rows
+
+
+class _CsvSink:
+    def __init__(self, path, columns):
+        self._file = open(path, 'w', newline='', encoding='utf-8')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(columns)
+
+    def write(self, rows):
+        self._writer.writerows(rows)
+
+    def close(self):
+        self._file.close()
+
+
+class _ParquetSink:
+    # Numeric columns are written as float64/int64, everything else as strings
+    _FLOAT_COLUMNS = ('UnitPrice', 'StockValue')
+
+    def __init__(self, path, columns):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ValueError("Parquet export requires the 'pyarrow' package.")
+
+        self._pa = pa
+        self._columns = columns
+        fields = []
+        for name in columns:
+            if name in self._FLOAT_COLUMNS:
+                fields.append(pa.field(name, pa.float64()))
+            elif name == 'Quantity':
+                fields.append(pa.field(name, pa.int64()))
+            else:
+                fields.append(pa.field(name, pa.string()))
+        self._schema = pa.schema(fields)
+        self._writer = pq.ParquetWriter(path, self._schema, compression='snappy')
+
+    def write(self, rows):
+        # Transpose the row tuples into columns; DECIMAL values become floats
+        data = {}
+        for i, name in enumerate(self._columns):
+            values = [row[i] for row in rows]
+            if name in self._FLOAT_COLUMNS:
+                values = [float(v) if v is not None else None for v in values]
+            data[name] = values
+        self._writer.write_table(self._pa.Table.from_pydict(data, schema=self._schema))
+
+    def close(self):
+        self._writer.close()
+
+
+def export_inventory(output_path, fmt='csv', include_images=False, include_values=False,
+                     chunk_size=DEFAULT_CHUNK_SIZE, track_memory=True, progress=None):
+    """
+    Streams the whole inventory table into output_path as CSV or Parquet.
+    progress, if given, is called as progress(rows_so_far, rows_per_second) after
+    each chunk. Returns a summary dict: rows, seconds, rows_per_s, peak_memory_bytes
+    (Python heap peak during the export; None if track_memory=False).
+    Raises ValueError on bad arguments or when the database is unreachable.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}'. Use one of: {', '.join(EXPORT_FORMATS)}.")
+
+    sql, columns = _build_query(include_images, include_values)
+    conn = inventory_data.get_db_connection()
+    if conn is None:
+        raise ValueError("Database connection failed. Nothing was exported.")
+
+    if track_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    total_rows = 0
+    sink = None
+    # buffered=False: rows stay on the server socket until fetched
+    cursor = conn.cursor(buffered=False)
+    try:
+        sink = _CsvSink(output_path, columns) if fmt == 'csv' else _ParquetSink(output_path, columns)
+        cursor.execute(sql)
+        for rows in _stream_chunks(cursor, chunk_size):
+            sink.write(rows)
+            total_rows += len(rows)
+            if progress:
+                elapsed = time.perf_counter() - start
+                progress(total_rows, total_rows / elapsed if elapsed else 0.0)
+    finally:
+        if sink:
+            sink.close()
+        cursor.close()
+        if conn.is_connected():
+            conn.close()
+        peak_bytes = None
+        if track_memory:
+            peak_bytes = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+    seconds = time.perf_counter() - start
+    return {
+        'rows': total_rows,
+        'seconds': round(seconds, 3),
+        'rows_per_s': round(total_rows / seconds, 1) if seconds else 0.0,
+        'peak_memory_bytes': peak_bytes,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export the full inventory catalogue.")
+    parser.add_argument('output', help="Output file path.")
+    parser.add_argument('--format', choices=EXPORT_FORMATS,
+                        help="Output format (default: from the file extension, else csv).")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--include-images', action='store_true', help="Include the ImagePath column.")
+    parser.add_argument('--include-values', action='store_true', help="Include Quantity x UnitPrice.")
+    args = parser.parse_args(argv)
+
+    fmt = args.format or ('parquet' if args.output.lower().endswith('.parquet') else 'csv')
+
+    def show_progress(rows, rate):
+        print(f"\r{rows:,} rows  {rate:,.0f} rows/s", end='', file=sys.stderr, flush=True)
+
+    try:
+        summary = export_inventory(args.output, fmt, args.include_images, args.include_values,
+                                   args.chunk_size, progress=show_progress)
+    except ValueError as e:
+        print(f"\nError: {e}", file=sys.stderr)
+        return 1
+
+    print(f"\nExported {summary['rows']:,} rows to {args.output} in {summary['seconds']}s "
+          f"({summary['rows_per_s']:,.0f} rows/s, peak memory "
+          f"{summary['peak_memory_bytes'] / 2**20:.1f} MiB)", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -8,13 +8,20 @@ from tkinter import Toplevel, Label, Entry, Button, Frame, messagebox, filedialo
 from PIL import Image, ImageTk 
 import os 
 import shutil 
+import threading
 
 import inventory_data
+import bulk_import
+import notifications
 
 from edit_part import EditPartWindow 
 from stock_received import StockReceivedWindow
 from stock_issued import StockIssuedWindow
 from stock_enquiry import StockEnquiryWindow
+from stock_overview import InventoryOverviewWindow
+from stock_count import CycleCountWindow
+import abc_classification
+from window_manager import WindowManager, Screen
 
 
 
@@ -28,6 +35,12 @@ IMAGE_DIR = "part_images"
 PREVIEW_W = 250
 PREVIEW_H = 200
 
+# How often the Tk thread checks whether a bulk import has finished
+IMPORT_POLL_MS = 200
+
+# Screens built in the background after startup, most used first
+PREWARM_SCREENS = ['inventory_menu', 'stock_issued', 'stock_received', 'stock_enquiry']
+
 class InventoryManagementWindow:
     def __init__(self, master_root):
         """Initializes the window with a reference to the main root."""
@@ -42,16 +55,36 @@ class InventoryManagementWindow:
         self.photo_preview_label = None 
         self.preview_image_ref = None   
         self.inventory_window = None # Initialize the main inventory window reference
+        self.create_window = None
+        self.edit_manager = None
+        self._import_worker = None # Bulk import thread while one is running
         
         # Ensure the image directory exists on startup 
         if not os.path.exists(IMAGE_DIR):
             os.makedirs(IMAGE_DIR)
 
+        # Every screen is built once, then hidden and shown again (see window_manager.py)
+        self.windows = WindowManager(master_root)
+        self.windows.register('inventory_menu', self._build_inventory_menu)
+        self.windows.register('create_part', self._build_create_part_window)
+        self.windows.register('edit_part', self._build_edit_part_window)
+        self.windows.register('stock_received', lambda: StockReceivedWindow(self.master_root, self), modal=True)
+        self.windows.register('stock_issued', lambda: StockIssuedWindow(self.master_root, self), modal=True)
+        self.windows.register('stock_enquiry', lambda: StockEnquiryWindow(self.master_root, self), modal=True)
+        self.windows.register('inventory_overview', lambda: InventoryOverviewWindow(self.master_root, self), modal=True)
+        self.windows.register('cycle_count', lambda: CycleCountWindow(self.master_root, self), modal=True)
+
+    def prewarm_windows(self):
+        """Builds the most used screens in the background so the first visit is instant too."""
+        self.windows.prewarm(PREWARM_SCREENS)
+        # The first ABC classification reads the whole ledger, start it before anyone asks
+        abc_classification.CLASSIFIER.refresh_async()
+
     # Helper Method
     def return_to_main_menu(self):
-        """Closes the inventory window and re-opens the main menu."""
+        """Hides the inventory window and re-opens the main menu."""
         if self.inventory_window:
-            self.inventory_window.destroy()
+            self.windows.hide(self.inventory_window)
         self.master_root.deiconify()
 
     # Helper Method
@@ -65,28 +98,32 @@ class InventoryManagementWindow:
 
     # Helper Method
     def return_to_inventory_menu(self, current_window):
-        """Closes the current sub-window and re-opens the inventory menu window."""
-        current_window.destroy()
-        if self.inventory_window:
-            self.inventory_window.deiconify()
+        """Hides the current sub-window and re-opens the inventory menu window."""
+        self.windows.hide(current_window)
+        self.windows.show('inventory_menu')
         
     # Helper Method
     def return_to_main_menu_from_sub(self, current_window):
-        """Closes the current sub-window and returns to the main application menu."""
-        current_window.destroy()
+        """Hides the current sub-window and returns to the main application menu."""
+        self.windows.hide(current_window)
         self.master_root.deiconify()
 
     # UI: Inventory Management Menu
     def open_window(self):
-        """Creates and displays the main Inventory Management menu window."""
+        """Displays the main Inventory Management menu window."""
         
         # Make sure the main root is withdrawn if it's visible, for cleaner flow
         self.master_root.withdraw() 
-        
+        self.windows.show('inventory_menu')
+
+    def _build_inventory_menu(self):
+        """Creates the Inventory Management menu window (once; it is hidden and shown after that)."""
         self.inventory_window = Toplevel(self.master_root)
         self.inventory_window.title("Inventory Management")
         
-        WINDOW_WIDTH = 500
+        # Wide rather than tall: the buttons are laid out in two columns so the
+        # Back button stays on screen at 768px
+        WINDOW_WIDTH = 640
         WINDOW_HEIGHT = 600
         self.center_window(self.inventory_window, WINDOW_WIDTH, WINDOW_HEIGHT)
         
@@ -105,24 +142,29 @@ class InventoryManagementWindow:
         # List of buttons and their commands
         buttons = [
             ("Create New Part", self.open_create_new_part),
+            ("Bulk Import Parts", self.open_bulk_import),
             ("Edit Part Information", self.open_edit_part_information),
             ("Stock Received", self.open_stock_received), # UPDATED: Call the new method
             ("Stocks Issued", self.open_stock_issued_window),     
             ("Stock Enquiry", self.open_stock_enquiry),     
+            ("Inventory Overview", self.open_inventory_overview),
+            ("Cycle Count", self.open_cycle_count),
             ("Print Report", lambda: messagebox.showinfo("WIP", "Generating Print Report")),     
         ]
 
-        # Dynamically create buttons
-        row_num = 1
-        for text, command in buttons:
-            btn = Button(self.inventory_window, text=text, command=command,
-                         bg="#cccccc", fg="black", font=("Arial", 14), width=25, height=2)
-            btn.grid(row=row_num, column=1, padx=40, pady=10, sticky="ew")
-            row_num += 1
+        # Dynamically create buttons, two per row
+        button_frame = Frame(self.inventory_window, bg="white")
+        button_frame.grid(row=1, column=1, pady=(10, 0), sticky="ew")
+        button_frame.columnconfigure(0, weight=1)
+        button_frame.columnconfigure(1, weight=1)
+        for index, (text, command) in enumerate(buttons):
+            btn = Button(button_frame, text=text, command=command,
+                         bg="#cccccc", fg="black", font=("Arial", 14), width=20, height=2)
+            btn.grid(row=index // 2, column=index % 2, padx=10, pady=10, sticky="ew")
 
         # Navigation Buttons
         nav_frame = Frame(self.inventory_window, bg="white")
-        nav_frame.grid(row=row_num, column=1, pady=(10, 20), sticky="e")
+        nav_frame.grid(row=2, column=1, pady=(10, 20), sticky="e")
         
         # Back Page button
         back_btn = Button(nav_frame, text="Back Page", command=self.return_to_main_menu,
@@ -136,25 +178,32 @@ class InventoryManagementWindow:
         
         # Handle window close
         self.inventory_window.protocol("WM_DELETE_WINDOW", self.return_to_main_menu)
+        return Screen(self.inventory_window)
 
     def open_stock_received(self):
-        """Initializes and opens the Stock Received window."""
+        """Opens the Stock Received window."""
         self.inventory_window.withdraw()
-        stock_manager = StockReceivedWindow(self.master_root, self)
+        self.windows.show('stock_received')
     
         
     def open_edit_part_information(self):
-        """Initializes and opens the Edit Part Information window."""
+        """Opens the Edit Part Information window."""
         self.inventory_window.withdraw()
-        
-        edit_manager = EditPartWindow(self.master_root, self)
-        edit_manager.open_window()
+        self.windows.show('edit_part')
+
+    def _build_edit_part_window(self):
+        self.edit_manager = EditPartWindow(self.master_root, self)
+        self.edit_manager.open_window()
+        return Screen(self.edit_manager.edit_part_window, self.edit_manager.reset)
     
 
     def open_create_new_part(self):
-        """Creates and displays the Create New Part sub-window."""
+        """Displays the Create New Part sub-window."""
         self.inventory_window.withdraw()
-        
+        self.windows.show('create_part')
+
+    def _build_create_part_window(self):
+        """Creates the Create New Part sub-window (once; it is hidden and shown after that)."""
         self.create_window = Toplevel(self.master_root)
         self.create_window.title("Create New Part")
         
@@ -248,6 +297,20 @@ class InventoryManagementWindow:
 
         # Handle window close (X button)
         self.create_window.protocol("WM_DELETE_WINDOW", lambda: self.return_to_inventory_menu(self.create_window))
+        return Screen(self.create_window, self._reset_create_part_form)
+
+    def _reset_create_part_form(self):
+        """Clears all fields and the image preview of the Create New Part form."""
+        self.entry_part_num.delete(0, 'end')
+        self.entry_description.delete(0, 'end')
+        self.entry_unit_price.delete(0, 'end')
+        
+        # Clear image preview 
+        self.selected_photo_path = None
+        # IMPORTANT: Revert label config back to its default text-unit size (width=25, height=3) and compound=tk.NONE
+        self.photo_preview_label.config(text="No image selected", image='', compound=tk.NONE, width=25, height=3) 
+        self.preview_image_ref = None 
+        self.entry_part_num.focus_set()
         
     def select_photo_file(self):
         """Opens a file dialog for selecting an image and displays a preview."""
@@ -340,42 +403,95 @@ class InventoryManagementWindow:
         # 2. Call the function from your data module
         result_message = inventory_data.create_new_part_data(part_num, desc, price_str, saved_image_path)
         
-        # 3. Display the result and clear fields
+        # 3. Display the result (non-modal banner) and clear fields
         if result_message.startswith("Error"):
-            messagebox.showerror("Update Error", result_message)
+            notifications.error("Update Error", result_message)
         elif result_message.startswith("Update Successful"):
-            messagebox.showinfo("Update Status", result_message)
+            notifications.info("Update Status", result_message)
             
             # Clear fields after successful update
-            self.entry_part_num.delete(0, 'end')
-            self.entry_part_num.insert(0, '')
-            
-            self.entry_description.delete(0, 'end')
-            self.entry_description.insert(0, '')
-            
-            self.entry_unit_price.delete(0, 'end')
-            self.entry_unit_price.insert(0, '')
-            
-            # Clear image preview 
-            self.selected_photo_path = None
-            # IMPORTANT: Revert label config back to its default text-unit size (width=25, height=3) and compound=tk.NONE
-            self.photo_preview_label.config(text="No image selected", image='', compound=tk.NONE, width=25, height=3) 
-            self.preview_image_ref = None 
+            self._reset_create_part_form()
         else:
-            messagebox.showwarning("Status", result_message)
+            notifications.warning("Status", result_message)
+
+    def open_bulk_import(self):
+        """
+        Asks for a CSV/Excel catalogue and imports all valid rows as new parts.
+        The import runs on a worker thread so the window stays responsive;
+        the summary is shown when it finishes.
+        """
+        if self._import_worker is not None:
+            notifications.info("Import Status", "An import is already running.")
+            return
+
+        file_path = filedialog.askopenfilename(
+            title="Select Parts Catalogue",
+            filetypes=[
+                ("Catalogue files", "*.csv *.xlsx"),
+                ("All files", "*.*")
+            ]
+        )
+        if not file_path:
+            return
+
+        outcome = {}
+
+        def work():
+            try:
+                outcome['summary'] = bulk_import.import_parts(file_path)
+            except ValueError as e:
+                outcome['error'] = str(e)
+
+        self._import_worker = threading.Thread(target=work, name='bulk-import', daemon=True)
+        self._import_worker.start()
+        notifications.info("Import Status", f"Importing {os.path.basename(file_path)}...")
+        self.master_root.after(IMPORT_POLL_MS, self._finish_bulk_import, outcome)
+
+    def _finish_bulk_import(self, outcome):
+        """Polled on the Tk thread until the import thread is done, then shows the summary."""
+        if self._import_worker.is_alive():
+            self.master_root.after(IMPORT_POLL_MS, self._finish_bulk_import, outcome)
+            return
+        self._import_worker = None
+
+        if 'summary' not in outcome:
+            messagebox.showerror("Import Error", outcome.get('error', "The import stopped unexpectedly."))
+            return
+
+        summary = outcome['summary']
+        message = f"Imported {summary['accepted']:,} part(s) in {summary['seconds']}s."
+        if summary['rejected']:
+            message += f"\n{summary['rejected']:,} row(s) rejected. See:\n{summary['rejects_path']}"
+        messagebox.showinfo("Import Status", message)
 
     def open_stock_issued_window(self):
         self.inventory_window.withdraw()
-        StockIssuedWindow(self.master_root, self)
+        self.windows.show('stock_issued')
 
     def open_stock_enquiry(self): # Or whatever you named the method
         """
-        Creates and opens the StockEnquiryWindow.
+        Opens the StockEnquiryWindow.
         """
         # 1. Hide the current window (the Inventory Management Toplevel)
         if self.inventory_window:
             self.inventory_window.withdraw() 
         
-        # 2. Instantiate and open the new window.
-        # FIX APPLIED HERE: Changed self.root to self.master_root
-        self.stock_enquiry_window = StockEnquiryWindow(self.master_root, self)
+        # 2. Show the (already built, or built now) enquiry window
+        self.stock_enquiry_window = self.windows.show('stock_enquiry')
+
+    def open_inventory_overview(self):
+        """Opens the inventory grid (ABC classes and dead stock)."""
+        self.inventory_window.withdraw()
+        self.windows.show('inventory_overview')
+
+    def open_cycle_count(self):
+        """Opens the cycle count window."""
+        self.inventory_window.withdraw()
+        self.windows.show('cycle_count')
+
+    def refresh_inventory_table(self):
+        """Called by the stock windows after a posting: redraws the overview grid if it is open."""
+        if self.windows.is_built('inventory_overview'):
+            overview = self.windows.get('inventory_overview')
+            if overview.window.winfo_viewable():
+                overview.refresh()
@@ -0,0 +1,330 @@
+# -------------------------------------------#
+# load_test.py - Concurrent storeroom load generator for the data layer
+#
+# Simulates many clerks at once against the local benchmark database (see
+# benchmark_inventory.py). Each worker runs a weighted mix of receipts, issues
+# and enquiries on a skewed set of parts (most activity on a few popular parts,
+# as on a real shop floor) and times every call.
+#
+#   --mode threads    workers share one process and one cache (one busy station)
+#   --mode processes  every worker has its own cache (many stations)
+#
+# Reports throughput, latency percentiles per operation, InnoDB row lock waits,
+# deadlocks and lock wait timeouts during the run, and a consistency check:
+# for every part touched, start Quantity + ledger movements must equal the
+# final Quantity, and the ledger must hold exactly the movements the workers
+# were told succeeded.
+#
+# Usage:
+#   python load_test.py --workers 16 --duration 30
+#   python load_test.py --workers 8 --mode processes --mix 45,45,10 --output load.json
+# -------------------------------------------#
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sys
+import threading
+import time
+
+os.environ['INVENTORY_AUTOLOAD'] = '0'
+
+import mysql.connector
+
+import inventory_data
+import benchmark_inventory as bench
+
+DEFAULT_CATALOGUE = 10000
+DEFAULT_CANDIDATES = 2000
+DEFAULT_HOT_PARTS = 20
+DEFAULT_HOT_SHARE = 0.8
+OPERATIONS = ('receive', 'issue', 'enquiry')
+
+
+# --- Server Counters ---
+
+def _lock_counters(cursor):
+    """Cumulative InnoDB lock counters; deadlocks/timeouts are None if INNODB_METRICS is unavailable."""
+    cursor.execute("SHOW GLOBAL STATUS WHERE Variable_name IN ('Innodb_row_lock_waits', 'Innodb_row_lock_time')")
+    counters = {name: int(value) for name, value in cursor.fetchall()}
+    result = {
+        'row_lock_waits': counters.get('Innodb_row_lock_waits', 0),
+        'row_lock_time_ms': counters.get('Innodb_row_lock_time', 0),
+        'deadlocks': None,
+        'lock_timeouts': None,
+    }
+    try:
+        cursor.execute("SELECT NAME, COUNT FROM information_schema.INNODB_METRICS "
+                       "WHERE NAME IN ('lock_deadlocks', 'lock_timeouts')")
+        metrics = {name: int(count) for name, count in cursor.fetchall()}
+        result['deadlocks'] = metrics.get('lock_deadlocks')
+        result['lock_timeouts'] = metrics.get('lock_timeouts')
+    except mysql.connector.Error:
+        pass
+    return result
+
+
+def _counter_delta(before, after):
+    return {name: (after[name] - before[name]) if after[name] is not None and before[name] is not None else None
+            for name in before}
+
+
+def _quantities(cursor, part_nums):
+    quantities = {}
+    for start in range(0, len(part_nums), 1000):
+        chunk = part_nums[start:start + 1000]
+        marks = ', '.join(['%s'] * len(chunk))
+        cursor.execute(f"SELECT PartNumber, Quantity FROM inventory WHERE PartNumber IN ({marks})", chunk)
+        quantities.update({part: int(qty) for part, qty in cursor.fetchall()})
+    return quantities
+
+
+# --- Worker ---
+
+def _pick_part(rng, hot, cold, hot_share):
+    return rng.choice(hot) if rng.random() < hot_share else rng.choice(cold)
+
+
+def run_worker(worker_id, config, barrier=None):
+    """
+    Runs one clerk for config['duration'] seconds (starting together with the
+    others once `barrier` releases). Returns per-operation latency samples (ns),
+    error counts, rejected issues and the net quantity the worker moved per part.
+    """
+    rng = random.Random(config['seed'] + worker_id)
+    candidates = config['candidates']
+    hot, cold = candidates[:config['hot_parts']], candidates[config['hot_parts']:] or candidates
+    weights = config['mix']
+
+    samples = {op: [] for op in OPERATIONS}
+    errors = {op: 0 for op in OPERATIONS}
+    rejected = 0
+    moved = {}
+    if barrier is not None:
+        barrier.wait()
+    started = time.time()
+    deadline = started + config['duration']
+
+    while time.time() < deadline:
+        op = rng.choices(OPERATIONS, weights)[0]
+        part_num = _pick_part(rng, hot, cold, config['hot_share'])
+        qty = rng.randint(1, config['max_qty'])
+
+        start = time.perf_counter_ns()
+        if op == 'receive':
+            result = inventory_data.update_stock_quantity(part_num, qty)
+        elif op == 'issue':
+            result = inventory_data.issue_stock_quantity(part_num, qty)
+        else:
+            result = inventory_data.get_part_data(part_num)
+        samples[op].append(time.perf_counter_ns() - start)
+
+        if op == 'enquiry':
+            if result is None:
+                errors[op] += 1
+        elif isinstance(result, str) and 'successfully' in result:
+            moved[part_num] = moved.get(part_num, 0) + (qty if op == 'receive' else -qty)
+        elif isinstance(result, str) and 'Insufficient' in result:
+            rejected += 1  # A business rule (no stock at the location, or it is reserved), not a failure
+        else:
+            errors[op] += 1
+
+    return {'samples': samples, 'errors': errors, 'rejected_issues': rejected, 'moved': moved,
+            'started': started, 'finished': time.time(), 'reporter_errors': len(_reporter_errors)}
+
+
+def _process_worker(worker_id, config, barrier, results):
+    """Entry point in --mode processes: each process loads its own cache before the start."""
+    inventory_data.set_error_reporter(_quiet_reporter)
+    inventory_data.DB_CONFIG.update(config['db_config'])
+    if not inventory_data.initialize_inventory():
+        barrier.abort()
+        results.put(None)
+        return
+    try:
+        results.put(run_worker(worker_id, config, barrier))
+    except threading.BrokenBarrierError:
+        results.put(None)  # Another worker failed to start
+
+
+_reporter_errors = []
+
+
+def _quiet_reporter(level, title, message):
+    """Collects data-layer errors (deadlocks, timeouts) instead of showing dialogs."""
+    _reporter_errors.append(f"{title}: {message}")
+
+
+# --- Run ---
+
+def run_load_test(workers, duration, mode, mix, catalogue, candidate_count, hot_parts,
+                  hot_share, max_qty, seed):
+    rng = random.Random(seed)
+    print(f"Seeding {catalogue:,} parts...", flush=True)
+    bench.seed_catalogue(catalogue, rng)
+    db_config = bench._bench_config()
+    inventory_data.DB_CONFIG.update(db_config)
+    inventory_data.set_error_reporter(_quiet_reporter)
+
+    candidates = [bench._part_number(i) for i in rng.sample(range(catalogue), min(candidate_count, catalogue))]
+
+    conn = mysql.connector.connect(**db_config)
+    conn.autocommit = True
+    cursor = conn.cursor()
+    # Make sure the ledger exists so the starting MovementID can be read
+    inventory_data._ensure_schema(cursor)
+    cursor.execute("SELECT COALESCE(MAX(MovementID), 0) FROM stock_movements")
+    start_movement = int(cursor.fetchone()[0])
+    start_qty = _quantities(cursor, candidates)
+    counters_before = _lock_counters(cursor)
+
+    if mode == 'threads' and not inventory_data.initialize_inventory():
+        print("Error: could not load the inventory cache.", file=sys.stderr)
+        return None
+
+    config = {
+        'candidates': candidates, 'hot_parts': min(hot_parts, len(candidates)), 'hot_share': hot_share,
+        'mix': mix, 'max_qty': max_qty, 'seed': seed, 'db_config': db_config, 'duration': duration,
+    }
+    print(f"Running {workers} {mode} for {duration}s (mix receive/issue/enquiry = {mix})...", flush=True)
+
+    if mode == 'threads':
+        results = [None] * workers
+        barrier = threading.Barrier(workers)
+
+        def target(i):
+            results[i] = run_worker(i, config, barrier)
+
+        threads = [threading.Thread(target=target, args=(i,)) for i in range(workers)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    else:
+        # Every process loads its own cache; the barrier starts the clock once all are ready
+        barrier = multiprocessing.Barrier(workers)
+        queue = multiprocessing.Queue()
+        procs = [multiprocessing.Process(target=_process_worker, args=(i, config, barrier, queue))
+                 for i in range(workers)]
+        for p in procs:
+            p.start()
+        # Drain before join: a child cannot exit while its result is still in the pipe
+        results = [queue.get() for _ in procs]
+        for p in procs:
+            p.join()
+        if None in results:
+            print("Error: a worker could not load the inventory cache.", file=sys.stderr)
+            return None
+    elapsed = max(r['finished'] for r in results) - min(r['started'] for r in results)
+
+    counters = _counter_delta(counters_before, _lock_counters(cursor))
+
+    # --- Consistency ---
+    cursor.execute("SELECT PartNumber, SUM(QtyChange) FROM stock_movements WHERE MovementID > %s GROUP BY PartNumber",
+                   (start_movement,))
+    ledger = {part: int(total) for part, total in cursor.fetchall()}
+    final_qty = _quantities(cursor, candidates)
+    cursor.close()
+    conn.close()
+
+    acknowledged = {}
+    for result in results:
+        for part_num, qty in result['moved'].items():
+            acknowledged[part_num] = acknowledged.get(part_num, 0) + qty
+
+    drift = {p: final_qty.get(p, 0) - start_qty.get(p, 0) - ledger.get(p, 0) for p in candidates}
+    lost = {p: ledger.get(p, 0) - acknowledged.get(p, 0) for p in set(ledger) | set(acknowledged)}
+    cache_mismatch = None
+    if mode == 'threads':
+        cache_mismatch = sum(1 for p in candidates
+                             if p in inventory_data.INVENTORY_CACHE
+                             and inventory_data.INVENTORY_CACHE.get_quantity(p) != final_qty.get(p))
+
+    report = {
+        'mode': mode, 'workers': workers, 'duration_s': round(elapsed, 2), 'mix': mix,
+        'catalogue': catalogue, 'candidate_parts': len(candidates), 'hot_parts': config['hot_parts'],
+        'operations': {},
+        'lock_counters': counters,
+        'consistency': {
+            'parts_touched': len(ledger),
+            'quantity_vs_ledger_mismatches': sum(1 for d in drift.values() if d),
+            'ledger_vs_acknowledged_mismatches': sum(1 for d in lost.values() if d),
+            'negative_stock_parts': sum(1 for q in final_qty.values() if q < 0),
+            'cache_vs_db_mismatches': cache_mismatch,
+        },
+        'rejected_issues': sum(r['rejected_issues'] for r in results),
+        'data_layer_errors': (len(_reporter_errors) if mode == 'threads'
+                              else sum(r['reporter_errors'] for r in results)),
+    }
+    total_ops = 0
+    for op in OPERATIONS:
+        samples = [s for r in results for s in r['samples'][op]]
+        stats = bench.summarize(samples, sum(r['errors'][op] for r in results))
+        # summarize() derives ops/s from time spent in calls; use wall time across all workers instead
+        stats['ops_per_s'] = round(len(samples) / elapsed, 2) if elapsed else 0.0
+        report['operations'][op] = stats
+        total_ops += len(samples)
+    report['total_ops_per_s'] = round(total_ops / elapsed, 2) if elapsed else 0.0
+    return report
+
+
+def print_report(report):
+    print(f"\n{report['workers']} {report['mode']} for {report['duration_s']}s: "
+          f"{report['total_ops_per_s']:,.1f} ops/s total")
+    for op, stats in report['operations'].items():
+        print(f"  {op:<8} {stats['ops_per_s']:>10,.1f} ops/s  p50 {stats['p50_ms']:.2f}ms  "
+              f"p90 {stats['p90_ms']:.2f}ms  p99 {stats['p99_ms']:.2f}ms  max {stats['max_ms']:.2f}ms  "
+              f"errors {stats['errors']}")
+    locks = report['lock_counters']
+    print(f"  row lock waits {locks['row_lock_waits']}  ({locks['row_lock_time_ms']} ms waited)  "
+          f"deadlocks {locks['deadlocks']}  lock wait timeouts {locks['lock_timeouts']}")
+    c = report['consistency']
+    print(f"  consistency: {c['parts_touched']} parts moved, "
+          f"{c['quantity_vs_ledger_mismatches']} Quantity/ledger mismatches, "
+          f"{c['ledger_vs_acknowledged_mismatches']} ledger/acknowledged mismatches, "
+          f"{c['negative_stock_parts']} parts below zero"
+          + (f", {c['cache_vs_db_mismatches']} cache/DB mismatches" if c['cache_vs_db_mismatches'] is not None else ""))
+    print(f"  {report['rejected_issues']} issues rejected for insufficient stock, "
+          f"{report['data_layer_errors']} data-layer errors")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent load test for the inventory data layer.")
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=20.0, help="Seconds to run.")
+    parser.add_argument('--mode', choices=('threads', 'processes'), default='threads')
+    parser.add_argument('--mix', default='40,40,20', help="Weights for receive,issue,enquiry.")
+    parser.add_argument('--catalogue', type=int, default=DEFAULT_CATALOGUE, help="Parts in the test table.")
+    parser.add_argument('--parts', type=int, default=DEFAULT_CANDIDATES, help="Parts the clerks work on.")
+    parser.add_argument('--hot-parts', type=int, default=DEFAULT_HOT_PARTS)
+    parser.add_argument('--hot-share', type=float, default=DEFAULT_HOT_SHARE,
+                        help="Share of operations that hit the hot parts.")
+    parser.add_argument('--max-qty', type=int, default=5, help="Largest quantity per movement.")
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--output', help="Write the report as JSON to this file.")
+    args = parser.parse_args(argv)
+
+    try:
+        mix = [float(w) for w in args.mix.split(',')]
+        if len(mix) != 3 or min(mix) < 0 or not sum(mix):
+            raise ValueError
+    except ValueError:
+        parser.error("--mix needs three non-negative weights, e.g. 40,40,20")
+
+    report = run_load_test(args.workers, args.duration, args.mode, mix, args.catalogue, args.parts,
+                           args.hot_parts, args.hot_share, args.max_qty, args.seed)
+    if report is None:
+        return 2
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.output}")
+    c = report['consistency']
+    return 1 if c['quantity_vs_ledger_mismatches'] or c['ledger_vs_acknowledged_mismatches'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -11,6 +11,17 @@ import warnings
 warnings.filterwarnings("ignore", category=UserWarning)
 
 from inventory_function import InventoryManagementWindow 
+from perf_panel import PerformancePanel
+from notification_center import NotificationCenter
+import inventory_data
+import query_log
+
+# Structured statement log (query_log.jsonl, rotated) with EXPLAIN plans for slow statements
+query_log.configure()
+# Keep stock receipts/issues working through short database outages
+inventory_data.enable_offline_journal()
+# Pick up changes made on other workstations
+inventory_data.enable_change_feed()
 
 logo_image_ref = None 
 
@@ -124,6 +135,17 @@ close_btn.grid(
 # This makes it available for the 'open_inventory_management' function
 inventory_manager_instance = InventoryManagementWindow(root)
 
+# Non-modal banners for the notification bus; F11 opens the notification log
+notification_center = NotificationCenter(root)
+root.bind_all("<F11>", lambda event: notification_center.open_log_window())
+
+# F12 opens the performance diagnostics panel from any window
+perf_panel = PerformancePanel(root)
+root.bind_all("<F12>", lambda event: perf_panel.open_window())
+
+# Build the most used screens in the background once the main menu is up
+inventory_manager_instance.prewarm_windows()
+
 # Start the application main loop
 root.protocol("WM_DELETE_WINDOW", close_app)
 root.mainloop()
\ No newline at end of file
@@ -0,0 +1,159 @@
+# -------------------------------------------#
+# notification_center.py - Banners and log panel for the notification bus
+#
+# Polls notifications.pending() from the Tk main loop and stacks each message
+# as a small always-on-top banner in the top-right corner of the screen. Banners
+# never take focus and disappear on their own (errors stay longest). Clicking a
+# banner, or pressing F11, opens the log panel with the recent history.
+# -------------------------------------------#
+
+import time
+import tkinter as tk
+from tkinter import Toplevel, Label, Button, Frame, Checkbutton, ttk
+
+import notifications
+
+POLL_MS = 100
+MAX_BANNERS = 4
+SCREEN_MARGIN = 20
+
+# level -> how long its banner stays up
+BANNER_DURATION_MS = {'info': 3000, 'warning': 6000, 'error': 10000}
+# level -> (background, foreground)
+BANNER_COLORS = {
+    'info': ("#2e7d32", "white"),
+    'warning': ("#f9a825", "black"),
+    'error': ("#c62828", "white"),
+}
+
+
+class NotificationCenter:
+    def __init__(self, master_root):
+        """Starts polling the notification bus; banners are shown over all app windows."""
+        self.master_root = master_root
+        self.banners = [] # [(frame, after_id)] oldest first
+        self.log_window = None
+        self.log_tree = None
+        self.errors_only_var = None
+
+        # One borderless, always-on-top window holds the stacked banners
+        self.banner_window = Toplevel(master_root)
+        self.banner_window.overrideredirect(True)
+        self.banner_window.attributes('-topmost', True)
+        self.banner_window.withdraw()
+
+        self._poll()
+
+    def _poll(self):
+        for notification in notifications.pending():
+            self._show_banner(notification)
+            self._append_to_log(notification)
+        self.master_root.after(POLL_MS, self._poll)
+
+    # --- Banners ---
+
+    def _show_banner(self, notification):
+        bg, fg = BANNER_COLORS[notification.level]
+        frame = Frame(self.banner_window, bg=bg, bd=1, relief=tk.SOLID)
+        text = f"{notification.title}: {notification.message}" if notification.title else notification.message
+        label = Label(frame, text=text, font=("Arial", 11, "bold"), bg=bg, fg=fg,
+                      padx=12, pady=6, wraplength=380, justify=tk.LEFT, anchor='w')
+        label.pack(fill='x')
+        for widget in (frame, label):
+            widget.bind("<Button-1>", lambda event: self.open_log_window())
+        frame.pack(fill='x', pady=(0, 4))
+
+        after_id = self.master_root.after(BANNER_DURATION_MS[notification.level],
+                                          lambda: self._remove_banner(frame))
+        self.banners.append((frame, after_id))
+        if len(self.banners) > MAX_BANNERS:
+            old_frame, old_after_id = self.banners[0]
+            self.master_root.after_cancel(old_after_id)
+            self._remove_banner(old_frame)
+        self._place_banner_window()
+
+    def _remove_banner(self, frame):
+        self.banners = [(f, a) for f, a in self.banners if f is not frame]
+        frame.destroy()
+        self._place_banner_window()
+
+    def _place_banner_window(self):
+        if not self.banners:
+            self.banner_window.withdraw()
+            return
+        self.banner_window.update_idletasks()
+        width = self.banner_window.winfo_reqwidth()
+        x = self.banner_window.winfo_screenwidth() - width - SCREEN_MARGIN
+        self.banner_window.geometry(f"+{x}+{SCREEN_MARGIN}")
+        self.banner_window.deiconify()
+        self.banner_window.lift()
+
+    # --- Log Panel ---
+
+    def open_log_window(self):
+        """Opens the notification log (or brings the open one to the front)."""
+        if self.log_window is not None and self.log_window.winfo_exists():
+            self.log_window.deiconify()
+            self.log_window.lift()
+            return
+
+        self.log_window = Toplevel(self.master_root)
+        self.log_window.title("Notification Log")
+        self.log_window.geometry("760x400")
+        self.log_window.config(bg="white")
+        self.log_window.columnconfigure(0, weight=1)
+        self.log_window.rowconfigure(1, weight=1)
+
+        Label(self.log_window, text="Notification Log", font=("Arial", 16, "bold"),
+              bg="white", fg="#004d99").grid(row=0, column=0, pady=10)
+
+        self.log_tree = ttk.Treeview(self.log_window, columns=('level', 'title', 'message'), show='tree headings')
+        self.log_tree.heading('#0', text="Time")
+        self.log_tree.column('#0', width=80, anchor='w')
+        self.log_tree.heading('level', text="Level")
+        self.log_tree.column('level', width=70, anchor='w')
+        self.log_tree.heading('title', text="Title")
+        self.log_tree.column('title', width=160, anchor='w')
+        self.log_tree.heading('message', text="Message")
+        self.log_tree.column('message', width=420, anchor='w')
+        self.log_tree.tag_configure('error', foreground="#c62828")
+        self.log_tree.tag_configure('warning', foreground="#b26a00")
+        self.log_tree.grid(row=1, column=0, sticky="nsew", padx=10)
+
+        control_frame = Frame(self.log_window, bg="white")
+        control_frame.grid(row=2, column=0, sticky="ew", padx=10, pady=10)
+        self.errors_only_var = tk.BooleanVar(value=False)
+        Checkbutton(control_frame, text="Errors and warnings only", variable=self.errors_only_var,
+                    command=self._reload_log, bg="white").pack(side="left")
+        Button(control_frame, text="Close", command=self.close_log_window,
+               bg="#cccccc", font=("Arial", 10)).pack(side="right", padx=5)
+        Button(control_frame, text="Clear", command=self._clear_log,
+               bg="#cccccc", font=("Arial", 10)).pack(side="right", padx=5)
+
+        self.log_window.protocol("WM_DELETE_WINDOW", self.close_log_window)
+        self._reload_log()
+
+    def close_log_window(self):
+        self.log_window.destroy()
+        self.log_window = None
+        self.log_tree = None
+
+    def _levels(self):
+        return ('warning', 'error') if self.errors_only_var.get() else notifications.LEVELS
+
+    def _reload_log(self):
+        self.log_tree.delete(*self.log_tree.get_children())
+        for notification in notifications.history(self._levels()):
+            self._append_to_log(notification)
+
+    def _append_to_log(self, notification):
+        """Adds one notification at the top of the open log panel."""
+        if self.log_tree is None or notification.level not in self._levels():
+            return
+        self.log_tree.insert('', 0, text=time.strftime('%H:%M:%S', time.localtime(notification.time)),
+                             values=(notification.level, notification.title, notification.message),
+                             tags=(notification.level,))
+
+    def _clear_log(self):
+        notifications.clear_history()
+        self._reload_log()
@@ -0,0 +1,71 @@
+# -------------------------------------------#
+# notifications.py - Thread-safe notification bus
+#
+# The data layer and the UI post status messages here instead of opening
+# message boxes, so nothing ever blocks on a dialog and background threads
+# (offline journal replay, change feed) can report safely.
+#
+# The Tk side (notification_center.py) drains pending() from the main thread
+# and shows each message as a non-modal, auto-expiring banner; history() backs
+# the notification log panel. Without a notification center messages are only
+# kept in the history.
+# -------------------------------------------#
+
+import collections
+import queue
+import threading
+import time
+
+LEVELS = ('info', 'warning', 'error')
+# Notifications kept for the log panel
+HISTORY_SIZE = 500
+
+Notification = collections.namedtuple('Notification', 'time level title message')
+
+_lock = threading.Lock()
+_history = collections.deque(maxlen=HISTORY_SIZE)
+_pending = queue.Queue()
+
+
+def post(level, title, message):
+    """Posts a notification (level 'info', 'warning' or 'error'). Safe from any thread."""
+    if level not in LEVELS:
+        level = 'error'
+    notification = Notification(time.time(), level, title, message)
+    with _lock:
+        _history.append(notification)
+    _pending.put(notification)
+    return notification
+
+
+def info(title, message):
+    return post('info', title, message)
+
+
+def warning(title, message):
+    return post('warning', title, message)
+
+
+def error(title, message):
+    return post('error', title, message)
+
+
+def pending():
+    """Returns (and removes) the notifications posted since the last call, oldest first."""
+    items = []
+    while True:
+        try:
+            items.append(_pending.get_nowait())
+        except queue.Empty:
+            return items
+
+
+def history(levels=LEVELS):
+    """Returns the kept notifications with a level in `levels`, oldest first."""
+    with _lock:
+        return [n for n in _history if n.level in levels]
+
+
+def clear_history():
+    with _lock:
+        _history.clear()
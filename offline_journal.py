@@ -0,0 +1,320 @@
+# -------------------------------------------#
+# offline_journal.py - Local journal for stock movements during DB outages
+#
+# While MySQL is unreachable, inventory_data appends each receipt/issue to an
+# append-only JSON-lines file (fsync'd before the operator is told it worked)
+# and applies it to the cache. JournalReplayer pushes the journal to MySQL in
+# batches once the connection returns:
+#   - each record carries a JournalID stored on its ledger row, so a replay that
+#     is interrupted half-way never applies a movement twice;
+#   - a part deleted in the meantime, or an issue that would drive the DB
+#     quantity at its location negative, is a conflict: the record is skipped,
+#     written to <journal>.conflicts and its cache effect is reversed;
+#   - a location whose DB quantity changed in the meantime (another station) is
+#     applied normally and the cache is corrected by the difference (unless the
+#     change feed is running, which catches up on those movements itself).
+# Records written before stock locations existed have no 'loc' and are
+# replayed against the default location.
+# On startup, records whose batch reached MySQL before the process died (but
+# were not yet marked done) are already in the freshly loaded cache; they are
+# marked done instead of being applied to it a second time.
+# -------------------------------------------#
+
+import json
+import os
+import threading
+import time
+import uuid
+
+import mysql.connector
+
+import inventory_data
+
+DEFAULT_BATCH_SIZE = 200
+# JournalIDs per lookup query
+ID_CHUNK = 1000
+
+REPLAY_LEDGER_SQL = """
+    INSERT INTO stock_movements (PartNumber, QtyChange, MovementType, LocationCode, CreatedAt, JournalID)
+    VALUES (%s, %s, %s, %s, FROM_UNIXTIME(%s), %s)
+"""
+
+
+def _location(record):
+    return record.get('loc') or inventory_data.DEFAULT_LOCATION
+
+
+def _committed_ids(cursor, ids):
+    """The given JournalIDs that already have a ledger row."""
+    found = set()
+    for start in range(0, len(ids), ID_CHUNK):
+        chunk = ids[start:start + ID_CHUNK]
+        cursor.execute(f"SELECT JournalID FROM stock_movements WHERE JournalID IN ({', '.join(['%s'] * len(chunk))})",
+                       chunk)
+        found.update(row[0] for row in cursor.fetchall())
+    return found
+
+
+def _fsync_write(file_obj, text):
+    file_obj.write(text)
+    file_obj.flush()
+    os.fsync(file_obj.fileno())
+
+
+class OfflineJournal:
+    def __init__(self, path):
+        """Opens (or creates) the journal and loads the records not yet replayed."""
+        self.path = path
+        self.done_path = path + '.done'
+        self.conflict_path = path + '.conflicts'
+        self._lock = threading.Lock()
+        self._records = self._load_pending()
+        # IDs applied to the cache by apply_pending_to_cache without checking MySQL
+        self._unchecked_ids = set()
+        self._file = open(self.path, 'a', encoding='utf-8')
+        if self._file.tell() > 0 and not self._ends_with_newline():
+            # Close off a torn last line so the next record starts on its own line
+            _fsync_write(self._file, '\n')
+        self._done_file = open(self.done_path, 'a', encoding='utf-8')
+
+    def _load_pending(self):
+        """Reads the journal, skipping records listed in the .done file."""
+        done = set()
+        if os.path.exists(self.done_path):
+            with open(self.done_path, 'r', encoding='utf-8') as f:
+                done = {line.strip() for line in f if line.strip()}
+
+        records = []
+        if os.path.exists(self.path):
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # A torn last line from a crash mid-write was never acknowledged
+                        continue
+                    if record['id'] not in done:
+                        records.append(record)
+        return records
+
+    def _ends_with_newline(self):
+        with open(self.path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b'\n'
+
+    # --- Recording ---
+
+    def has_pending(self):
+        return bool(self._records)
+
+    def pending_count(self):
+        return len(self._records)
+
+    def append(self, part_num, delta, movement_type, base_qty, location):
+        """Durably records one movement. base_qty is the cached quantity at the location before it."""
+        record = {
+            'id': uuid.uuid4().hex,
+            'ts': time.time(),
+            'part': part_num,
+            'loc': location,
+            'delta': int(delta),
+            'type': movement_type,
+            'base_qty': int(base_qty),
+        }
+        with self._lock:
+            _fsync_write(self._file, json.dumps(record, separators=(',', ':')) + '\n')
+            self._records.append(record)
+        return record
+
+    def apply_pending_to_cache(self):
+        """
+        Re-applies movements from a previous session to a freshly loaded cache.
+        Movements already in MySQL (committed before the crash, not yet marked
+        done) are in the loaded cache; they are marked done instead.
+        """
+        committed = None
+        conn = inventory_data.get_db_connection(quiet=True) if self._records else None
+        if conn is not None:
+            cursor = conn.cursor()
+            try:
+                committed = _committed_ids(cursor, [r['id'] for r in self._records])
+            except mysql.connector.Error:
+                committed = None  # No ledger yet, or dropped: the replayer sorts it out
+            finally:
+                cursor.close()
+                if conn.is_connected():
+                    conn.close()
+        if committed:
+            self.mark_applied(sorted(committed))
+
+        with self._lock:
+            for record in self._records:
+                if committed is None:
+                    self._unchecked_ids.add(record['id'])
+                try:
+                    inventory_data.INVENTORY_CACHE.adjust_location_quantity(record['part'], _location(record),
+                                                                            record['delta'])
+                except KeyError:
+                    pass  # Part not cached; the replay will report it as a conflict
+
+    # --- Replay Bookkeeping ---
+
+    def applied_unchecked(self, record_id):
+        """True if the record was applied to the cache at startup without checking MySQL."""
+        return record_id in self._unchecked_ids
+
+    def next_batch(self, limit):
+        with self._lock:
+            return list(self._records[:limit])
+
+    def mark_applied(self, record_ids):
+        """Records replayed IDs durably, then compacts the files once nothing is left."""
+        ids = set(record_ids)
+        with self._lock:
+            _fsync_write(self._done_file, ''.join(f"{i}\n" for i in record_ids))
+            self._records = [r for r in self._records if r['id'] not in ids]
+            if not self._records:
+                # Everything is in MySQL: start both files afresh
+                self._file.truncate(0)
+                self._done_file.truncate(0)
+                os.fsync(self._file.fileno())
+                os.fsync(self._done_file.fileno())
+
+    def record_conflict(self, record, reason):
+        entry = dict(record, reason=reason, detected=time.time())
+        with open(self.conflict_path, 'a', encoding='utf-8') as f:
+            _fsync_write(f, json.dumps(entry) + '\n')
+
+
+class JournalReplayer(threading.Thread):
+    def __init__(self, journal, retry_interval=5.0, batch_size=DEFAULT_BATCH_SIZE):
+        super().__init__(name='journal-replayer', daemon=True)
+        self.journal = journal
+        self.retry_interval = retry_interval
+        self.batch_size = batch_size
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self.stats = {'replayed': 0, 'conflicts': 0, 'batches': 0}
+        # (part, location) keys whose drift was already applied in this replay.
+        # Only the first batch holding a key sees the DB before any replayed
+        # record; later batches' base_qty never included the drift.
+        self._drift_checked = set()
+
+    def wake(self):
+        self._wake.set()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def run(self):
+        while not self._stop.is_set():
+            if self.journal.has_pending():
+                try:
+                    self.replay_pending()
+                except mysql.connector.Error:
+                    pass  # Still offline (or dropped mid-replay); try again later
+            self._wake.wait(self.retry_interval)
+            self._wake.clear()
+
+    def replay_pending(self):
+        """Pushes journaled movements to MySQL, one batch per transaction."""
+        while self.journal.has_pending() and not self._stop.is_set():
+            batch = self.journal.next_batch(self.batch_size)
+            conn = inventory_data.get_db_connection(quiet=True)
+            if conn is None:
+                return
+            try:
+                self._replay_batch(conn, batch)
+            finally:
+                if conn.is_connected():
+                    conn.close()
+        if not self.journal.has_pending():
+            # Journal drained: the next offline period starts from fresh base quantities
+            self._drift_checked.clear()
+
+    def _replay_batch(self, conn, batch):
+        cursor = conn.cursor()
+        try:
+            inventory_data._ensure_schema(cursor)
+            already_applied = _committed_ids(cursor, [r['id'] for r in batch])
+
+            parts = sorted({r['part'] for r in batch})
+            marks = ', '.join(['%s'] * len(parts))
+            # Lock the rows so nobody moves these parts while the batch is checked and applied
+            cursor.execute(f"SELECT PartNumber FROM inventory WHERE PartNumber IN ({marks}) FOR UPDATE", parts)
+            existing = {row[0] for row in cursor.fetchall()}
+            cursor.execute(f"SELECT PartNumber, LocationCode, Quantity FROM stock_locations "
+                           f"WHERE PartNumber IN ({marks}) FOR UPDATE", parts)
+            db_qty = {(row[0], row[1]): int(row[2]) for row in cursor.fetchall()}
+
+            deltas, ledger_rows, conflicts, drift = {}, [], [], {}
+            first_base = {}
+            for record in batch:
+                part_num, location = record['part'], _location(record)
+                key = (part_num, location)
+                if record['id'] in already_applied:
+                    continue
+                if part_num not in existing:
+                    conflicts.append((record, "Part no longer exists in the database"))
+                    continue
+
+                if record.get('loc') and key not in self._drift_checked:
+                    first_base.setdefault(key, record['base_qty'])
+                projected = db_qty.get(key, 0) + deltas.get(key, 0) + record['delta']
+                if projected < 0:
+                    conflicts.append((record, f"Issue would leave negative stock ({projected}) at {location} in the database"))
+                    continue
+
+                deltas[key] = deltas.get(key, 0) + record['delta']
+                ledger_rows.append((part_num, record['delta'], record['type'], location, record['ts'], record['id']))
+
+            # Locations changed by other stations since we went offline
+            for key, base in first_base.items():
+                if db_qty.get(key, 0) != base:
+                    drift[key] = db_qty.get(key, 0) - base
+
+            if ledger_rows:
+                movements = [(p, d, t, loc) for p, d, t, loc, _, _ in ledger_rows]
+                # Same statements as a live movement, except the ledger rows also carry the JournalID
+                for sql, params in inventory_data._movement_statements(movements):
+                    if sql == inventory_data.LEDGER_INSERT_SQL:
+                        sql, params = REPLAY_LEDGER_SQL, ledger_rows
+                    cursor.executemany(sql, params)
+            conn.commit()
+        except mysql.connector.Error:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+        # Committed: bookkeeping and cache corrections
+        for record in batch:
+            if record['id'] in already_applied and self.journal.applied_unchecked(record['id']):
+                # In MySQL before the restart, so the loaded cache had it and startup added it again
+                try:
+                    inventory_data.INVENTORY_CACHE.adjust_location_quantity(record['part'], _location(record),
+                                                                            -record['delta'])
+                except KeyError:
+                    pass
+        for record, reason in conflicts:
+            self.journal.record_conflict(record, reason)
+            try:
+                inventory_data.INVENTORY_CACHE.adjust_location_quantity(record['part'], _location(record), -record['delta'])
+            except KeyError:
+                pass
+            inventory_data._report('warning', "Offline Sync Conflict",
+                                   f"Movement of {record['delta']:+d} for {record['part']} was not applied: {reason}.")
+        self._drift_checked.update(first_base)
+        if inventory_data._CHANGE_FEED is not None:
+            drift = {}  # The change feed applies other stations' movements itself
+        for (part_num, location), difference in drift.items():
+            try:
+                inventory_data.INVENTORY_CACHE.adjust_location_quantity(part_num, location, difference)
+            except KeyError:
+                pass
+
+        self.journal.mark_applied([r['id'] for r in batch])
+        self.stats['batches'] += 1
+        self.stats['replayed'] += len(ledger_rows)
+        self.stats['conflicts'] += len(conflicts)
@@ -0,0 +1,203 @@
+# -------------------------------------------#
+# perf_metrics.py - Lightweight timing for the hot paths
+#
+# Usage:
+#   @perf_metrics.timed('db.connect')
+#   def get_db_connection(): ...
+#
+#   with perf_metrics.measure('cache.update'):
+#       ...
+#
+# Timings go into fixed log-scale histograms (4 buckets per doubling, 1 us to
+# ~2 min), so recording is O(1) and memory does not grow with the number of
+# calls. Disabled by default: a timed function then costs one extra call and
+# a flag check. Turn on with INVENTORY_PERF=1 or perf_metrics.enable().
+# -------------------------------------------#
+
+import functools
+import json
+import math
+import os
+import threading
+import time
+
+BUCKETS_PER_DOUBLING = 4
+MIN_SECONDS = 1e-6
+BUCKET_COUNT = 27 * BUCKETS_PER_DOUBLING  # 1 us * 2**27 ~ 134 s; slower calls land in the last bucket
+
+_enabled = os.environ.get('INVENTORY_PERF', '0') == '1'
+_lock = threading.Lock()
+_histograms = {}
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled():
+    return _enabled
+
+
+# --- Histogram ---
+
+def _bucket_index(seconds):
+    """Maps a duration onto its log-scale bucket (bucket 0 holds everything below 1 us)."""
+    if seconds <= MIN_SECONDS:
+        return 0
+    mantissa, exponent = math.frexp(seconds / MIN_SECONDS)  # value = mantissa * 2**exponent, 0.5 <= mantissa < 1
+    index = (exponent - 1) * BUCKETS_PER_DOUBLING + int((mantissa - 0.5) * 2 * BUCKETS_PER_DOUBLING) + 1
+    return min(index, BUCKET_COUNT - 1)
+
+
+def bucket_upper_bound(index):
+    """Upper edge of a bucket in seconds."""
+    if index == 0:
+        return MIN_SECONDS
+    doublings, step = divmod(index - 1, BUCKETS_PER_DOUBLING)
+    return MIN_SECONDS * 2 ** doublings * (1 + (step + 1) / BUCKETS_PER_DOUBLING)
+
+
+class Histogram:
+    def __init__(self):
+        self.buckets = [0] * BUCKET_COUNT
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.buckets[_bucket_index(seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, pct):
+        """Upper bound of the bucket holding the pct-th percentile (never above max)."""
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(pct / 100.0 * self.count))
+        seen = 0
+        for index, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank:
+                return min(bucket_upper_bound(index), self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'mean_ms': round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            'p50_ms': round(self.percentile(50) * 1000, 3),
+            'p95_ms': round(self.percentile(95) * 1000, 3),
+            'p99_ms': round(self.percentile(99) * 1000, 3),
+            'max_ms': round(self.max * 1000, 3),
+        }
+
+
+# --- Recording ---
+
+def record(name, seconds):
+    """Adds one timing (in seconds) to the histogram called name."""
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = Histogram()
+        histogram.add(seconds)
+
+
+def timed(name):
+    """Decorator: records the wall time of every call while timing is enabled."""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(name, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+class _Timer:
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _NoTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NO_TIMER = _NoTimer()
+
+
+def measure(name):
+    """Context manager that records the time spent in its block (no-op while disabled)."""
+    return _Timer(name) if _enabled else _NO_TIMER
+
+
+def measure_redraw(widget, name):
+    """
+    Records how long Tk takes to process the pending redraws of a window, by
+    flushing them with update_idletasks(). Does nothing while timing is disabled.
+    """
+    if _enabled:
+        with _Timer(name):
+            widget.update_idletasks()
+
+
+# --- Reporting ---
+
+def snapshot():
+    """Returns {operation: {count, mean_ms, p50_ms, p95_ms, p99_ms, max_ms}}, sorted by name."""
+    with _lock:
+        return {name: _histograms[name].summary() for name in sorted(_histograms)}
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+
+
+def dump(path):
+    """Writes the summaries and the raw (non-empty) buckets of every histogram as JSON."""
+    with _lock:
+        data = {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'buckets_per_doubling': BUCKETS_PER_DOUBLING,
+            'operations': {
+                name: dict(
+                    hist.summary(),
+                    buckets=[{'le_ms': round(bucket_upper_bound(i) * 1000, 6), 'count': n}
+                             for i, n in enumerate(hist.buckets) if n],
+                )
+                for name, hist in sorted(_histograms.items())
+            },
+        }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2)
+    return path
@@ -0,0 +1,110 @@
+# -------------------------------------------#
+# perf_panel.py - Diagnostics window for the perf_metrics timings
+# Opened from the main window with F12. Shows p50/p95/p99 per operation,
+# refreshed every second while the window is open.
+# -------------------------------------------#
+
+import tkinter as tk
+from tkinter import Toplevel, Label, Button, Frame, Checkbutton, messagebox, filedialog, ttk
+
+import perf_metrics
+
+REFRESH_MS = 1000
+COLUMNS = ('count', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms', 'mean_ms')
+HEADINGS = ('Calls', 'p50 (ms)', 'p95 (ms)', 'p99 (ms)', 'Max (ms)', 'Mean (ms)')
+
+
+class PerformancePanel:
+    def __init__(self, master_root):
+        self.master_root = master_root
+        self.window = None
+        self.tree = None
+        self.enabled_var = None
+        self._after_id = None
+
+    def open_window(self):
+        """Opens the panel (or brings the open one to the front)."""
+        if self.window is not None and self.window.winfo_exists():
+            self.window.deiconify()
+            self.window.lift()
+            return
+
+        self.window = Toplevel(self.master_root)
+        self.window.title("Performance Diagnostics")
+        self.window.geometry("720x420")
+        self.window.config(bg="white")
+        self.window.columnconfigure(0, weight=1)
+        self.window.rowconfigure(1, weight=1)
+
+        Label(self.window, text="Performance Diagnostics", font=("Arial", 16, "bold"),
+              bg="white", fg="#004d99").grid(row=0, column=0, pady=10)
+
+        # Operations table
+        self.tree = ttk.Treeview(self.window, columns=COLUMNS, show='tree headings')
+        self.tree.heading('#0', text="Operation")
+        self.tree.column('#0', width=200, anchor='w')
+        for column, heading in zip(COLUMNS, HEADINGS):
+            self.tree.heading(column, text=heading)
+            self.tree.column(column, width=80, anchor='e')
+        self.tree.grid(row=1, column=0, sticky="nsew", padx=10)
+
+        # Controls
+        control_frame = Frame(self.window, bg="white")
+        control_frame.grid(row=2, column=0, sticky="ew", padx=10, pady=10)
+
+        self.enabled_var = tk.BooleanVar(value=perf_metrics.is_enabled())
+        Checkbutton(control_frame, text="Record timings", variable=self.enabled_var,
+                    command=self._toggle_recording, bg="white").pack(side="left")
+        Button(control_frame, text="Close", command=self.close_window,
+               bg="#cccccc", font=("Arial", 10)).pack(side="right", padx=5)
+        Button(control_frame, text="Save to File...", command=self._save_to_file,
+               bg="#cccccc", font=("Arial", 10)).pack(side="right", padx=5)
+        Button(control_frame, text="Reset", command=self._reset,
+               bg="#cccccc", font=("Arial", 10)).pack(side="right", padx=5)
+
+        self.window.protocol("WM_DELETE_WINDOW", self.close_window)
+        self._refresh()
+
+    def close_window(self):
+        if self._after_id is not None:
+            self.window.after_cancel(self._after_id)
+            self._after_id = None
+        self.window.destroy()
+        self.window = None
+
+    def _refresh(self):
+        """Redraws the table from the current histograms and schedules the next refresh."""
+        rows = perf_metrics.snapshot()
+        existing = set(self.tree.get_children())
+        for name, summary in rows.items():
+            values = tuple(summary[column] for column in COLUMNS)
+            if name in existing:
+                self.tree.item(name, values=values)
+            else:
+                self.tree.insert('', 'end', iid=name, text=name, values=values)
+        for stale in existing - set(rows):
+            self.tree.delete(stale)
+        self._after_id = self.window.after(REFRESH_MS, self._refresh)
+
+    def _toggle_recording(self):
+        if self.enabled_var.get():
+            perf_metrics.enable()
+        else:
+            perf_metrics.disable()
+
+    def _reset(self):
+        perf_metrics.reset()
+        self.tree.delete(*self.tree.get_children())
+
+    def _save_to_file(self):
+        path = filedialog.asksaveasfilename(
+            parent=self.window, title="Save Timing Histograms",
+            defaultextension=".json", filetypes=[("JSON files", "*.json")]
+        )
+        if not path:
+            return
+        try:
+            perf_metrics.dump(path)
+            messagebox.showinfo("Saved", f"Histograms saved to:\n{path}", parent=self.window)
+        except OSError as e:
+            messagebox.showerror("Save Error", f"Could not save the histograms: {e}", parent=self.window)
@@ -0,0 +1,217 @@
+# -------------------------------------------#
+# price_update.py - Bulk price changes (percentage or absolute)
+#
+# Selects parts by number prefix, supplier and/or description text on the
+# in-memory cache, computes the new prices for all of them in one vectorized
+# pass, and applies them in one transaction:
+#   - the rows are locked and the new prices are computed from the locked
+#     prices (a price changed on another workstation is not overwritten with
+#     one computed from a stale cached price)
+#   - one batched CASE UPDATE per SELECT_CHUNK parts (RowVersion + 1, so open
+#     edit screens see the change as a conflict instead of overwriting it)
+#   - one price_history row per changed part, sharing a BatchID
+#   - one change-feed row per part, so other workstations re-read the price
+# The cache is then patched in place with update_prices (no reload).
+#
+# Usage:
+#   preview_price_update(supplier='ACME', mode='percent', amount=3.5)   # DataFrame, no DB
+#   apply_price_update(prefix='P-10', mode='absolute', amount=-0.05, reason='Q3 price list')
+#   apply_price_update(all_parts=True, mode='percent', amount=2)        # whole catalogue
+# At least one filter or all_parts=True is required, so a forgotten filter
+# cannot reprice the whole catalogue.
+# -------------------------------------------#
+
+import uuid
+
+import numpy as np
+import pandas as pd
+
+import inventory_data
+import perf_metrics
+import query_log
+
+MODE_PERCENT = 'percent'
+MODE_ABSOLUTE = 'absolute'
+MODES = (MODE_PERCENT, MODE_ABSOLUTE)
+
+# Largest value of the DECIMAL(10, 2) UnitPrice column
+MAX_PRICE = 99999999.99
+# Parts per locking SELECT and per CASE UPDATE statement
+SELECT_CHUNK = 1000
+# Offending parts listed in an error message
+MAX_PARTS_SHOWN = 5
+
+PREVIEW_COLUMNS = ['Description', 'Supplier', 'OldPrice', 'NewPrice', 'Change']
+
+
+def _parse_change(mode, amount):
+    """Returns (mode, amount as float, None) or (None, None, error message)."""
+    if mode not in MODES:
+        return None, None, f"Error: Price change must be one of: {', '.join(MODES)}."
+    try:
+        amount = float(str(amount).replace('$', '').replace('%', '').replace(',', '').strip())
+    except ValueError:
+        return None, None, "Error: Price change must be a valid number (e.g., 3.5 or -0.20)."
+    if not np.isfinite(amount) or amount == 0:
+        return None, None, "Error: Price change must be a non-zero number."
+    if mode == MODE_PERCENT and amount <= -100:
+        return None, None, "Error: A percentage decrease must be less than 100%."
+    return mode, amount, None
+
+
+def new_prices(old_prices, mode, amount):
+    """Vectorized: the new prices (rounded to cents) for an array of old prices."""
+    old_prices = np.asarray(old_prices, dtype=np.float64)
+    if mode == MODE_PERCENT:
+        return np.round(old_prices * (1.0 + amount / 100.0), 2)
+    return np.round(old_prices + amount, 2)
+
+
+def _price_error(parts, prices):
+    """Error message if any new price is negative or too large for the column, else None."""
+    for mask, what in ((prices < 0, "a negative price"), (prices > MAX_PRICE, "a price above the maximum")):
+        if mask.any():
+            bad = [f"{part} (${price:,.2f})" for part, price in zip(parts[mask][:MAX_PARTS_SHOWN], prices[mask])]
+            more = int(mask.sum()) - len(bad)
+            return (f"Error: {int(mask.sum())} part(s) would get {what}: " + ", ".join(bad)
+                    + (f" and {more} more" if more > 0 else ""))
+    return None
+
+
+def _selection_error(prefix, supplier, description, all_parts):
+    """Error message if no filter is given and the whole catalogue was not asked for, else None."""
+    if all_parts or any(str(value or '').strip() for value in (prefix, supplier, description)):
+        return None
+    return "Error: Give a part number prefix, supplier or description filter (or select all parts)."
+
+
+def select_parts(prefix='', supplier='', description=''):
+    """
+    Cached parts matching every given filter: part number prefix, supplier
+    (case-insensitive, exact) and text in the description (case-insensitive).
+    Returns a DataFrame indexed by PartNumber with Description, Supplier and UnitPrice.
+    """
+    cache = inventory_data.INVENTORY_CACHE
+    frame = cache.to_frame()
+    suppliers = cache.suppliers()
+    mask = np.ones(len(frame), dtype=bool)
+    if prefix:
+        mask &= frame.index.str.startswith(prefix).to_numpy(dtype=bool)
+    if supplier:
+        # Compared on the (few) distinct supplier names, then mapped through the codes
+        matches = suppliers.cat.categories.str.lower() == supplier.strip().lower()
+        mask &= matches[suppliers.cat.codes.to_numpy()]
+    if description:
+        # Same trick for descriptions: each distinct text is searched once
+        descriptions = frame['Description']
+        matches = descriptions.cat.categories.str.contains(description.strip(), case=False, regex=False)
+        mask &= np.asarray(matches, dtype=bool)[descriptions.cat.codes.to_numpy()]
+    return pd.DataFrame({
+        'Description': frame['Description'].to_numpy()[mask],
+        'Supplier': suppliers.to_numpy()[mask],
+        'UnitPrice': frame['UnitPrice'].to_numpy()[mask],
+    }, index=frame.index[mask])
+
+
+def preview_price_update(prefix='', supplier='', description='', mode=MODE_PERCENT, amount=0, all_parts=False):
+    """
+    The price change computed on the cache (no database access), as a DataFrame
+    indexed by PartNumber with PREVIEW_COLUMNS. Raises ValueError for a bad change
+    or a missing selection.
+    """
+    mode, amount, error = _parse_change(mode, amount)
+    error = error or _selection_error(prefix, supplier, description, all_parts)
+    if error:
+        raise ValueError(error)
+    parts = select_parts(prefix, supplier, description)
+    old = parts['UnitPrice'].to_numpy(dtype=np.float64)
+    new = new_prices(old, mode, amount)
+    return pd.DataFrame({
+        'Description': parts['Description'].to_numpy(),
+        'Supplier': parts['Supplier'].to_numpy(),
+        'OldPrice': old,
+        'NewPrice': new,
+        'Change': np.round(new - old, 2),
+    }, index=parts.index, columns=PREVIEW_COLUMNS)
+
+
+def _case_update_sql(count, bump_version):
+    """One UPDATE that sets a different price on each of `count` parts."""
+    cases = ' '.join(['WHEN %s THEN %s'] * count)
+    version = ", RowVersion = RowVersion + 1" if bump_version else ""
+    marks = ', '.join(['%s'] * count)
+    return f"UPDATE inventory SET UnitPrice = CASE PartNumber {cases} END{version} WHERE PartNumber IN ({marks})"
+
+
+@perf_metrics.timed('price.bulk_update')
+def apply_price_update(prefix='', supplier='', description='', mode=MODE_PERCENT, amount=0, reason='',
+                       all_parts=False):
+    """
+    Changes the price of every matching part in one transaction and records the
+    price history. Nothing is changed if any new price would be invalid.
+    Without a filter, all_parts=True is needed to change the whole catalogue.
+    """
+    mode, amount, error = _parse_change(mode, amount)
+    error = error or _selection_error(prefix, supplier, description, all_parts)
+    if error:
+        return error
+    if not inventory_data._HAS_PRICING:
+        return "Error: Bulk price updates need the price_history table. Please upgrade the database schema."
+    parts = sorted(select_parts(prefix, supplier, description).index.astype(str))
+    if not parts:
+        return "Error: No parts match the selection."
+    reason = str(reason or '').strip()[:128]
+    batch_id = uuid.uuid4().hex
+    has_version = bool(inventory_data._HAS_VERSION_COLUMN)
+    applied = {}
+
+    def work(cursor):
+        # 1. Lock the rows (PartNumber order) and read the prices the change is based on
+        columns = "PartNumber, UnitPrice" + (", RowVersion" if has_version else "")
+        locked = []
+        for start in range(0, len(parts), SELECT_CHUNK):
+            chunk = parts[start:start + SELECT_CHUNK]
+            query_log.execute(cursor, f"SELECT {columns} FROM inventory WHERE PartNumber IN "
+                                      f"({', '.join(['%s'] * len(chunk))}) ORDER BY PartNumber FOR UPDATE", chunk)
+            locked.extend(cursor.fetchall())
+        if not locked:
+            return "Error: No parts match the selection."
+
+        # 2. New prices for all rows in one vectorized pass
+        part_nums = np.array([row[0] for row in locked], dtype=object)
+        old = np.array([float(row[1]) for row in locked], dtype=np.float64)
+        new = new_prices(old, mode, amount)
+        error = _price_error(part_nums, new)
+        if error:
+            return error
+        changed = new != old
+        part_nums, old, new = part_nums[changed], old[changed], new[changed]
+        if not len(part_nums):
+            return "Error: The change does not alter any price (it rounds to zero)."
+        versions = np.array([int(row[2]) for row in locked], dtype=np.int64)[changed] + 1 if has_version else None
+
+        # 3. Batched CASE UPDATEs, history and change-feed rows
+        for start in range(0, len(part_nums), SELECT_CHUNK):
+            chunk_parts = part_nums[start:start + SELECT_CHUNK].tolist()
+            chunk_prices = new[start:start + SELECT_CHUNK].tolist()
+            params = [value for pair in zip(chunk_parts, chunk_prices) for value in pair] + chunk_parts
+            query_log.execute(cursor, _case_update_sql(len(chunk_parts), has_version), params)
+        query_log.executemany(cursor, inventory_data.PRICE_HISTORY_SQL,
+                              [(part, o, n, batch_id, reason) for part, o, n in zip(part_nums.tolist(), old.tolist(), new.tolist())])
+        query_log.executemany(cursor, inventory_data.CHANGE_INSERT_SQL,
+                              [inventory_data._change_row(part, inventory_data.CHANGE_UPDATE) for part in part_nums.tolist()])
+
+        applied.update(parts=part_nums, old=old, new=new, versions=versions)
+        return None
+
+    error = inventory_data._run_transaction(work)
+    if error:
+        return error
+
+    # 4. Patch the cache in place (one vectorized assignment)
+    with perf_metrics.measure('cache.update'):
+        inventory_data.INVENTORY_CACHE.update_prices(applied['parts'], applied['new'], applied['versions'])
+    skipped = len(parts) - len(applied['parts'])
+    note = f", {skipped:,} unchanged or deleted" if skipped else ""
+    return f"Price Update Successful. {len(applied['parts']):,} part(s) changed{note} (batch {batch_id})."
+
@@ -0,0 +1,246 @@
+# -------------------------------------------#
+# query_log.py - Structured SQL statement log with slow-query plan capture
+#
+# Once configure() has been called, every statement run through execute() /
+# executemany() is written as one JSON line to a rotating log file:
+#   {"ts", "event": "statement", "sql_id", "sql", "params_fp", "param_rows",
+#    "duration_ms", "rows", "slow", "error"}
+# sql_id identifies the statement text (whitespace-normalised); params_fp is a
+# short hash of the parameter values, so repeated calls can be correlated
+# without writing part numbers or prices to the log.
+#
+# Statements slower than the threshold get their EXPLAIN plan captured on a
+# separate connection by a background thread (at most once per sql_id every
+# EXPLAIN_COOLDOWN seconds), logged as {"event": "explain", "sql_id", "plan"}.
+#
+# Check which index the hot-path statements use on a given database:
+#   python query_log.py --check
+# -------------------------------------------#
+
+import argparse
+import hashlib
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import re
+import sys
+import threading
+import time
+
+DEFAULT_PATH = 'query_log.jsonl'
+DEFAULT_SLOW_MS = 100.0
+DEFAULT_MAX_BYTES = 5 * 1024 * 1024
+DEFAULT_BACKUP_COUNT = 5
+EXPLAIN_COOLDOWN = 300.0
+
+# Statement types MySQL can EXPLAIN
+_EXPLAINABLE = ('SELECT', 'UPDATE', 'DELETE', 'INSERT', 'REPLACE')
+
+_logger = logging.getLogger('inventory.sql')
+_enabled = False
+_slow_seconds = DEFAULT_SLOW_MS / 1000.0
+_explain_queue = None
+_last_explained = {}
+
+
+def configure(path=DEFAULT_PATH, slow_ms=DEFAULT_SLOW_MS, max_bytes=DEFAULT_MAX_BYTES,
+              backup_count=DEFAULT_BACKUP_COUNT, explain=True):
+    """
+    Starts logging statements to a rotating JSON-lines file.
+    slow_ms: statements at or above this duration are flagged slow (and EXPLAINed
+    if explain=True). The INVENTORY_SLOW_MS environment variable overrides it.
+    """
+    global _enabled, _slow_seconds, _explain_queue
+    handler = logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes,
+                                                   backupCount=backup_count, encoding='utf-8')
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    for old in list(_logger.handlers):
+        _logger.removeHandler(old)
+        old.close()
+    _logger.addHandler(handler)
+    _logger.setLevel(logging.INFO)
+    _logger.propagate = False
+
+    _slow_seconds = float(os.environ.get('INVENTORY_SLOW_MS', slow_ms)) / 1000.0
+    if explain and _explain_queue is None:
+        _explain_queue = queue.Queue(maxsize=100)
+        threading.Thread(target=_explain_worker, name='query-explain', daemon=True).start()
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+# --- Fingerprints ---
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_sql(sql):
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+def _short_hash(text):
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()[:12]
+
+
+def params_fingerprint(params):
+    return _short_hash(repr(params)) if params else None
+
+
+# --- Statement Logging ---
+
+def log_statement(sql, params, seconds, rows=None, error=None, param_rows=1):
+    """Writes one statement record (used directly for statements not run through execute())."""
+    if not _enabled:
+        return
+    text = normalize_sql(sql)
+    slow = seconds >= _slow_seconds
+    record = {
+        'ts': round(time.time(), 6),
+        'event': 'statement',
+        'sql_id': _short_hash(text),
+        'sql': text,
+        'params_fp': params_fingerprint(params),
+        'param_rows': param_rows,
+        'duration_ms': round(seconds * 1000, 3),
+        'rows': rows,
+        'slow': slow,
+        'error': error,
+    }
+    _logger.info(json.dumps(record, default=str))
+    if slow and error is None:
+        _queue_explain(record['sql_id'], sql, params)
+
+
+def _run(cursor, method, sql, params, param_rows):
+    start = time.perf_counter()
+    try:
+        method(sql, params)
+    except Exception as err:
+        error = f"{getattr(err, 'errno', '')} {getattr(err, 'msg', err)}".strip()
+        log_statement(sql, params, time.perf_counter() - start, error=error, param_rows=param_rows)
+        raise
+    log_statement(sql, params, time.perf_counter() - start, rows=cursor.rowcount, param_rows=param_rows)
+
+
+def execute(cursor, sql, params=None):
+    """cursor.execute(sql, params), logged when the query log is configured."""
+    if not _enabled:
+        cursor.execute(sql, params or ())
+        return
+    _run(cursor, cursor.execute, sql, params or (), 1)
+
+
+def executemany(cursor, sql, seq_params):
+    """cursor.executemany(sql, seq_params), logged as one record (params_fp of the whole batch)."""
+    if not _enabled:
+        cursor.executemany(sql, seq_params)
+        return
+    seq_params = list(seq_params)
+    _run(cursor, cursor.executemany, sql, seq_params, len(seq_params))
+
+
+# --- EXPLAIN Capture ---
+
+def _queue_explain(sql_id, sql, params):
+    if _explain_queue is None or not normalize_sql(sql).upper().startswith(_EXPLAINABLE):
+        return
+    now = time.monotonic()
+    if now - _last_explained.get(sql_id, -EXPLAIN_COOLDOWN) < EXPLAIN_COOLDOWN:
+        return
+    _last_explained[sql_id] = now
+    # executemany batches are explained with their first row
+    if isinstance(params, list):
+        params = params[0] if params else ()
+    try:
+        _explain_queue.put_nowait((sql_id, sql, params))
+    except queue.Full:
+        pass
+
+
+def explain(conn, sql, params=()):
+    """Returns the EXPLAIN output for one statement as a list of row dicts."""
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute("EXPLAIN " + sql, params or ())
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+
+
+def _explain_worker():
+    # Own connection (not from the pool): the plan never interferes with the
+    # transaction that was slow
+    import mysql.connector
+    import inventory_data
+    conn = None
+    while True:
+        sql_id, sql, params = _explain_queue.get()
+        try:
+            if conn is None or not conn.is_connected():
+                conn = mysql.connector.connect(**inventory_data.DB_CONFIG)
+            plan = explain(conn, sql, params)
+            conn.rollback()
+            _logger.info(json.dumps({'ts': round(time.time(), 6), 'event': 'explain',
+                                     'sql_id': sql_id, 'plan': plan}, default=str))
+        except Exception as err:
+            _logger.info(json.dumps({'ts': round(time.time(), 6), 'event': 'explain',
+                                     'sql_id': sql_id, 'error': str(err)}))
+            conn = None
+
+
+# --- Index Check ---
+
+def check_hot_paths():
+    """Prints the access type and key MySQL picks for the hot-path statements."""
+    os.environ.setdefault('INVENTORY_AUTOLOAD', '0')
+    import inventory_data
+
+    conn = inventory_data.get_db_connection()
+    if conn is None:
+        return 2
+    cursor = conn.cursor()
+    cursor.execute("SELECT PartNumber FROM inventory LIMIT 1")
+    row = cursor.fetchone()
+    cursor.close()
+    sample = row[0] if row else 'SAMPLE'
+
+    statements = [
+        ("part lookup", "SELECT Description, UnitPrice, Quantity, ImagePath FROM inventory WHERE PartNumber = %s", (sample,)),
+        ("part update", "UPDATE inventory SET Description = Description WHERE PartNumber = %s", (sample,)),
+        ("stock delta", inventory_data.STOCK_DELTA_SQL, (0, sample)),
+        ("part delete", "DELETE FROM inventory WHERE PartNumber = %s", (sample,)),
+    ]
+    status = 0
+    try:
+        for label, sql, params in statements:
+            for step in explain(conn, sql, params):
+                key = step.get('key')
+                print(f"{label:<12} table={step.get('table')} type={step.get('type')} "
+                      f"key={key} rows={step.get('rows')}")
+                if key != 'PRIMARY':
+                    status = 1
+        conn.rollback()
+    finally:
+        conn.close()
+    return status
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="SQL query log tools.")
+    parser.add_argument('--check', action='store_true',
+                        help="EXPLAIN the hot-path statements and report whether they use the primary key.")
+    args = parser.parse_args(argv)
+    if args.check:
+        return check_hot_paths()
+    parser.print_help()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
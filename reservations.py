@@ -0,0 +1,305 @@
+# -------------------------------------------#
+# reservations.py - Stock reserved for work orders, and available-to-promise
+#
+# A reservation holds units of a part for one work order, so neither another
+# job nor a plain issue can take them. inventory.ReservedQty is the sum of a
+# part's open reservations; it changes by delta in the same transaction as the
+# reservation rows and the cache keeps a copy, so
+#     available to promise = Quantity - Reserved
+# is two array reads per part and a whole kit is checked in one vectorized pass.
+#
+# Usage:
+#   reserve('WO-1042', 'P-1001', 10)            # fails if 10 are not available to promise
+#   reserve_kit('WO-1042', {'P-1001': 10, 'P-1002': 4})   # all lines or none
+#   consume('WO-1042', 'P-1001', 6, 'MAIN')     # issue reserved units to the work order
+#   release('WO-1042')                          # give back whatever is still reserved
+#   check_kit({'P-1001': 10, 'P-1002': 4})      # DataFrame with the shortfall per line
+#
+# Reserving checks the DB as well as the cache (a conditional UPDATE), and so
+# does a plain issue (inventory_data.ISSUE_STOCK_SQL: only unreserved units), so
+# two workstations can never promise, or promise and issue, the same units.
+# -------------------------------------------#
+
+import numpy as np
+import pandas as pd
+import mysql.connector
+
+import inventory_data
+import perf_metrics
+import query_log
+
+# Only succeeds while the part still has the units available to promise
+RESERVE_SQL = """
+    UPDATE inventory SET ReservedQty = ReservedQty + %s
+    WHERE PartNumber = %s AND Quantity - ReservedQty >= %s
+"""
+RESERVED_DELTA_SQL = "UPDATE inventory SET ReservedQty = ReservedQty + %s WHERE PartNumber = %s"
+# Writers lock the inventory row before the reservations rows (reserve_kit's RESERVE_SQL
+# does), so a reserve and a consume of the same part cannot deadlock each other
+LOCK_PART_SQL = "SELECT PartNumber FROM inventory WHERE PartNumber = %s FOR UPDATE"
+OPEN_RESERVATION_SQL = """
+    SELECT ReservationID, PartNumber, Quantity FROM reservations
+    WHERE WorkOrder = %s AND PartNumber = %s AND Status = 'OPEN'
+    FOR UPDATE
+"""
+# MySQL applies single-table SET assignments left to right, so Status sees the new Quantity
+CONSUME_SQL = """
+    UPDATE reservations
+    SET Quantity = Quantity - %s,
+        Status = IF(Quantity = 0, 'CONSUMED', 'OPEN'),
+        ClosedAt = IF(Quantity = 0, NOW(6), NULL)
+    WHERE ReservationID = %s
+"""
+
+# Shortages listed in a failed kit reservation message
+MAX_SHORTAGES_SHOWN = 5
+
+
+# --- Kit Availability ---
+
+def _kit_frame(kit):
+    """
+    Normalises a kit ({part: qty}, [(part, qty), ...] or a DataFrame with
+    PartNumber and Quantity columns) into a Series of required units per part.
+    Repeated parts are added up. Raises ValueError for a non-positive or
+    non-numeric quantity.
+    """
+    if isinstance(kit, pd.DataFrame):
+        lines = pd.DataFrame({'PartNumber': kit['PartNumber'], 'Required': kit['Quantity']})
+    else:
+        items = kit.items() if isinstance(kit, dict) else kit
+        lines = pd.DataFrame(list(items), columns=['PartNumber', 'Required'])
+
+    lines['PartNumber'] = lines['PartNumber'].astype(str).str.strip()
+    required = pd.to_numeric(lines['Required'], errors='coerce')
+    whole = required.notna() & (required > 0) & (required == required.round())
+    if not whole.all():
+        bad = lines.loc[~whole].iloc[0]
+        raise ValueError(f"Quantity for {bad['PartNumber']} must be a positive whole number.")
+    lines['Required'] = required.astype(np.int64)
+    return lines.groupby('PartNumber', sort=True)['Required'].sum()
+
+
+@perf_metrics.timed('reservation.check_kit')
+def check_kit(kit):
+    """
+    Checks every line of a kit against available-to-promise in one vectorized pass.
+    Returns a DataFrame indexed by PartNumber with Required, Available, Shortfall
+    and Known (False for parts not in inventory; their whole quantity is short).
+    """
+    required = _kit_frame(kit)
+    available, known = inventory_data.INVENTORY_CACHE.available_many(required.index.tolist())
+    needed = required.to_numpy(dtype=np.int64)
+    shortfall = np.where(known, np.maximum(needed - np.maximum(available, 0), 0), needed)
+    return pd.DataFrame(
+        {'Required': needed, 'Available': available, 'Shortfall': shortfall, 'Known': known},
+        index=required.index,
+    )
+
+
+def kit_available(kit):
+    """True if every line of the kit can be promised right now."""
+    return not check_kit(kit)['Shortfall'].any()
+
+
+def _shortage_message(report):
+    short = report[report['Shortfall'] > 0]
+    lines = [
+        f"{part} (needs {row.Required}, available {max(row.Available, 0)})" if row.Known else f"{part} (not found)"
+        for part, row in short.head(MAX_SHORTAGES_SHOWN).iterrows()
+    ]
+    more = len(short) - MAX_SHORTAGES_SHOWN
+    return "Error: Insufficient available stock for " + ", ".join(lines) + (f" and {more} more" if more > 0 else "")
+
+
+def _parse_work_order(work_order):
+    work_order = str(work_order or '').strip()
+    if not work_order or len(work_order) > 64:
+        return None, "Error: Work order must be 1-64 characters."
+    return work_order, None
+
+
+# --- Reserve / Release / Consume ---
+
+def reserve(work_order, part_num, quantity):
+    """Reserves units of one part for a work order."""
+    part_num = str(part_num).strip()
+    result = reserve_kit(work_order, [(part_num, quantity)])
+    if result.startswith("Error"):
+        return result
+    return f"Reservation Successful. Available to promise: {inventory_data.INVENTORY_CACHE.get_available(part_num)}"
+
+
+@perf_metrics.timed('reservation.reserve')
+def reserve_kit(work_order, kit):
+    """
+    Reserves every line of a kit for a work order in one transaction, or
+    nothing if any line is short. Repeated reservations of a part for the same
+    work order add to its open reservation.
+    """
+    work_order, error = _parse_work_order(work_order)
+    if error:
+        return error
+    try:
+        report = check_kit(kit)
+    except ValueError as e:
+        return f"Error: {e}"
+    if report.empty:
+        return "Error: Nothing to reserve."
+    if report['Shortfall'].any():
+        return _shortage_message(report)
+
+    # Rows are locked in PartNumber order (report is sorted) so concurrent kits cannot deadlock
+    lines = [(part_num, int(qty)) for part_num, qty in report['Required'].items()]
+
+    def work(cursor):
+        for part_num, qty in lines:
+            query_log.execute(cursor, RESERVE_SQL, (qty, part_num, qty))
+            if cursor.rowcount == 0:
+                # The cache was behind: another workstation took the stock meanwhile
+                return f"Error: Insufficient available stock for {part_num} (changed on another workstation)."
+            query_log.execute(cursor, OPEN_RESERVATION_SQL, (work_order, part_num))
+            row = cursor.fetchone()
+            if row is None:
+                query_log.execute(cursor, "INSERT INTO reservations (WorkOrder, PartNumber, Quantity) VALUES (%s, %s, %s)",
+                                  (work_order, part_num, qty))
+            else:
+                query_log.execute(cursor, "UPDATE reservations SET Quantity = Quantity + %s WHERE ReservationID = %s",
+                                  (qty, row[0]))
+        query_log.executemany(cursor, inventory_data.CHANGE_INSERT_SQL,
+                              [inventory_data._change_row(p, inventory_data.CHANGE_RESERVE, q) for p, q in lines])
+        return None
+
+    error = inventory_data._run_transaction(work)
+    if error:
+        return error
+    for part_num, qty in lines:
+        inventory_data.INVENTORY_CACHE.adjust_reserved(part_num, qty)
+    return f"Reservation Successful. {len(lines)} line(s) reserved for {work_order}."
+
+
+@perf_metrics.timed('reservation.release')
+def release(work_order, part_num=None):
+    """Releases a work order's open reservations (all parts, or only part_num)."""
+    work_order, error = _parse_work_order(work_order)
+    if error:
+        return error
+    released = {}
+
+    def work(cursor):
+        sql = "SELECT ReservationID, PartNumber, Quantity FROM reservations WHERE WorkOrder = %s AND Status = 'OPEN'"
+        params = [work_order]
+        if part_num is not None:
+            sql += " AND PartNumber = %s"
+            params.append(str(part_num).strip())
+        query_log.execute(cursor, sql + " ORDER BY PartNumber FOR UPDATE", params)
+        rows = cursor.fetchall()
+        if not rows:
+            return f"Error: No open reservation found for {work_order}."
+
+        ids = [row[0] for row in rows]
+        for _, part, qty in rows:
+            released[part] = released.get(part, 0) + int(qty)
+        query_log.execute(cursor, f"UPDATE reservations SET Status = 'RELEASED', ClosedAt = NOW(6) "
+                                  f"WHERE ReservationID IN ({', '.join(['%s'] * len(ids))})", ids)
+        query_log.executemany(cursor, RESERVED_DELTA_SQL, [(-qty, part) for part, qty in sorted(released.items())])
+        query_log.executemany(cursor, inventory_data.CHANGE_INSERT_SQL,
+                              [inventory_data._change_row(part, inventory_data.CHANGE_RESERVE, -qty)
+                               for part, qty in sorted(released.items())])
+        return None
+
+    error = inventory_data._run_transaction(work)
+    if error:
+        return error
+    for part, qty in released.items():
+        try:
+            inventory_data.INVENTORY_CACHE.adjust_reserved(part, -qty)
+        except KeyError:
+            pass # Part deleted meanwhile
+    return f"Release Successful. {sum(released.values())} unit(s) released from {work_order}."
+
+
+@perf_metrics.timed('reservation.consume')
+def consume(work_order, part_num, quantity, location=inventory_data.DEFAULT_LOCATION):
+    """
+    Issues reserved units to their work order: stock and reservation go down
+    together, so available-to-promise does not change.
+    """
+    work_order, error = _parse_work_order(work_order)
+    if error:
+        return error
+    part_num = str(part_num).strip()
+    qty_change, error = inventory_data._parse_stock_change(part_num, quantity, 'issued')
+    if error:
+        return error
+    location, error = inventory_data._parse_location(location)
+    if error:
+        return error
+
+    cache = inventory_data.INVENTORY_CACHE
+    current_qty = cache.get_location_quantity(part_num, location)
+    if qty_change > current_qty:
+        return f"Error: Insufficient stock at {location}. Available: {current_qty}, Requested: {qty_change}"
+
+    still_reserved = []
+
+    def work(cursor):
+        query_log.execute(cursor, LOCK_PART_SQL, (part_num,))
+        if cursor.fetchone() is None:
+            return f"Error: Part Number '{part_num}' not found."
+        query_log.execute(cursor, OPEN_RESERVATION_SQL, (work_order, part_num))
+        row = cursor.fetchone()
+        if row is None:
+            return f"Error: No open reservation of {part_num} for {work_order}."
+        reservation_id, open_qty = row[0], int(row[2])
+        if qty_change > open_qty:
+            return f"Error: Only {open_qty} of {part_num} reserved for {work_order}, Requested: {qty_change}"
+
+        query_log.execute(cursor, CONSUME_SQL, (qty_change, reservation_id))
+        query_log.execute(cursor, RESERVED_DELTA_SQL, (-qty_change, part_num))
+        for sql, params in inventory_data._movement_statements(
+                [(part_num, -qty_change, inventory_data.MOVEMENT_ISSUE, location)]):
+            query_log.executemany(cursor, sql, params)
+        query_log.execute(cursor, *inventory_data._change_statement(part_num, inventory_data.CHANGE_RESERVE, -qty_change))
+        still_reserved.append(open_qty - qty_change)
+        return None
+
+    error = inventory_data._run_transaction(work)
+    if error:
+        return error
+    with perf_metrics.measure('cache.update'):
+        new_qty, _ = cache.adjust_location_quantity(part_num, location, -qty_change)
+        cache.adjust_reserved(part_num, -qty_change)
+    return (f"Stock issued successfully. New Quantity: {new_qty}{inventory_data._location_note(part_num, location)}. "
+            f"Still reserved for {work_order}: {still_reserved[0]}")
+
+
+# --- Queries ---
+
+def open_reservations(work_order=None, part_num=None):
+    """
+    Returns the open reservations (optionally of one work order and/or part) as a
+    list of dicts, oldest first, or None if the database could not be read.
+    """
+    sql = "SELECT ReservationID, WorkOrder, PartNumber, Quantity, CreatedAt FROM reservations WHERE Status = 'OPEN'"
+    params = []
+    if work_order is not None:
+        sql += " AND WorkOrder = %s"
+        params.append(str(work_order).strip())
+    if part_num is not None:
+        sql += " AND PartNumber = %s"
+        params.append(str(part_num).strip())
+    conn = inventory_data.get_db_connection()
+    if conn is None:
+        return None
+    cursor = conn.cursor(dictionary=True)
+    try:
+        query_log.execute(cursor, sql + " ORDER BY CreatedAt", params)
+        return cursor.fetchall()
+    except mysql.connector.Error as err:
+        inventory_data._report('error', "DB Operation Error", f"SQL Error during execution: {err}")
+        return None
+    finally:
+        cursor.close()
+        if conn.is_connected():
+            conn.close()
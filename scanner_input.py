@@ -0,0 +1,60 @@
+# -------------------------------------------#
+# scanner_input.py - Tell barcode scanner bursts from typing in an Entry
+#
+# A USB barcode scanner "types" the whole code within a few milliseconds per
+# character and then sends Enter (or Tab). A person types far slower. So when
+# the terminator arrives, the field counts as scanned if every character in it
+# came in one burst with no gap longer than SCAN_MAX_GAP_MS.
+# -------------------------------------------#
+
+# Longest gap between two characters of one scan (people rarely type < 80 ms apart)
+SCAN_MAX_GAP_MS = 50
+# Shortest code accepted as a scan (single keys are never scans)
+SCAN_MIN_LENGTH = 3
+# Keys scanners send after the code
+SCAN_TERMINATORS = ('Return', 'KP_Enter', 'Tab')
+
+
+class ScanDetector:
+    def __init__(self, entry, on_scan, on_enter=None):
+        """
+        Watches `entry`. on_scan(code) is called for a scanned code; on_enter(text)
+        for Enter after manual typing (Tab after manual typing moves focus as usual).
+        """
+        self.entry = entry
+        self.on_scan = on_scan
+        self.on_enter = on_enter
+        self._last_key_time = None
+        self._burst_length = 0
+        entry.bind('<KeyPress>', self._on_key, add='+')
+
+    def _on_key(self, event):
+        if event.keysym in SCAN_TERMINATORS:
+            return self._on_terminator(event)
+        if not event.char or not event.char.isprintable():
+            return None
+        # event.time is Tk's millisecond timestamp of the key press
+        if self._last_key_time is None or event.time - self._last_key_time > SCAN_MAX_GAP_MS:
+            self._burst_length = 1
+        else:
+            self._burst_length += 1
+        self._last_key_time = event.time
+        return None
+
+    def _on_terminator(self, event):
+        text = self.entry.get().strip()
+        scanned = (
+            self._last_key_time is not None
+            and event.time - self._last_key_time <= SCAN_MAX_GAP_MS
+            and self._burst_length >= max(len(text), SCAN_MIN_LENGTH)
+        )
+        self._last_key_time = None
+        self._burst_length = 0
+
+        if scanned:
+            self.on_scan(text)
+            return "break"
+        if event.keysym != 'Tab' and self.on_enter:
+            self.on_enter(text)
+            return "break"
+        return None
@@ -0,0 +1,124 @@
+# -------------------------------------------#
+# scanner_stock.py - Scanner mode, part display and quantity input shared by the stock windows
+#
+# StockIssuedWindow and StockReceivedWindow both inherit ScanStockMixin, so the
+# scanner-mode controls, the per-scan commit, the part details and the debounced
+# quantity check are written once and the two windows cannot drift apart. Each window sets:
+#   SCAN_VERB      'issued' / 'received' (scan confirmations)
+#   SCAN_SIGN      '-' / '+'
+#   post_movement  the inventory_data function a scan commits through
+#   update_btn     its Update button
+# and calls _create_scanner_controls(search_frame) while building its widgets.
+# The window's _validate_quantity_input runs once typing pauses.
+# -------------------------------------------#
+
+import tkinter as tk
+from tkinter import Label
+
+import inventory_data
+import notifications
+import perf_metrics
+from scanner_input import ScanDetector
+
+# Quantity moved per scan in scanner mode, until the operator changes it
+SCAN_DEFAULT_QTY = 1
+
+# Quantity is validated this long after the last keystroke, so a scanner burst
+# of several characters is parsed once instead of once per character
+VALIDATE_DELAY_MS = 120
+
+
+def parse_quantity(text):
+    """Returns the typed quantity as a positive int, or None if it is empty, zero or not a whole number."""
+    text = str(text).strip()
+    # isdecimal() rejects empty, negative and non-numeric input without raising
+    if not text.isdecimal() or int(text) == 0:
+        return None
+    return int(text)
+
+
+class ScanStockMixin:
+    SCAN_VERB = ''
+    SCAN_SIGN = ''
+    post_movement = None
+
+    def _create_scanner_controls(self, search_frame):
+        """Adds the scanner-mode switch and per-scan quantity, and watches the part number field."""
+        # Scanner mode: a scanned part number is moved at once with the per-scan quantity
+        self.scanner_mode_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(search_frame, text="Scanner mode", variable=self.scanner_mode_var,
+                       font=("Arial", 11), bg="#f0f0f0").pack(side=tk.LEFT, padx=(10, 2))
+        Label(search_frame, text="Qty/scan:", font=("Arial", 11), bg="#f0f0f0").pack(side=tk.LEFT)
+        self.scan_qty_var = tk.StringVar(value=str(SCAN_DEFAULT_QTY))
+        tk.Spinbox(search_frame, from_=1, to=9999, width=5, font=("Arial", 11),
+                   textvariable=self.scan_qty_var).pack(side=tk.LEFT, padx=2)
+
+        # Enter after typing searches; a scanner burst goes to _on_scan
+        self.scan_detector = ScanDetector(self.entry_part_num, self._on_scan,
+                                          on_enter=lambda text: self._search_part())
+
+    def _show_part_details(self, part_num, part_data):
+        """Fills the detail labels and image for a found part and enables the quantity input."""
+        # Update detail labels
+        self.description_label.config(text=part_data['Description'])
+        self.unit_price_label.config(text=part_data['UnitPrice'])
+
+        # The quantity is an integer, display it clearly
+        qty = int(part_data.get('Quantity', 0))
+        self.current_qty_label.config(text=str(qty), fg="green")
+        self._show_location_quantity(part_num)
+
+        # Display image
+        image_path = part_data.get('ImagePath', '')
+        self._display_image(image_path)
+        perf_metrics.measure_redraw(self.window, 'ui.search_redraw')
+
+        # Set state for processing
+        self.current_part_num = part_num
+        self.is_valid_part = True
+        self._set_form_state(tk.NORMAL)
+
+    def _on_scan(self, code):
+        """
+        A barcode was scanned into the part number field. In scanner mode the
+        per-scan quantity is moved straight away and confirmed on the
+        notification bus; otherwise the scan just searches like the Search button.
+        """
+        if not self.scanner_mode_var.get():
+            self._search_part()
+            return
+
+        with perf_metrics.measure('ui.scan_commit'):
+            self.entry_part_num.delete(0, 'end')
+            self.entry_part_num.focus_set()
+
+            # 1. Resolve the part from the cache (no DB round trip)
+            if code not in inventory_data.INVENTORY_CACHE:
+                self._clear_details()
+                notifications.error("Scan", f"Unknown part '{code}'")
+                return
+
+            # 2. Commit the movement (the data layer checks the quantity and, for issues, the stock)
+            result_message = self.post_movement(code, self.scan_qty_var.get(), self.location_var.get())
+            if result_message.startswith("Error"):
+                notifications.error("Scan", f"{code}: {result_message}")
+                return
+
+            # 3. Show the part with its new quantity, ready for the next scan
+            self._clear_details()
+            self._show_part_details(code, inventory_data.get_part_data(code))
+            self.entry_part_num.focus_set()
+            notifications.info("Scan", f"{code}: {self.SCAN_SIGN}{self.scan_qty_var.get().strip()} {self.SCAN_VERB}. "
+                                       f"{result_message}")
+
+    def _on_quantity_changed(self, *args):
+        """Variable trace: (re)starts the debounce timer for the quantity validation."""
+        if self._validate_after_id is not None:
+            self.window.after_cancel(self._validate_after_id)
+        self._validate_after_id = self.window.after(VALIDATE_DELAY_MS, self._validate_quantity_input)
+
+    def _set_button_state(self, state):
+        """Reconfigures the Update button only when its state actually changes."""
+        if state != self._button_state:
+            self.update_btn.config(state=state)
+            self._button_state = state
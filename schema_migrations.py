@@ -0,0 +1,411 @@
+# -------------------------------------------#
+# schema_migrations.py - Versioned, idempotent schema migrations
+#
+# The schema_version table records which migrations have been applied (and how
+# long each took). upgrade() applies the missing ones in order; every step
+# checks information_schema first, so it is safe on databases that were set up
+# by hand or by older versions of the app.
+#
+# ALTERs use the least blocking algorithm the server accepts (INSTANT, then
+# INPLACE with LOCK=NONE). A change that would need a blocking table copy is
+# refused on large tables; run it with an online schema change tool instead.
+#
+# Usage:
+#   python schema_migrations.py            # upgrade to the latest version
+#   python schema_migrations.py --status   # show applied / pending migrations
+# -------------------------------------------#
+
+import argparse
+import os
+import sys
+import time
+
+import mysql.connector
+
+# Tables above this (estimated) row count never get a blocking table-copy ALTER
+LARGE_TABLE_ROWS = 500000
+
+# Server error codes meaning "this ALGORITHM/LOCK is not possible here":
+# 1845/1846 (not supported for this change) and 1800/1801 (unknown ALGORITHM/LOCK
+# value, e.g. INSTANT on MySQL 5.7). A syntax error (1064) is a real error.
+_ALGORITHM_NOT_SUPPORTED = (1845, 1846, 1800, 1801)
+
+_ONLINE_ALGORITHMS = ("ALGORITHM=INSTANT", "ALGORITHM=INPLACE, LOCK=NONE")
+
+SCHEMA_VERSION_SQL = """
+    CREATE TABLE IF NOT EXISTS schema_version (
+        Version INT PRIMARY KEY,
+        Name VARCHAR(128) NOT NULL,
+        AppliedAt TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        DurationMs INT NOT NULL
+    )
+"""
+
+# Storeroom that existing stock is assigned to when locations are introduced
+DEFAULT_LOCATION = 'MAIN'
+
+# Serializes upgrades started from several workstations at once
+MIGRATION_LOCK = 'meta_robotics_inventory_schema'
+MIGRATION_LOCK_TIMEOUT = 60
+
+
+class MigrationError(Exception):
+    pass
+
+
+# --- Introspection Helpers ---
+
+def table_exists(cursor, table):
+    cursor.execute(
+        "SELECT COUNT(*) FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+        (table,)
+    )
+    return cursor.fetchone()[0] > 0
+
+
+def has_column(cursor, table, column):
+    cursor.execute(
+        "SELECT COUNT(*) FROM information_schema.COLUMNS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s",
+        (table, column)
+    )
+    return cursor.fetchone()[0] > 0
+
+
+def has_index(cursor, table, index):
+    cursor.execute(
+        "SELECT COUNT(*) FROM information_schema.STATISTICS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s",
+        (table, index)
+    )
+    return cursor.fetchone()[0] > 0
+
+
+def estimated_rows(cursor, table):
+    cursor.execute(
+        "SELECT COALESCE(TABLE_ROWS, 0) FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+        (table,)
+    )
+    row = cursor.fetchone()
+    return int(row[0]) if row else 0
+
+
+def online_alter(cursor, table, change, algorithms=_ONLINE_ALGORITHMS):
+    """
+    Runs ALTER TABLE with the first of `algorithms` the server accepts and
+    returns the clause used. Falls back to the server default only for small tables.
+    """
+    for clause in algorithms:
+        try:
+            cursor.execute(f"ALTER TABLE {table} {change}, {clause}")
+            return clause
+        except mysql.connector.Error as err:
+            if err.errno not in _ALGORITHM_NOT_SUPPORTED:
+                raise
+    rows = estimated_rows(cursor, table)
+    if rows >= LARGE_TABLE_ROWS:
+        raise MigrationError(
+            f"ALTER TABLE {table} {change} needs a blocking table copy (~{rows:,} rows). "
+            "Run it with an online schema change tool, then re-run the migrations."
+        )
+    cursor.execute(f"ALTER TABLE {table} {change}")
+    return "ALGORITHM=DEFAULT"
+
+
+# --- Migrations ---
+# Each migration takes a cursor and must be safe to run on a schema where some
+# or all of its changes already exist.
+
+def _m001_inventory_table(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS inventory (
+            PartNumber VARCHAR(64) NOT NULL PRIMARY KEY,
+            Description VARCHAR(255) NOT NULL,
+            UnitPrice DECIMAL(10, 2) NOT NULL,
+            Quantity INT NOT NULL DEFAULT 0,
+            ImagePath VARCHAR(512) NOT NULL DEFAULT ''
+        )
+    """)
+    # Databases from before stock tracking have no Quantity column
+    if not has_column(cursor, 'inventory', 'Quantity'):
+        online_alter(cursor, 'inventory', "ADD COLUMN Quantity INT NOT NULL DEFAULT 0")
+    # Every lookup, update and delete is by PartNumber
+    if not has_index(cursor, 'inventory', 'PRIMARY'):
+        online_alter(cursor, 'inventory', "ADD PRIMARY KEY (PartNumber)",
+                     algorithms=("ALGORITHM=INPLACE, LOCK=NONE",))
+
+
+def _m002_row_version(cursor):
+    if not has_column(cursor, 'inventory', 'RowVersion'):
+        online_alter(cursor, 'inventory', "ADD COLUMN RowVersion INT UNSIGNED NOT NULL DEFAULT 0")
+
+
+def _m003_stock_movements(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS stock_movements (
+            MovementID BIGINT AUTO_INCREMENT PRIMARY KEY,
+            PartNumber VARCHAR(64) NOT NULL,
+            QtyChange INT NOT NULL,
+            MovementType VARCHAR(16) NOT NULL,
+            CreatedAt TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),
+            JournalID CHAR(32) NULL,
+            UNIQUE KEY uq_stock_movements_journal (JournalID)
+        )
+    """)
+    # Ledgers created before the offline journal existed
+    if not has_column(cursor, 'stock_movements', 'JournalID'):
+        online_alter(cursor, 'stock_movements', "ADD COLUMN JournalID CHAR(32) NULL")
+    if not has_index(cursor, 'stock_movements', 'uq_stock_movements_journal'):
+        online_alter(cursor, 'stock_movements', "ADD UNIQUE KEY uq_stock_movements_journal (JournalID)",
+                     algorithms=("ALGORITHM=INPLACE, LOCK=NONE",))
+
+
+def _m004_inventory_changes(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS inventory_changes (
+            Seq BIGINT AUTO_INCREMENT PRIMARY KEY,
+            PartNumber VARCHAR(64) NOT NULL,
+            ChangeType VARCHAR(8) NOT NULL,
+            QtyChange INT NOT NULL DEFAULT 0,
+            Origin CHAR(32) NOT NULL,
+            CreatedAt TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),
+            KEY ix_inventory_changes_created (CreatedAt)
+        )
+    """)
+
+
+def _m005_performance_indexes(cursor):
+    # Part history and per-part consumption: WHERE PartNumber = ? AND CreatedAt >= ?
+    if not has_index(cursor, 'stock_movements', 'ix_stock_movements_part_created'):
+        online_alter(cursor, 'stock_movements', "ADD INDEX ix_stock_movements_part_created (PartNumber, CreatedAt)",
+                     algorithms=("ALGORITHM=INPLACE, LOCK=NONE",))
+    # Period reports over one movement type, covering so the rows are never read
+    if not has_index(cursor, 'stock_movements', 'ix_stock_movements_type_created'):
+        online_alter(cursor, 'stock_movements',
+                     "ADD INDEX ix_stock_movements_type_created (MovementType, CreatedAt, PartNumber, QtyChange)",
+                     algorithms=("ALGORITHM=INPLACE, LOCK=NONE",))
+    # Description search; InnoDB cannot build FULLTEXT with LOCK=NONE, SHARED still allows reads
+    if not has_index(cursor, 'inventory', 'ft_inventory_description'):
+        online_alter(cursor, 'inventory', "ADD FULLTEXT INDEX ft_inventory_description (Description)",
+                     algorithms=("ALGORITHM=INPLACE, LOCK=SHARED",))
+
+
+def _m006_stock_locations(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS locations (
+            LocationCode VARCHAR(32) NOT NULL PRIMARY KEY,
+            Description VARCHAR(128) NOT NULL DEFAULT ''
+        )
+    """)
+    cursor.execute("INSERT IGNORE INTO locations (LocationCode, Description) VALUES (%s, %s)",
+                   (DEFAULT_LOCATION, 'Main storeroom'))
+    # Per-bin quantities; inventory.Quantity stays the total, maintained in the same transactions
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS stock_locations (
+            PartNumber VARCHAR(64) NOT NULL,
+            LocationCode VARCHAR(32) NOT NULL,
+            Quantity INT NOT NULL DEFAULT 0,
+            PRIMARY KEY (PartNumber, LocationCode),
+            KEY ix_stock_locations_location (LocationCode)
+        )
+    """)
+    # Existing stock starts out in the default location
+    cursor.execute("""
+        INSERT INTO stock_locations (PartNumber, LocationCode, Quantity)
+        SELECT i.PartNumber, %s, i.Quantity FROM inventory i
+        WHERE i.Quantity <> 0
+          AND NOT EXISTS (SELECT 1 FROM stock_locations s WHERE s.PartNumber = i.PartNumber)
+    """, (DEFAULT_LOCATION,))
+    for table in ('stock_movements', 'inventory_changes'):
+        if not has_column(cursor, table, 'LocationCode'):
+            online_alter(cursor, table, "ADD COLUMN LocationCode VARCHAR(32) NULL")
+
+
+def _m007_reservations(cursor):
+    # Open reservations per work order; Quantity is what is still reserved
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS reservations (
+            ReservationID BIGINT AUTO_INCREMENT PRIMARY KEY,
+            WorkOrder VARCHAR(64) NOT NULL,
+            PartNumber VARCHAR(64) NOT NULL,
+            Quantity INT NOT NULL,
+            Status VARCHAR(10) NOT NULL DEFAULT 'OPEN',
+            CreatedAt TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),
+            ClosedAt TIMESTAMP(6) NULL,
+            KEY ix_reservations_work_order (WorkOrder, PartNumber, Status),
+            KEY ix_reservations_part (PartNumber, Status)
+        )
+    """)
+    # Sum of the open reservations, maintained in the same transactions
+    if not has_column(cursor, 'inventory', 'ReservedQty'):
+        online_alter(cursor, 'inventory', "ADD COLUMN ReservedQty INT NOT NULL DEFAULT 0")
+
+
+def _m008_reorder_points(cursor):
+    # Written by the consumption_analytics batch job, one row per part with demand history
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS reorder_points (
+            PartNumber VARCHAR(64) NOT NULL PRIMARY KEY,
+            Method VARCHAR(8) NOT NULL,
+            PeriodDays INT NOT NULL,
+            AvgDemand DOUBLE NOT NULL,
+            ForecastDemand DOUBLE NOT NULL,
+            DemandStdDev DOUBLE NOT NULL,
+            ReorderPoint INT NOT NULL,
+            ComputedAt TIMESTAMP NOT NULL
+        )
+    """)
+
+
+def _m009_cycle_counts(cursor):
+    # One count session per location; SnapshotMovementID is the ledger position of ExpectedQty
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS cycle_counts (
+            CountID BIGINT AUTO_INCREMENT PRIMARY KEY,
+            LocationCode VARCHAR(32) NOT NULL,
+            Status VARCHAR(10) NOT NULL DEFAULT 'OPEN',
+            SnapshotMovementID BIGINT NOT NULL,
+            CreatedAt TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),
+            ClosedAt TIMESTAMP(6) NULL,
+            KEY ix_cycle_counts_status (Status)
+        )
+    """)
+    # CountedAfterID is the ledger position when the count was entered (moves up to it were seen)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS cycle_count_lines (
+            CountID BIGINT NOT NULL,
+            PartNumber VARCHAR(64) NOT NULL,
+            ExpectedQty INT NOT NULL,
+            CountedQty INT NULL,
+            CountedAfterID BIGINT NULL,
+            Variance INT NULL,
+            PRIMARY KEY (CountID, PartNumber)
+        )
+    """)
+
+
+def _m010_supplier_price_history(cursor):
+    if not has_column(cursor, 'inventory', 'Supplier'):
+        online_alter(cursor, 'inventory', "ADD COLUMN Supplier VARCHAR(64) NOT NULL DEFAULT ''")
+    # One row per price change; bulk updates share a BatchID
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS price_history (
+            HistoryID BIGINT AUTO_INCREMENT PRIMARY KEY,
+            PartNumber VARCHAR(64) NOT NULL,
+            OldPrice DECIMAL(10, 2) NOT NULL,
+            NewPrice DECIMAL(10, 2) NOT NULL,
+            BatchID CHAR(32) NULL,
+            Reason VARCHAR(128) NOT NULL DEFAULT '',
+            ChangedAt TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),
+            KEY ix_price_history_part (PartNumber, ChangedAt),
+            KEY ix_price_history_batch (BatchID)
+        )
+    """)
+
+
+# (version, name, function) in the order they must be applied
+MIGRATIONS = [
+    (1, 'inventory table with PartNumber primary key', _m001_inventory_table),
+    (2, 'inventory RowVersion column', _m002_row_version),
+    (3, 'stock_movements ledger', _m003_stock_movements),
+    (4, 'inventory_changes feed', _m004_inventory_changes),
+    (5, 'performance indexes', _m005_performance_indexes),
+    (6, 'stock locations', _m006_stock_locations),
+    (7, 'stock reservations', _m007_reservations),
+    (8, 'reorder points', _m008_reorder_points),
+    (9, 'cycle counts', _m009_cycle_counts),
+    (10, 'inventory Supplier and price history', _m010_supplier_price_history),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+# --- Runner ---
+
+def current_version(cursor):
+    cursor.execute(SCHEMA_VERSION_SQL)
+    cursor.execute("SELECT COALESCE(MAX(Version), 0) FROM schema_version")
+    return int(cursor.fetchone()[0])
+
+
+def upgrade(cursor, target=LATEST_VERSION, progress=None):
+    """
+    Applies the migrations above the current version up to `target`.
+    progress, if given, is called as progress(version, name, seconds) after each one.
+    Returns a list of (version, name, seconds) for the migrations applied.
+    Raises MigrationError or mysql.connector.Error; DDL commits implicitly, so a
+    failed migration leaves the ones before it applied.
+    """
+    if current_version(cursor) >= target:
+        return []
+
+    cursor.execute("SELECT GET_LOCK(%s, %s)", (MIGRATION_LOCK, MIGRATION_LOCK_TIMEOUT))
+    if cursor.fetchone()[0] != 1:
+        raise MigrationError("Another workstation is upgrading the schema; try again shortly.")
+    applied = []
+    try:
+        version = current_version(cursor)  # Re-read: someone may have finished while we waited
+        for number, name, migrate in MIGRATIONS:
+            if number <= version or number > target:
+                continue
+            start = time.perf_counter()
+            migrate(cursor)
+            seconds = time.perf_counter() - start
+            cursor.execute(
+                "INSERT INTO schema_version (Version, Name, DurationMs) VALUES (%s, %s, %s)",
+                (number, name, int(seconds * 1000))
+            )
+            cursor.execute("COMMIT")
+            applied.append((number, name, seconds))
+            if progress:
+                progress(number, name, seconds)
+    finally:
+        cursor.execute("SELECT RELEASE_LOCK(%s)", (MIGRATION_LOCK,))
+        cursor.fetchone()
+    return applied
+
+
+def status(cursor):
+    """Returns [(version, name, applied_at or None, duration_ms or None)] for every migration."""
+    cursor.execute(SCHEMA_VERSION_SQL)
+    cursor.execute("SELECT Version, AppliedAt, DurationMs FROM schema_version")
+    applied = {row[0]: (row[1], row[2]) for row in cursor.fetchall()}
+    return [(number, name) + applied.get(number, (None, None)) for number, name, _ in MIGRATIONS]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Create or upgrade the inventory database schema.")
+    parser.add_argument('--status', action='store_true', help="List applied and pending migrations.")
+    parser.add_argument('--target', type=int, default=LATEST_VERSION, help="Upgrade only up to this version.")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault('INVENTORY_AUTOLOAD', '0')
+    import inventory_data
+
+    conn = inventory_data.get_db_connection()
+    if conn is None:
+        return 2
+    cursor = conn.cursor()
+    try:
+        if args.status:
+            for number, name, applied_at, duration_ms in status(cursor):
+                state = f"applied {applied_at} ({duration_ms} ms)" if applied_at else "pending"
+                print(f"{number:>3}  {name:<45} {state}")
+            return 0
+
+        def show(number, name, seconds):
+            print(f"Applied {number:>3}  {name} in {seconds:.2f}s")
+
+        applied = upgrade(cursor, args.target, progress=show)
+        print(f"Schema is at version {current_version(cursor)}" + ("" if applied else " (nothing to do)"))
+        return 0
+    except (MigrationError, mysql.connector.Error) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        cursor.close()
+        conn.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
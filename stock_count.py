@@ -0,0 +1,277 @@
+# -------------------------------------------#
+# stock_count.py - Cycle Count window
+#
+# Start a count for a location (optionally only parts with a number prefix or
+# one ABC value class), scan or type the counts, review the variances and post
+# them all at once. The expected quantities are not shown while counting, so
+# the counter is not tempted to "find" the expected number. See cycle_count.py.
+# -------------------------------------------#
+
+import tkinter as tk
+from tkinter import Toplevel, Label, Entry, Button, Frame, messagebox, ttk
+
+import cycle_count
+import inventory_data
+import notifications
+import perf_metrics
+from scanner_input import ScanDetector
+
+COLUMNS = ('counted', 'expected', 'moved', 'variance', 'value')
+HEADINGS = ('Counted', 'Expected', 'Moved During Count', 'Variance', 'Variance Value')
+CLASS_FILTERS = ('All', 'A', 'B', 'C')
+
+
+class CycleCountWindow:
+    def __init__(self, master_root, inventory_window_instance):
+        """Builds the window (shown and hidden by the window manager)."""
+        self.master_root = master_root
+        self.inventory_window_instance = inventory_window_instance
+
+        # State variables
+        self.count_id = None
+        self.count_location = None
+        self.line_count = 0
+        self.counted = {} # PartNumber -> counted quantity entered at this workstation
+
+        self.window = Toplevel(master_root)
+        self.window.title("Cycle Count")
+        self.window.geometry("820x640")
+        self.window.config(bg="white")
+        self.window.columnconfigure(0, weight=1)
+        self.window.rowconfigure(4, weight=1)
+        # Modal grab is taken by the window manager each time the window is shown
+        self.window.protocol("WM_DELETE_WINDOW", self._back_to_inventory_menu)
+
+        self._create_widgets()
+
+    def _create_widgets(self):
+        Label(self.window, text="Cycle Count", font=("Arial", 18, "bold"),
+              bg="white", fg="#004d99").grid(row=0, column=0, pady=10)
+
+        # --- Start a count ---
+        setup_frame = Frame(self.window, bg="white")
+        setup_frame.grid(row=1, column=0, sticky="ew", padx=10)
+
+        Label(setup_frame, text="Location:", bg="white").pack(side=tk.LEFT)
+        self.location_var = tk.StringVar(value=inventory_data.DEFAULT_LOCATION)
+        self.location_combo = ttk.Combobox(setup_frame, textvariable=self.location_var,
+                                           values=inventory_data.list_locations(), state='readonly', width=10)
+        self.location_combo.pack(side=tk.LEFT, padx=5)
+
+        Label(setup_frame, text="Parts starting with:", bg="white").pack(side=tk.LEFT, padx=(10, 0))
+        self.prefix_entry = Entry(setup_frame, width=12)
+        self.prefix_entry.pack(side=tk.LEFT, padx=5)
+
+        Label(setup_frame, text="Value class:", bg="white").pack(side=tk.LEFT, padx=(10, 0))
+        self.class_var = tk.StringVar(value='All')
+        ttk.Combobox(setup_frame, textvariable=self.class_var, values=CLASS_FILTERS,
+                     state='readonly', width=5).pack(side=tk.LEFT, padx=5)
+
+        self.start_btn = Button(setup_frame, text="Start Count", command=self._start_count, bg="#a3d9ff")
+        self.start_btn.pack(side=tk.LEFT, padx=10)
+
+        self.status_label = Label(self.window, text="", font=("Arial", 11, "italic"), bg="white")
+        self.status_label.grid(row=2, column=0, pady=5)
+
+        # --- Counting ---
+        count_frame = Frame(self.window, bg="#f0f0f0", pady=8)
+        count_frame.grid(row=3, column=0, sticky="ew", padx=10)
+
+        Label(count_frame, text="Part Number:", font=("Arial", 12), bg="#f0f0f0").pack(side=tk.LEFT, padx=5)
+        self.entry_part_num = Entry(count_frame, width=18, font=("Arial", 12), bd=2, relief=tk.RIDGE)
+        self.entry_part_num.pack(side=tk.LEFT, padx=5)
+        Label(count_frame, text="Count:", font=("Arial", 12), bg="#f0f0f0").pack(side=tk.LEFT, padx=(10, 5))
+        self.entry_count = Entry(count_frame, width=8, font=("Arial", 12), bd=2, relief=tk.RIDGE)
+        self.entry_count.pack(side=tk.LEFT, padx=5)
+        self.entry_count.bind("<Return>", lambda event: self._set_count())
+        self.set_count_btn = Button(count_frame, text="Set Count", command=self._set_count,
+                                    font=("Arial", 12, "bold"), bg="#a3d9ff")
+        self.set_count_btn.pack(side=tk.LEFT, padx=10)
+        Label(count_frame, text="(each scan counts one unit)", font=("Arial", 10, "italic"),
+              bg="#f0f0f0").pack(side=tk.LEFT)
+
+        # A scanned part counts one unit; Enter after typing moves on to the count field
+        self.scan_detector = ScanDetector(self.entry_part_num, self._on_scan,
+                                          on_enter=lambda text: self.entry_count.focus_set())
+
+        # --- Lines ---
+        grid_frame = Frame(self.window, bg="white")
+        grid_frame.grid(row=4, column=0, sticky="nsew", padx=10, pady=5)
+        grid_frame.columnconfigure(0, weight=1)
+        grid_frame.rowconfigure(0, weight=1)
+
+        self.tree = ttk.Treeview(grid_frame, columns=COLUMNS, show='tree headings')
+        self.tree.heading('#0', text="Part Number")
+        self.tree.column('#0', width=140, anchor='w')
+        for column, heading in zip(COLUMNS, HEADINGS):
+            self.tree.heading(column, text=heading)
+            self.tree.column(column, width=110, anchor='e')
+        self.tree.tag_configure('short', foreground="#c62828")
+        self.tree.tag_configure('over', foreground="#b26a00")
+        scrollbar = ttk.Scrollbar(grid_frame, orient='vertical', command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.grid(row=0, column=0, sticky="nsew")
+        scrollbar.grid(row=0, column=1, sticky="ns")
+
+        # --- Footer Buttons ---
+        footer_frame = Frame(self.window, bg="#e0e0e0", pady=5)
+        footer_frame.grid(row=5, column=0, sticky="ew")
+        self.review_btn = Button(footer_frame, text="Review Variances", command=self._review_variances,
+                                 font=("Arial", 12), bg="#cccccc")
+        self.review_btn.pack(side=tk.LEFT, padx=(20, 5))
+        self.post_btn = Button(footer_frame, text="Post Adjustments", command=self._post_count,
+                               font=("Arial", 12, "bold"), bg="#4CAF50", fg="white")
+        self.post_btn.pack(side=tk.LEFT, padx=5)
+        self.cancel_btn = Button(footer_frame, text="Cancel Count", command=self._cancel_count,
+                                 font=("Arial", 12), bg="#cccccc")
+        self.cancel_btn.pack(side=tk.LEFT, padx=5)
+        Button(footer_frame, text="Back Page", command=self._back_to_inventory_menu,
+               font=("Arial", 12, "bold"), bg="#ff8566", fg="black", padx=10).pack(side=tk.RIGHT, padx=20)
+
+        self._show_state()
+
+    def reset(self):
+        """Called each time the window is shown. An open count stays open between visits."""
+        self.location_combo.config(values=inventory_data.list_locations())
+        self.entry_part_num.delete(0, 'end')
+        self.entry_count.delete(0, 'end')
+        self._show_state()
+        self.entry_part_num.focus_set()
+
+    def _show_state(self):
+        """Enables the widgets that apply to the current state (count open or not)."""
+        counting = 'normal' if self.count_id is not None else 'disabled'
+        setup = 'disabled' if self.count_id is not None else 'normal'
+        for widget in (self.entry_part_num, self.entry_count, self.set_count_btn,
+                       self.review_btn, self.post_btn, self.cancel_btn):
+            widget.config(state=counting)
+        self.start_btn.config(state=setup)
+        self.location_combo.config(state='disabled' if self.count_id is not None else 'readonly')
+        if self.count_id is None:
+            self.status_label.config(text="No count open. Choose the parts and press Start Count.")
+        else:
+            self.status_label.config(text=f"Count #{self.count_id} at {self.count_location}: "
+                                          f"{len(self.counted):,} of {self.line_count:,} part(s) counted")
+
+    def _start_count(self):
+        value_class = None if self.class_var.get() == 'All' else self.class_var.get()
+        parts = cycle_count.select_parts(self.prefix_entry.get().strip(), value_class)
+        if parts is None:
+            messagebox.showinfo("Please Wait", "The ABC classification is still being calculated. Try again shortly.",
+                                parent=self.window)
+            return
+        if not parts:
+            messagebox.showerror("Nothing to Count", "No parts match the selection.", parent=self.window)
+            return
+        if not messagebox.askyesno("Start Count", f"Start a count of {len(parts):,} part(s) at {self.location_var.get()}?",
+                                   parent=self.window):
+            return
+
+        count_id, error = cycle_count.start_count(parts, self.location_var.get())
+        if error:
+            messagebox.showerror("Count Not Started", error, parent=self.window)
+            return
+        self.count_id = count_id
+        self.count_location = self.location_var.get()
+        self.line_count = len(parts)
+        self.counted = {}
+        self.tree.delete(*self.tree.get_children())
+        self._show_state()
+        self.entry_part_num.focus_set()
+
+    def _record(self, part_num, quantity, add):
+        """Stores one count and updates its line. Returns the result message."""
+        result_message = cycle_count.record_count(self.count_id, part_num, quantity, add)
+        if result_message.startswith("Error"):
+            return result_message
+        counted = self.counted.get(part_num, 0) + int(quantity) if add else int(quantity)
+        self.counted[part_num] = counted
+        values = (f"{counted:,}", '', '', '', '')
+        if self.tree.exists(part_num):
+            self.tree.item(part_num, values=values, tags=())
+            self.tree.move(part_num, '', 0)
+        else:
+            self.tree.insert('', 0, iid=part_num, text=part_num, values=values)
+        self._show_state()
+        return result_message
+
+    def _on_scan(self, code):
+        """A scanned part counts one more unit and is confirmed on the notification bus."""
+        with perf_metrics.measure('ui.scan_commit'):
+            self.entry_part_num.delete(0, 'end')
+            self.entry_part_num.focus_set()
+            result_message = self._record(code, 1, add=True)
+            level = 'error' if result_message.startswith("Error") else 'info'
+            notifications.post(level, "Scan", f"{code}: {result_message}")
+
+    def _set_count(self):
+        """The typed count replaces whatever was counted for the part so far."""
+        part_num = self.entry_part_num.get().strip()
+        if not part_num:
+            messagebox.showerror("Input Error", "Please enter a Part Number.", parent=self.window)
+            return
+        result_message = self._record(part_num, self.entry_count.get().strip(), add=False)
+        if result_message.startswith("Error"):
+            messagebox.showerror("Count Not Recorded", result_message, parent=self.window)
+            return
+        self.entry_part_num.delete(0, 'end')
+        self.entry_count.delete(0, 'end')
+        self.entry_part_num.focus_set()
+
+    def _review_variances(self):
+        """Shows expected, moved and variance for every line (uncounted lines last)."""
+        variances = cycle_count.count_variances(self.count_id)
+        if variances is None:
+            return
+        variances = variances.sort_values(['IsCounted', 'VarianceValue'], ascending=[False, True])
+        self.tree.delete(*self.tree.get_children())
+        for part_num, row in variances.iterrows():
+            if not row['IsCounted']:
+                values = ("Not counted", f"{row['Expected']:,}", '', '', '')
+                tags = ()
+            else:
+                values = (f"{row['Counted']:,}", f"{row['Expected']:,}", f"{row['Moved']:+,}",
+                          f"{row['Variance']:+,}", f"{row['VarianceValue']:+,.2f}")
+                tags = ('short',) if row['Variance'] < 0 else ('over',) if row['Variance'] > 0 else ()
+            self.tree.insert('', 'end', iid=part_num, text=part_num, values=values, tags=tags)
+        counted = variances[variances['IsCounted']]
+        self.status_label.config(
+            text=f"Count #{self.count_id}: {len(counted):,} of {len(variances):,} counted, "
+                 f"{int((counted['Variance'] != 0).sum()):,} with a variance "
+                 f"(net {int(counted['Variance'].sum()):+,} units, {counted['VarianceValue'].sum():+,.2f})"
+        )
+
+    def _post_count(self):
+        uncounted = self.line_count - len(self.counted)
+        note = f"\n\n{uncounted:,} part(s) not counted here will not be adjusted." if uncounted > 0 else ""
+        if not messagebox.askyesno("Post Adjustments", f"Post the variances of count #{self.count_id}?{note}",
+                                   parent=self.window):
+            return
+        result_message = cycle_count.post_count(self.count_id)
+        if result_message.startswith("Error"):
+            messagebox.showerror("Count Not Posted", result_message, parent=self.window)
+            return
+        messagebox.showinfo("Count Posted", result_message, parent=self.window)
+        self._close_count()
+        self.inventory_window_instance.refresh_inventory_table()
+
+    def _cancel_count(self):
+        if not messagebox.askyesno("Cancel Count", f"Cancel count #{self.count_id} without posting?",
+                                   parent=self.window):
+            return
+        result_message = cycle_count.cancel_count(self.count_id)
+        if result_message.startswith("Error"):
+            messagebox.showerror("Count Not Cancelled", result_message, parent=self.window)
+            return
+        self._close_count()
+
+    def _close_count(self):
+        self.count_id = None
+        self.count_location = None
+        self.line_count = 0
+        self.counted = {}
+        self.tree.delete(*self.tree.get_children())
+        self._show_state()
+
+    def _back_to_inventory_menu(self):
+        self.inventory_window_instance.return_to_inventory_menu(self.window)
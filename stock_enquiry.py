@@ -10,6 +10,9 @@ import math
 
 # Import data handling functions
 import inventory_data 
+import perf_metrics
+import consumption_analytics
+import abc_classification
 
 # Define the fixed pixel dimensions for the image preview area 
 PREVIEW_W = 250
@@ -33,13 +36,19 @@ class StockEnquiryWindow:
         self.description_label = None
         self.unit_price_label = None
         self.current_qty_label = None
+        self.locations_label = None
+        self.reserved_label = None
+        self.available_label = None
+        self.reorder_label = None
+        self.class_label = None
         self.photo_preview_label = None
         
         # Create Toplevel window
         self.window = Toplevel(master_root)
         self.window.title("Stock Enquiry")
-        self.center_window(self.window, 650, 550) # Slightly smaller window as less input is needed
-        self.window.grab_set() # Modal behavior
+        self.center_window(self.window, 650, 600) # Stock figures sit side by side, so it fits a 768px screen
+        # Modal grab is taken by the window manager each time the window is shown
+        self.window.protocol("WM_DELETE_WINDOW", self._back_to_inventory_menu)
 
         self._create_widgets()
         self._clear_details()
@@ -61,11 +70,11 @@ class StockEnquiryWindow:
 
         # --- Title ---
         title_label = Label(main_frame, text="Stock Enquiry", font=("Arial", 20, "bold"), bg="#f0f0f0", fg="#004d99")
-        title_label.grid(row=0, column=0, columnspan=3, pady=15)
+        title_label.grid(row=0, column=0, columnspan=3, pady=(0, 5))
         
         # --- Search Bar and Part Number Input ---
         search_frame = Frame(main_frame, bg="#f0f0f0")
-        search_frame.grid(row=1, column=0, columnspan=3, pady=10)
+        search_frame.grid(row=1, column=0, columnspan=3, pady=5)
         
         Label(search_frame, text="Enter Part Number:", font=("Arial", 12), bg="#f0f0f0").pack(side=tk.LEFT, padx=5)
         
@@ -78,7 +87,7 @@ class StockEnquiryWindow:
         
         # --- Details Frame (Organized display of fetched data) ---
         details_frame = Frame(main_frame, padx=10, pady=10, bg="white", bd=2, relief=tk.GROOVE)
-        details_frame.grid(row=2, column=0, columnspan=2, padx=10, pady=15, sticky='nsew')
+        details_frame.grid(row=2, column=0, columnspan=2, padx=10, pady=10, sticky='nsew')
         main_frame.grid_columnconfigure(0, weight=1) 
 
         row_index = 0
@@ -95,15 +104,45 @@ class StockEnquiryWindow:
         self.unit_price_label.grid(row=row_index, column=1, sticky='w', padx=5, pady=5)
         row_index += 1
         
-        # Current Quantity (Highlighted for enquiry)
-        Label(details_frame, text="Current Stock:", font=("Arial", 12, "bold"), bg="white").grid(row=row_index, column=0, sticky='w', padx=5, pady=5)
-        self.current_qty_label = Label(details_frame, text="N/A", font=("Arial", 14, "bold"), bg="white", fg="#004d99", anchor='w')
-        self.current_qty_label.grid(row=row_index, column=1, sticky='w', padx=5, pady=5)
+        # Breakdown of the total per location
+        Label(details_frame, text="By Location:", font=("Arial", 12, "bold"), bg="white").grid(row=row_index, column=0, sticky='nw', padx=5, pady=5)
+        self.locations_label = Label(details_frame, text="N/A", font=("Arial", 12), bg="white", anchor='w', justify=tk.LEFT)
+        self.locations_label.grid(row=row_index, column=1, sticky='w', padx=5, pady=5)
         row_index += 1
         
+        # --- Stock Figures (two per row, under the details and the image) ---
+        stock_frame = Frame(main_frame, padx=10, pady=5, bg="white", bd=2, relief=tk.GROOVE)
+        stock_frame.grid(row=3, column=0, columnspan=3, padx=10, pady=(0, 10), sticky='ew')
+        stock_frame.grid_columnconfigure(1, weight=1)
+        stock_frame.grid_columnconfigure(3, weight=1)
+        
+        # Current Quantity (Highlighted for enquiry)
+        Label(stock_frame, text="Current Stock:", font=("Arial", 12, "bold"), bg="white").grid(row=0, column=0, sticky='w', padx=5, pady=5)
+        self.current_qty_label = Label(stock_frame, text="N/A", font=("Arial", 14, "bold"), bg="white", fg="#004d99", anchor='w')
+        self.current_qty_label.grid(row=0, column=1, sticky='w', padx=5, pady=5)
+        
+        # Held for open work orders, and what is left to promise
+        Label(stock_frame, text="Reserved:", font=("Arial", 12, "bold"), bg="white").grid(row=0, column=2, sticky='w', padx=5, pady=5)
+        self.reserved_label = Label(stock_frame, text="N/A", font=("Arial", 12), bg="white", anchor='w')
+        self.reserved_label.grid(row=0, column=3, sticky='w', padx=5, pady=5)
+        
+        Label(stock_frame, text="Available to Promise:", font=("Arial", 12, "bold"), bg="white").grid(row=1, column=0, sticky='w', padx=5, pady=5)
+        self.available_label = Label(stock_frame, text="N/A", font=("Arial", 14, "bold"), bg="white", fg="#004d99", anchor='w')
+        self.available_label.grid(row=1, column=1, sticky='w', padx=5, pady=5)
+        
+        # ABC class: stock value + issue velocity (see abc_classification.py)
+        Label(stock_frame, text="Class:", font=("Arial", 12, "bold"), bg="white").grid(row=1, column=2, sticky='w', padx=5, pady=5)
+        self.class_label = Label(stock_frame, text="N/A", font=("Arial", 12), bg="white", anchor='w', wraplength=200, justify=tk.LEFT)
+        self.class_label.grid(row=1, column=3, sticky='w', padx=5, pady=5)
+        
+        # Suggested by the consumption_analytics batch job (long text, so it gets the whole row)
+        Label(stock_frame, text="Reorder Point:", font=("Arial", 12, "bold"), bg="white").grid(row=2, column=0, sticky='w', padx=5, pady=5)
+        self.reorder_label = Label(stock_frame, text="N/A", font=("Arial", 12), bg="white", anchor='w')
+        self.reorder_label.grid(row=2, column=1, columnspan=3, sticky='w', padx=5, pady=5)
+        
         # --- Image Preview (Right side) ---
         image_frame = Frame(main_frame, padx=5, pady=5, bg="#f0f0f0")
-        image_frame.grid(row=2, column=2, padx=10, pady=15, sticky='n')
+        image_frame.grid(row=2, column=2, padx=10, pady=10, sticky='n')
         
         Label(image_frame, text="Part Image", font=("Arial", 10, "italic"), bg="#f0f0f0").pack(pady=5)
         self.photo_preview_label = Label(image_frame, text="Image Preview", 
@@ -121,11 +160,22 @@ class StockEnquiryWindow:
         Button(footer_frame, text="Back Page", command=self._back_to_inventory_menu, 
                font=("Arial", 14, "bold"), bg="#ff8566", fg="black", padx=10).pack(side=tk.RIGHT, padx=20)
 
+    def reset(self):
+        """Puts the window back to its freshly-opened state (called each time it is shown)."""
+        self.entry_part_num.delete(0, 'end')
+        self._clear_details()
+        self.entry_part_num.focus_set()
+
     def _clear_details(self):
         """Resets all detail labels and state."""
         self.description_label.config(text="N/A")
         self.unit_price_label.config(text="N/A")
         self.current_qty_label.config(text="N/A", fg="#004d99")
+        self.locations_label.config(text="N/A")
+        self.reserved_label.config(text="N/A")
+        self.available_label.config(text="N/A", fg="#004d99")
+        self.reorder_label.config(text="N/A", fg="black")
+        self.class_label.config(text="N/A")
         
         # Reset image preview 
         self.photo_preview_label.config(text="Image Preview", image='', compound=tk.NONE, width=math.ceil(PREVIEW_W / 8), height=math.ceil(PREVIEW_H / 16))
@@ -133,6 +183,7 @@ class StockEnquiryWindow:
 
         self.current_part_num = None
 
+    @perf_metrics.timed('ui.image_display')
     def _display_image(self, image_path):
         """Loads, resizes, and displays an image from a given path."""
         
@@ -203,9 +254,25 @@ class StockEnquiryWindow:
             qty = int(part_data.get('Quantity', 0))
             self.current_qty_label.config(text=f"{qty:,}", fg="green")
             
+            # Locations holding stock, default location first
+            locations = part_data.get('Locations', {})
+            ordered = [code for code in inventory_data.list_locations() if code in locations]
+            ordered += sorted(code for code in locations if code not in ordered)
+            self.locations_label.config(
+                text="\n".join(f"{code}: {locations[code]:,}" for code in ordered) or "No stock at any location"
+            )
+            
+            # Reserved units and available-to-promise are kept in the cache, no DB call
+            available = int(part_data.get('Available', qty))
+            self.reserved_label.config(text=f"{int(part_data.get('ReservedQty', 0)):,}")
+            self.available_label.config(text=f"{available:,}", fg="green" if available > 0 else "red")
+            self._show_reorder_point(part_num, available)
+            self._show_class(part_num)
+            
             # Display image
             image_path = part_data.get('ImagePath', '')
             self._display_image(image_path)
+            perf_metrics.measure_redraw(self.window, 'ui.search_redraw')
             
             # Set state for processing
             self.current_part_num = part_num
@@ -215,22 +282,36 @@ class StockEnquiryWindow:
             self._clear_details()
             self.entry_part_num.focus_set()
 
+    def _show_reorder_point(self, part_num, available):
+        """Shows the suggested reorder point (the table is read once, then looked up in memory)."""
+        reorder = consumption_analytics.get_reorder_point(part_num)
+        if reorder is None:
+            self.reorder_label.config(text="No demand history", fg="black")
+            return
+        period = {1: "day", 7: "week"}.get(reorder['PeriodDays'], f"{reorder['PeriodDays']} days")
+        text = f"{reorder['ReorderPoint']:,} (forecast {reorder['ForecastDemand']:,.1f} per {period})"
+        if available <= reorder['ReorderPoint']:
+            self.reorder_label.config(text=text + " - reorder now", fg="red")
+        else:
+            self.reorder_label.config(text=text, fg="green")
+
+    def _show_class(self, part_num):
+        """Shows the part's ABC class from the last background classification."""
+        if abc_classification.classification() is None:
+            self.class_label.config(text="Calculating...")
+            return
+        part_class = abc_classification.get_class(part_num)
+        if part_class is None:
+            self.class_label.config(text="No data")
+            return
+        self.class_label.config(
+            text=f"{part_class['Class']} (value {part_class['ValueClass']}, velocity {part_class['VelocityClass']})"
+        )
+
     def _back_to_inventory_menu(self):
-        """Closes this window and returns focus to the parent Inventory Management window."""
-        self.window.destroy()
-        
-        if self.inventory_window_instance and self.inventory_window_instance.inventory_window:
-            self.inventory_window_instance.inventory_window.deiconify()
+        """Hides this window and returns focus to the parent Inventory Management window."""
+        self.inventory_window_instance.return_to_inventory_menu(self.window)
 
     def _go_to_menu(self):
-        """Closes all sub-windows and returns to the main application menu."""
-        
-        # 1. Close this current window
-        self.window.destroy()
-        
-        # 2. Call the parent InventoryManagementWindow instance's method to close itself 
-        if hasattr(self.inventory_window_instance, 'return_to_main_menu'):
-            self.inventory_window_instance.return_to_main_menu()
-        else:
-            messagebox.showerror("Error", "Could not return to main menu. Parent window navigation method missing.")
-            self.master_root.deiconify()
\ No newline at end of file
+        """Hides this window and returns to the main application menu."""
+        self.inventory_window_instance.return_to_main_menu_from_sub(self.window)
@@ -1,7 +1,7 @@
 # Function for the Stock Issued button
 
 import tkinter as tk
-from tkinter import Toplevel, Label, Entry, Button, Frame, messagebox, filedialog, ttk
+from tkinter import Toplevel, Label, Entry, Button, Frame, filedialog, ttk
 from PIL import Image, ImageTk 
 import os
 import shutil
@@ -9,12 +9,20 @@ import math
 
 # Import data handling functions and constants
 import inventory_data 
+import notifications
+import perf_metrics
+from scanner_stock import ScanStockMixin, parse_quantity
 
 # Define the fixed pixel dimensions for the image preview area 
 PREVIEW_W = 250
 PREVIEW_H = 200
 
-class StockIssuedWindow:
+class StockIssuedWindow(ScanStockMixin):
+    # Scanner mode, the part display and the quantity debounce come from ScanStockMixin
+    SCAN_VERB = 'issued'
+    SCAN_SIGN = '-'
+    post_movement = staticmethod(inventory_data.issue_stock_quantity)
+
     def __init__(self, master_root, inventory_window_instance):
         """Initializes the window with references to the main root and the inventory manager."""
         self.master_root = master_root
@@ -25,6 +33,9 @@ class StockIssuedWindow:
         self.current_part_num = None
         self.preview_image_ref = None   
         self.is_valid_part = False
+        self._validate_after_id = None # Pending debounced validation
+        self._button_state = tk.DISABLED # Last state applied to the Update button
+        self._remaining_text = None # Last "would leave" preview shown
         
         # Entry widget references
         self.entry_part_num = None
@@ -34,6 +45,7 @@ class StockIssuedWindow:
         self.description_label = None
         self.unit_price_label = None
         self.current_qty_label = None
+        self.location_qty_label = None
         self.photo_preview_label = None
         
         # Buttons
@@ -43,8 +55,9 @@ class StockIssuedWindow:
         # Create Toplevel window
         self.window = Toplevel(master_root)
         self.window.title("Stock Issued") # Changed title
-        self.center_window(self.window, 650, 650)
-        self.window.grab_set() # Modal behavior
+        self.center_window(self.window, 650, 700)
+        # Modal grab is taken by the window manager each time the window is shown
+        self.window.protocol("WM_DELETE_WINDOW", self._back_to_inventory_menu)
 
         self._create_widgets()
         self._set_form_state(tk.DISABLED)
@@ -81,6 +94,9 @@ class StockIssuedWindow:
                                  font=("Arial", 12, "bold"), bg="#a3d9ff", fg="black")
         self.search_btn.pack(side=tk.LEFT, padx=10)
         
+        # Scanner mode switch and per-scan quantity (ScanStockMixin)
+        self._create_scanner_controls(search_frame)
+        
         # --- Details Frame (Organized display of fetched data) ---
         details_frame = Frame(main_frame, padx=10, pady=10, bg="white", bd=2, relief=tk.GROOVE)
         details_frame.grid(row=2, column=0, columnspan=2, padx=10, pady=15, sticky='nsew')
@@ -106,6 +122,12 @@ class StockIssuedWindow:
         self.current_qty_label.grid(row=row_index, column=1, sticky='w', padx=5, pady=5)
         row_index += 1
         
+        # Stock at the selected location (issues come out of this)
+        Label(details_frame, text="At Location:", font=("Arial", 12, "bold"), bg="white").grid(row=row_index, column=0, sticky='w', padx=5, pady=5)
+        self.location_qty_label = Label(details_frame, text="N/A", font=("Arial", 12), bg="white", anchor='w')
+        self.location_qty_label.grid(row=row_index, column=1, sticky='w', padx=5, pady=5)
+        row_index += 1
+        
         # --- Image Preview (Right side) ---
         image_frame = Frame(main_frame, padx=5, pady=5, bg="#f0f0f0")
         image_frame.grid(row=2, column=2, padx=10, pady=15, sticky='n')
@@ -120,13 +142,27 @@ class StockIssuedWindow:
         qty_frame = Frame(main_frame, bg="#f0f0f0")
         qty_frame.grid(row=3, column=0, columnspan=3, pady=20)
         
+        # Location the stock is issued from
+        Label(qty_frame, text="From:", font=("Arial", 14, "bold"), bg="#f0f0f0").pack(side=tk.LEFT, padx=(10, 2))
+        self.location_var = tk.StringVar(value=inventory_data.DEFAULT_LOCATION)
+        self.location_combo = ttk.Combobox(qty_frame, textvariable=self.location_var, state='readonly', 
+                                           width=10, font=("Arial", 12))
+        self.location_combo.pack(side=tk.LEFT, padx=5)
+        self.location_combo.bind("<<ComboboxSelected>>", self._on_location_changed)
+        
         Label(qty_frame, text="Quantity Issued:", font=("Arial", 14, "bold"), bg="#f0f0f0").pack(side=tk.LEFT, padx=10) # Changed label text
         
-        self.entry_quantity = Entry(qty_frame, width=15, font=("Arial", 14), bd=2, relief=tk.RIDGE, justify=tk.CENTER)
+        self.quantity_var = tk.StringVar()
+        self.entry_quantity = Entry(qty_frame, width=15, font=("Arial", 14), bd=2, relief=tk.RIDGE, justify=tk.CENTER,
+                                    textvariable=self.quantity_var)
         self.entry_quantity.pack(side=tk.LEFT, padx=10)
         
+        # Live preview of the stock left after the issue (from the cache, no DB call)
+        self.remaining_label = Label(qty_frame, text="", font=("Arial", 12, "italic"), bg="#f0f0f0", width=24, anchor='w')
+        self.remaining_label.pack(side=tk.LEFT, padx=10)
+        
         # --- Action Button ---
-        self.issue_stock_btn = Button(main_frame, text="Update", command=self._issue_stock_from_inventory, # Changed command
+        self.issue_stock_btn = self.update_btn = Button(main_frame, text="Update", command=self._issue_stock_from_inventory, # Changed command
                                      font=("Arial", 16, "bold"), bg="#4CAF50", fg="white", 
                                      state=tk.DISABLED, padx=20, pady=10)
         self.issue_stock_btn.grid(row=4, column=0, columnspan=3, pady=30)
@@ -143,7 +179,7 @@ class StockIssuedWindow:
 
         # Set up a list of widgets to be controlled
         self.editable_widgets = [self.entry_quantity, self.issue_stock_btn]
-        self.entry_quantity.bind("<KeyRelease>", self._validate_quantity_input)
+        self.quantity_var.trace_add('write', self._on_quantity_changed)
         
         # Initialize display
         self._clear_details()
@@ -152,12 +188,24 @@ class StockIssuedWindow:
         """Helper to enable/disable widgets."""
         for widget in self.editable_widgets:
             widget.config(state=state)
+        self._button_state = state
+
+    def reset(self):
+        """Puts the window back to its freshly-opened state (called each time it is shown)."""
+        self.entry_part_num.delete(0, 'end')
+        # Locations may have been added since the window was built
+        self.location_combo.config(values=inventory_data.list_locations())
+        if self.location_var.get() not in self.location_combo['values']:
+            self.location_var.set(inventory_data.DEFAULT_LOCATION)
+        self._clear_details()
+        self.entry_part_num.focus_set()
 
     def _clear_details(self):
         """Resets all detail labels and state."""
         self.description_label.config(text="N/A")
         self.unit_price_label.config(text="N/A")
         self.current_qty_label.config(text="N/A", fg="red")
+        self.location_qty_label.config(text="N/A", fg="black")
         
         # Reset image preview 
         self.photo_preview_label.config(text="Image Preview", image='', compound=tk.NONE, width=math.ceil(PREVIEW_W / 8), height=math.ceil(PREVIEW_H / 16))
@@ -168,7 +216,9 @@ class StockIssuedWindow:
         self.is_valid_part = False
         self.entry_quantity.delete(0, 'end')
         self._set_form_state(tk.DISABLED)
+        self._set_remaining_preview("", "black")
 
+    @perf_metrics.timed('ui.image_display')
     def _display_image(self, image_path):
         """Loads, resizes, and displays an image from a given path."""
         
@@ -218,111 +268,116 @@ class StockIssuedWindow:
         self._set_form_state(tk.DISABLED)
 
         if not part_num:
-            messagebox.showwarning("Input Missing", "Please enter a Part Number to search.")
+            notifications.warning("Input Missing", "Please enter a Part Number to search.")
             return
 
         # Fetch data from the database/dataframe
         part_data = inventory_data.get_part_data(part_num)
         
         if part_data and 'Description' in part_data:
-            # Update detail labels
-            self.description_label.config(text=part_data['Description'])
-            self.unit_price_label.config(text=part_data['UnitPrice'])
-            
-            # The quantity is an integer, display it clearly
-            qty = int(part_data.get('Quantity', 0))
-            self.current_qty_label.config(text=str(qty), fg="green")
-            
-            # Display image
-            image_path = part_data.get('ImagePath', '')
-            self._display_image(image_path)
-            
-            # Set state for processing
-            self.current_part_num = part_num
-            self.is_valid_part = True
-            self._set_form_state(tk.NORMAL)
+            self._show_part_details(part_num, part_data)
             self.entry_quantity.focus_set()
 
         else:
-            messagebox.showerror("Part Not Found", f"Part Number '{part_num}' not found in inventory.")
+            notifications.error("Part Not Found", f"Part Number '{part_num}' not found in inventory.")
             self._clear_details()
             self.entry_part_num.focus_set()
 
+    def _show_location_quantity(self, part_num):
+        try:
+            location_qty = inventory_data.INVENTORY_CACHE.get_location_quantity(part_num, self.location_var.get())
+        except KeyError:
+            self.location_qty_label.config(text="N/A", fg="black")
+            return
+        self.location_qty_label.config(text=f"{location_qty} ({self.location_var.get()})", 
+                                       fg="green" if location_qty > 0 else "red")
+
+    def _on_location_changed(self, event=None):
+        """Another location was picked: show its stock and re-check the quantity against it."""
+        if self.is_valid_part:
+            self._show_location_quantity(self.current_part_num)
+            self._validate_quantity_input()
 
-    def _validate_quantity_input(self, event=None):
-        """Ensures the quantity input is a positive integer."""
+    def _set_remaining_preview(self, text, color):
+        if text != self._remaining_text:
+            self.remaining_label.config(text=text, fg=color)
+            self._remaining_text = text
+
+    def _validate_quantity_input(self):
+        """Ensures the quantity input is a positive integer and previews the stock it would leave."""
+        self._validate_after_id = None
         if not self.is_valid_part:
-            self._set_form_state(tk.DISABLED)
             return
 
-        qty_str = self.entry_quantity.get().strip()
-        
-        if not qty_str:
-            self.issue_stock_btn.config(state=tk.DISABLED)
+        qty = parse_quantity(self.quantity_var.get())
+        if qty is None:
+            self._set_button_state(tk.DISABLED)
+            self._set_remaining_preview("", "black")
             return
 
         try:
-            qty = int(qty_str)
-            if qty > 0:
-                self.issue_stock_btn.config(state=tk.NORMAL)
-            else:
-                # Quantity must be positive
-                self.issue_stock_btn.config(state=tk.DISABLED)
-        except ValueError:
-            # If it's not a valid integer
-            self.issue_stock_btn.config(state=tk.DISABLED)
+            location = self.location_var.get()
+            remaining = inventory_data.INVENTORY_CACHE.get_location_quantity(self.current_part_num, location) - qty
+            # Units reserved for work orders cannot be issued from here
+            available = inventory_data.INVENTORY_CACHE.get_available(self.current_part_num)
+        except KeyError:
+            # Deleted on another workstation since the search
+            self._set_button_state(tk.DISABLED)
+            self._set_remaining_preview("Part no longer in inventory", "red")
+            return
+        if qty > available and remaining >= 0:
+            self._set_button_state(tk.DISABLED)
+            self._set_remaining_preview(f"Only {max(available, 0):,} unreserved", "red")
+        elif remaining < 0:
+            self._set_button_state(tk.DISABLED)
+            self._set_remaining_preview(f"Only {remaining + qty:,} at {location}", "red")
+        else:
+            self._set_button_state(tk.NORMAL)
+            self._set_remaining_preview(f"Would leave {remaining:,} at {location}", "green")
 
     def _issue_stock_from_inventory(self):
         """Processes the stock deduction and updates the database."""
         if not self.is_valid_part or not self.current_part_num:
-            messagebox.showerror("Validation Error", "Please search and select a valid part number first.")
+            notifications.error("Validation Error", "Please search and select a valid part number first.")
             return
 
         part_num = self.current_part_num
         quantity_issued = self.entry_quantity.get().strip()
         
         if not quantity_issued:
-            messagebox.showwarning("Input Missing", "Please enter the quantity issued.")
+            notifications.warning("Input Missing", "Please enter the quantity issued.")
             return
 
         # Call the new data function to handle subtraction and stock check
-        result_message = inventory_data.issue_stock_quantity(part_num, quantity_issued)
+        result_message = inventory_data.issue_stock_quantity(part_num, quantity_issued, self.location_var.get())
 
+        # Results go to the notification bus (non-modal banners) so the operator can carry on
         if result_message.startswith("Error"):
-            messagebox.showerror("Update Error", result_message)
+            notifications.error("Update Error", result_message)
         elif result_message.startswith("Stock issued successfully"): # Updated success message
-            messagebox.showinfo("Stock Update", result_message)
+            notifications.info("Stock Update", result_message)
             
             # 1. Update the displayed current quantity label by re-fetching
             updated_part_data = inventory_data.get_part_data(part_num)
             if updated_part_data:
                 # Stock should be non-negative, so use green color
                 self.current_qty_label.config(text=str(updated_part_data['Quantity']), fg="green")
+                self._show_location_quantity(part_num)
+                perf_metrics.measure_redraw(self.window, 'ui.stock_redraw')
             
             # 2. Clear the issued quantity input and disable the button 
             self.entry_quantity.delete(0, 'end')
-            self.issue_stock_btn.config(state=tk.DISABLED)
+            self._set_button_state(tk.DISABLED)
+            self._set_remaining_preview("", "black")
 
             # 3. Refresh the inventory table in the main inventory window
             if hasattr(self.inventory_window_instance, 'refresh_inventory_table'):
                 self.inventory_window_instance.refresh_inventory_table()
 
     def _back_to_inventory_menu(self):
-        """Closes this window and returns focus to the parent Inventory Management window."""
-        self.window.destroy()
-        
-        if self.inventory_window_instance and self.inventory_window_instance.inventory_window:
-            self.inventory_window_instance.inventory_window.deiconify()
+        """Hides this window and returns focus to the parent Inventory Management window."""
+        self.inventory_window_instance.return_to_inventory_menu(self.window)
 
     def _go_to_menu(self):
-        """Closes all sub-windows and returns to the main application menu."""
-        
-        # 1. Close this current window
-        self.window.destroy()
-        
-        # 2. Call the parent InventoryManagementWindow instance's method to close itself 
-        if hasattr(self.inventory_window_instance, 'return_to_main_menu'):
-            self.inventory_window_instance.return_to_main_menu()
-        else:
-            messagebox.showerror("Error", "Could not return to main menu. Parent window navigation method missing.")
-            self.master_root.deiconify()
\ No newline at end of file
+        """Hides this window and returns to the main application menu."""
+        self.inventory_window_instance.return_to_main_menu_from_sub(self.window)
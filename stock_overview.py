@@ -0,0 +1,167 @@
+# -------------------------------------------#
+# stock_overview.py - Inventory grid with ABC classes and a dead-stock filter
+#
+# Lists the catalogue by stock value with each part's class from
+# abc_classification. Only the first MAX_ROWS matching parts are put into the
+# Treeview (filtering and sorting happen on the DataFrame, not in Tk).
+# -------------------------------------------#
+
+import tkinter as tk
+from tkinter import Toplevel, Label, Entry, Button, Frame, Checkbutton, ttk
+
+import pandas as pd
+
+import abc_classification
+import inventory_data
+import perf_metrics
+
+# Parts shown at once; narrow the filter to see the rest
+MAX_ROWS = 1000
+# Retry interval while the first classification is still being calculated
+PENDING_RETRY_MS = 1000
+
+COLUMNS = ('description', 'quantity', 'available', 'value', 'class', 'issues', 'last_movement')
+HEADINGS = ('Description', 'Qty', 'Available', 'Stock Value', 'Class', 'Issues (12 mo)', 'Last Movement')
+WIDTHS = (220, 70, 70, 100, 60, 90, 130)
+CLASS_FILTERS = ('All', 'A', 'B', 'C')
+
+
+class InventoryOverviewWindow:
+    def __init__(self, master_root, inventory_window_instance):
+        """Builds the grid window (shown and hidden by the window manager)."""
+        self.master_root = master_root
+        self.inventory_window_instance = inventory_window_instance
+        self._retry_after_id = None
+
+        self.window = Toplevel(master_root)
+        self.window.title("Inventory Overview")
+        self.window.geometry("960x600")
+        self.window.config(bg="white")
+        self.window.columnconfigure(0, weight=1)
+        self.window.rowconfigure(2, weight=1)
+        # Modal grab is taken by the window manager each time the window is shown
+        self.window.protocol("WM_DELETE_WINDOW", self._back_to_inventory_menu)
+
+        self._create_widgets()
+
+    def _create_widgets(self):
+        Label(self.window, text="Inventory Overview", font=("Arial", 18, "bold"),
+              bg="white", fg="#004d99").grid(row=0, column=0, pady=10)
+
+        # --- Filters ---
+        filter_frame = Frame(self.window, bg="white")
+        filter_frame.grid(row=1, column=0, sticky="ew", padx=10)
+
+        Label(filter_frame, text="Part Number starts with:", bg="white").pack(side=tk.LEFT)
+        self.prefix_entry = Entry(filter_frame, width=14)
+        self.prefix_entry.pack(side=tk.LEFT, padx=5)
+        self.prefix_entry.bind("<Return>", lambda event: self.refresh())
+
+        Label(filter_frame, text="Value class:", bg="white").pack(side=tk.LEFT, padx=(10, 0))
+        self.class_var = tk.StringVar(value='All')
+        class_combo = ttk.Combobox(filter_frame, textvariable=self.class_var, values=CLASS_FILTERS,
+                                   state='readonly', width=5)
+        class_combo.pack(side=tk.LEFT, padx=5)
+        class_combo.bind("<<ComboboxSelected>>", lambda event: self.refresh())
+
+        self.dead_only_var = tk.BooleanVar(value=False)
+        Checkbutton(filter_frame, text="Dead stock only, idle months:", variable=self.dead_only_var,
+                    command=self.refresh, bg="white").pack(side=tk.LEFT, padx=(10, 0))
+        self.dead_months_var = tk.StringVar(value=str(abc_classification.DEFAULT_DEAD_MONTHS))
+        tk.Spinbox(filter_frame, from_=1, to=120, width=4, textvariable=self.dead_months_var,
+                   command=self.refresh).pack(side=tk.LEFT, padx=5)
+
+        Button(filter_frame, text="Apply", command=self.refresh, bg="#a3d9ff").pack(side=tk.LEFT, padx=10)
+
+        # --- Grid ---
+        grid_frame = Frame(self.window, bg="white")
+        grid_frame.grid(row=2, column=0, sticky="nsew", padx=10, pady=5)
+        grid_frame.columnconfigure(0, weight=1)
+        grid_frame.rowconfigure(0, weight=1)
+
+        self.tree = ttk.Treeview(grid_frame, columns=COLUMNS, show='tree headings')
+        self.tree.heading('#0', text="Part Number")
+        self.tree.column('#0', width=120, anchor='w')
+        for column, heading, width in zip(COLUMNS, HEADINGS, WIDTHS):
+            self.tree.heading(column, text=heading)
+            self.tree.column(column, width=width, anchor='w' if column == 'description' else 'e')
+        self.tree.tag_configure('dead', foreground="#c62828")
+        scrollbar = ttk.Scrollbar(grid_frame, orient='vertical', command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.grid(row=0, column=0, sticky="nsew")
+        scrollbar.grid(row=0, column=1, sticky="ns")
+
+        # --- Footer ---
+        footer_frame = Frame(self.window, bg="#e0e0e0", pady=5)
+        footer_frame.grid(row=3, column=0, sticky="ew")
+        self.status_label = Label(footer_frame, text="", bg="#e0e0e0", font=("Arial", 10))
+        self.status_label.pack(side=tk.LEFT, padx=20)
+        Button(footer_frame, text="Back Page", command=self._back_to_inventory_menu,
+               font=("Arial", 12, "bold"), bg="#ff8566", fg="black", padx=10).pack(side=tk.RIGHT, padx=20)
+
+    def reset(self):
+        """Called each time the window is shown: reloads the grid with the current filters."""
+        self.refresh()
+
+    def _filtered(self):
+        """Returns the matching classification rows (highest stock value first), or None while pending."""
+        if self.dead_only_var.get():
+            try:
+                months = max(1, int(self.dead_months_var.get()))
+            except ValueError:
+                months = abc_classification.DEFAULT_DEAD_MONTHS
+            result = abc_classification.dead_stock(months)
+        else:
+            result = abc_classification.classification()
+            if result is not None:
+                result = result.sort_values('Value', ascending=False)
+        if result is None:
+            return None
+
+        prefix = self.prefix_entry.get().strip()
+        if prefix:
+            result = result[result.index.str.startswith(prefix)]
+        if self.class_var.get() != 'All':
+            result = result[result['ValueClass'] == self.class_var.get()]
+        return result
+
+    @perf_metrics.timed('ui.overview_refresh')
+    def refresh(self):
+        """Redraws the grid from the cached classification (no DB access on this thread)."""
+        if self._retry_after_id is not None:
+            self.window.after_cancel(self._retry_after_id)
+            self._retry_after_id = None
+        self.tree.delete(*self.tree.get_children())
+
+        result = self._filtered()
+        if result is None:
+            self.status_label.config(text="Calculating classification...")
+            self._retry_after_id = self.window.after(PENDING_RETRY_MS, self.refresh)
+            return
+
+        shown = result.head(MAX_ROWS)
+        cache = inventory_data.INVENTORY_CACHE
+        descriptions = cache.to_frame()['Description'].reindex(shown.index)
+        dead = self.dead_only_var.get()
+        for part_num, row in shown.iterrows():
+            part_data = cache.get(part_num)
+            if part_data is None:
+                continue # Deleted since the classification was built
+            last = row['LastMovement']
+            self.tree.insert('', 'end', iid=part_num, text=part_num, tags=('dead',) if dead else (), values=(
+                descriptions.get(part_num, ''),
+                f"{int(row['Quantity']):,}",
+                f"{part_data['Available']:,}",
+                f"${row['Value']:,.2f}",
+                row['Class'],
+                f"{int(row['IssueCount']):,}",
+                "Never" if pd.isna(last) else last.strftime('%Y-%m-%d %H:%M'),
+            ))
+        more = f" (showing the first {MAX_ROWS:,})" if len(result) > MAX_ROWS else ""
+        self.status_label.config(text=f"{len(result):,} part(s){more}")
+
+    def _back_to_inventory_menu(self):
+        if self._retry_after_id is not None:
+            self.window.after_cancel(self._retry_after_id)
+            self._retry_after_id = None
+        self.inventory_window_instance.return_to_inventory_menu(self.window)
@@ -0,0 +1,194 @@
+# -------------------------------------------#
+# stock_queue.py - Write-coalescing queue for high-frequency stock movements
+#
+# Receipts and issues are validated against the cache immediately, then held
+# for a short window. A background thread flushes the window in ONE transaction:
+# one delta UPDATE per part and per (part, location) (all movements coalesced)
+# plus one ledger row per movement. Callers are only acknowledged after that commit, so every
+# acknowledged movement is durable.
+#
+# Usage:
+#   queue = StockMovementQueue(flush_interval=0.2, max_batch=500)
+#   message = queue.receive('P-1001', 10)      # blocks until committed
+#   future = queue.submit_issue('P-1001', 2, 'BIN-A')  # or wait on the Future yourself
+#   queue.close()
+# -------------------------------------------#
+
+import threading
+import time
+from concurrent.futures import Future
+
+import inventory_data
+
+DEFAULT_FLUSH_INTERVAL = 0.2   # seconds a movement may wait for others to join its batch
+DEFAULT_MAX_BATCH = 500        # movements per transaction
+
+
+class StockMovementQueue:
+    def __init__(self, flush_interval=DEFAULT_FLUSH_INTERVAL, max_batch=DEFAULT_MAX_BATCH):
+        """Starts the background flush thread."""
+        self.flush_interval = flush_interval
+        self.max_batch = max(1, int(max_batch))
+
+        self._cond = threading.Condition()
+        self._pending = []          # [(PartNumber, delta, MovementType, LocationCode, Future)] in arrival order
+        self._pending_delta = {}    # (PartNumber, LocationCode) -> net delta queued but not yet committed
+        self._pending_part_delta = {}  # PartNumber -> the same, over all locations
+        self._first_pending_at = None
+        self._closed = False
+
+        self.stats = {'flushes': 0, 'movements': 0, 'part_updates': 0, 'failed_flushes': 0}
+
+        self._thread = threading.Thread(target=self._run, name='stock-flush', daemon=True)
+        self._thread.start()
+
+    # --- Submitting ---
+
+    def submit_receipt(self, part_num, quantity_received, location=inventory_data.DEFAULT_LOCATION):
+        """Queues a receipt. Returns a Future resolving to the usual result message."""
+        return self._submit(part_num, quantity_received, inventory_data.MOVEMENT_RECEIPT, location)
+
+    def submit_issue(self, part_num, quantity_issued, location=inventory_data.DEFAULT_LOCATION):
+        """Queues an issue (stock is checked including queued movements). Returns a Future."""
+        return self._submit(part_num, quantity_issued, inventory_data.MOVEMENT_ISSUE, location)
+
+    def receive(self, part_num, quantity_received, location=inventory_data.DEFAULT_LOCATION, timeout=None):
+        """Blocking drop-in for inventory_data.update_stock_quantity."""
+        return self.submit_receipt(part_num, quantity_received, location).result(timeout)
+
+    def issue(self, part_num, quantity_issued, location=inventory_data.DEFAULT_LOCATION, timeout=None):
+        """Blocking drop-in for inventory_data.issue_stock_quantity."""
+        return self.submit_issue(part_num, quantity_issued, location).result(timeout)
+
+    def _submit(self, part_num, quantity, movement_type, location):
+        future = Future()
+        part_num = str(part_num).strip()
+        is_receipt = movement_type == inventory_data.MOVEMENT_RECEIPT
+
+        qty_change, error = inventory_data._parse_stock_change(
+            part_num, quantity, 'received' if is_receipt else 'issued'
+        )
+        if error:
+            future.set_result(error)
+            return future
+        location, error = inventory_data._parse_location(location)
+        if error:
+            future.set_result(error)
+            return future
+        delta = qty_change if is_receipt else -qty_change
+        key = (part_num, location)
+
+        with self._cond:
+            if self._closed:
+                future.set_result("Error: Stock movement queue is closed.")
+                return future
+
+            if not is_receipt:
+                # CRITICAL: stock check must include movements that are queued but not flushed
+                available = (inventory_data.INVENTORY_CACHE.get_location_quantity(part_num, location)
+                             + self._pending_delta.get(key, 0))
+                if qty_change > available:
+                    future.set_result(f"Error: Insufficient stock at {location}. "
+                                      f"Available: {available}, Requested: {qty_change}")
+                    return future
+                # Reserved units stay out of reach, as in inventory_data.issue_stock_quantity
+                available = (inventory_data.INVENTORY_CACHE.get_available(part_num)
+                             + self._pending_part_delta.get(part_num, 0))
+                if qty_change > available:
+                    future.set_result(inventory_data._unreserved_error(part_num, available, qty_change))
+                    return future
+
+            self._pending.append((part_num, delta, movement_type, location, future))
+            self._pending_delta[key] = self._pending_delta.get(key, 0) + delta
+            self._pending_part_delta[part_num] = self._pending_part_delta.get(part_num, 0) + delta
+            if self._first_pending_at is None:
+                self._first_pending_at = time.monotonic()
+            self._cond.notify()
+        return future
+
+    # --- Flushing ---
+
+    def _run(self):
+        """Background thread: waits for a full batch or the flush interval, then flushes."""
+        while True:
+            with self._cond:
+                while not self._closed:
+                    if self._pending:
+                        wait_left = self._first_pending_at + self.flush_interval - time.monotonic()
+                        if len(self._pending) >= self.max_batch or wait_left <= 0:
+                            break
+                        self._cond.wait(wait_left)
+                    else:
+                        self._cond.wait()
+                if self._closed and not self._pending:
+                    return
+
+                batch = self._pending[:self.max_batch]
+                del self._pending[:self.max_batch]
+                self._first_pending_at = time.monotonic() if self._pending else None
+
+            self._flush(batch)
+
+    def _flush(self, batch):
+        """Commits one batch (coalesced deltas + per-movement ledger rows) and resolves its Futures."""
+        deltas = {}
+        for part_num, delta, _, location, _ in batch:
+            deltas[(part_num, location)] = deltas.get((part_num, location), 0) + delta
+        movements = [(part_num, delta, movement_type, location) for part_num, delta, movement_type, location, _ in batch]
+
+        try:
+            ok = inventory_data._execute_transaction(inventory_data._movement_statements(movements))
+        except Exception:
+            ok = False
+
+        new_totals = {}
+        with self._cond:
+            # Cache and pending deltas change together so stock checks never see a gap
+            for key, delta in deltas.items():
+                for pending, pending_key in ((self._pending_delta, key), (self._pending_part_delta, key[0])):
+                    remaining = pending.get(pending_key, 0) - delta
+                    if remaining:
+                        pending[pending_key] = remaining
+                    else:
+                        pending.pop(pending_key, None)
+                if ok:
+                    try:
+                        new_totals[key[0]], _ = inventory_data.INVENTORY_CACHE.adjust_location_quantity(*key, delta)
+                    except KeyError:
+                        new_totals[key[0]] = None  # Part deleted meanwhile
+
+            self.stats['flushes'] += 1
+            self.stats['movements'] += len(batch)
+            self.stats['part_updates'] += len({part_num for part_num, _ in deltas})
+            if not ok:
+                self.stats['failed_flushes'] += 1
+
+        if not ok:
+            for *_, future in batch:
+                future.set_result("Error: Database update failed.")
+            return
+
+        # Report the running quantity after each individual movement
+        part_deltas = {}
+        for (part_num, _), delta in deltas.items():
+            part_deltas[part_num] = part_deltas.get(part_num, 0) + delta
+        running = {p: (total - part_deltas[p]) if total is not None else None for p, total in new_totals.items()}
+        for part_num, delta, movement_type, _, future in batch:
+            if running[part_num] is not None:
+                running[part_num] += delta
+            verb = 'updated' if movement_type == inventory_data.MOVEMENT_RECEIPT else 'issued'
+            future.set_result(f"Stock {verb} successfully. New Quantity: {running[part_num]}")
+
+    def flush(self):
+        """Asks the background thread to flush whatever is queued right now."""
+        with self._cond:
+            if self._pending:
+                self._first_pending_at = time.monotonic() - self.flush_interval
+                self._cond.notify()
+
+    def close(self, timeout=None):
+        """Flushes everything still queued and stops the background thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join(timeout)
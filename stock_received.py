@@ -2,7 +2,7 @@
 
 
 import tkinter as tk
-from tkinter import Toplevel, Label, Entry, Button, Frame, messagebox, filedialog, ttk
+from tkinter import Toplevel, Label, Entry, Button, Frame, filedialog, ttk
 from PIL import Image, ImageTk 
 import os
 import shutil
@@ -10,12 +10,20 @@ import math # Needed for ceiling calculations if desired
 
 # Import data handling functions and constants
 import inventory_data 
+import notifications
+import perf_metrics
+from scanner_stock import ScanStockMixin, parse_quantity
 
 # Define the fixed pixel dimensions for the image preview area 
 PREVIEW_W = 250
 PREVIEW_H = 200
 
-class StockReceivedWindow:
+class StockReceivedWindow(ScanStockMixin):
+    # Scanner mode, the part display and the quantity debounce come from ScanStockMixin
+    SCAN_VERB = 'received'
+    SCAN_SIGN = '+'
+    post_movement = staticmethod(inventory_data.update_stock_quantity)
+
     def __init__(self, master_root, inventory_window_instance):
         """Initializes the window with references to the main root and the inventory manager."""
         self.master_root = master_root
@@ -26,6 +34,8 @@ class StockReceivedWindow:
         self.current_part_num = None
         self.preview_image_ref = None   
         self.is_valid_part = False
+        self._validate_after_id = None # Pending debounced validation
+        self._button_state = tk.DISABLED # Last state applied to the Update button
         
         # Entry widget references
         self.entry_part_num = None
@@ -35,6 +45,7 @@ class StockReceivedWindow:
         self.description_label = None
         self.unit_price_label = None
         self.current_qty_label = None
+        self.location_qty_label = None
         self.photo_preview_label = None
         
         # Buttons
@@ -44,8 +55,9 @@ class StockReceivedWindow:
         # Create Toplevel window
         self.window = Toplevel(master_root)
         self.window.title("Stock Received")
-        self.center_window(self.window, 650, 650)
-        self.window.grab_set() # Modal behavior
+        self.center_window(self.window, 650, 700)
+        # Modal grab is taken by the window manager each time the window is shown
+        self.window.protocol("WM_DELETE_WINDOW", self._back_to_inventory_menu)
 
         self._create_widgets()
         self._set_form_state(tk.DISABLED)
@@ -82,6 +94,9 @@ class StockReceivedWindow:
                                  font=("Arial", 12, "bold"), bg="#a3d9ff", fg="black")
         self.search_btn.pack(side=tk.LEFT, padx=10)
         
+        # Scanner mode switch and per-scan quantity (ScanStockMixin)
+        self._create_scanner_controls(search_frame)
+        
         # --- Details Frame (Organized display of fetched data) ---
         details_frame = Frame(main_frame, padx=10, pady=10, bg="white", bd=2, relief=tk.GROOVE)
         details_frame.grid(row=2, column=0, columnspan=2, padx=10, pady=15, sticky='nsew')
@@ -107,6 +122,12 @@ class StockReceivedWindow:
         self.current_qty_label.grid(row=row_index, column=1, sticky='w', padx=5, pady=5)
         row_index += 1
         
+        # Stock at the selected location (receipts are booked there)
+        Label(details_frame, text="At Location:", font=("Arial", 12, "bold"), bg="white").grid(row=row_index, column=0, sticky='w', padx=5, pady=5)
+        self.location_qty_label = Label(details_frame, text="N/A", font=("Arial", 12), bg="white", anchor='w')
+        self.location_qty_label.grid(row=row_index, column=1, sticky='w', padx=5, pady=5)
+        row_index += 1
+        
         # --- Image Preview (Right side) ---
         image_frame = Frame(main_frame, padx=5, pady=5, bg="#f0f0f0")
         image_frame.grid(row=2, column=2, padx=10, pady=15, sticky='n')
@@ -121,13 +142,23 @@ class StockReceivedWindow:
         qty_frame = Frame(main_frame, bg="#f0f0f0")
         qty_frame.grid(row=3, column=0, columnspan=3, pady=20)
         
+        # Location the stock is received into
+        Label(qty_frame, text="Into:", font=("Arial", 14, "bold"), bg="#f0f0f0").pack(side=tk.LEFT, padx=(10, 2))
+        self.location_var = tk.StringVar(value=inventory_data.DEFAULT_LOCATION)
+        self.location_combo = ttk.Combobox(qty_frame, textvariable=self.location_var, state='readonly', 
+                                           width=10, font=("Arial", 12))
+        self.location_combo.pack(side=tk.LEFT, padx=5)
+        self.location_combo.bind("<<ComboboxSelected>>", self._on_location_changed)
+        
         Label(qty_frame, text="Quantity Received:", font=("Arial", 14, "bold"), bg="#f0f0f0").pack(side=tk.LEFT, padx=10)
         
-        self.entry_quantity = Entry(qty_frame, width=15, font=("Arial", 14), bd=2, relief=tk.RIDGE, justify=tk.CENTER)
+        self.quantity_var = tk.StringVar()
+        self.entry_quantity = Entry(qty_frame, width=15, font=("Arial", 14), bd=2, relief=tk.RIDGE, justify=tk.CENTER,
+                                    textvariable=self.quantity_var)
         self.entry_quantity.pack(side=tk.LEFT, padx=10)
         
         # --- Action Button ---
-        self.add_stock_btn = Button(main_frame, text="Update", command=self._add_stock_to_inventory, 
+        self.add_stock_btn = self.update_btn = Button(main_frame, text="Update", command=self._add_stock_to_inventory, 
                                      font=("Arial", 16, "bold"), bg="#4CAF50", fg="white", 
                                      state=tk.DISABLED, padx=20, pady=10)
         self.add_stock_btn.grid(row=4, column=0, columnspan=3, pady=30)
@@ -144,7 +175,7 @@ class StockReceivedWindow:
 
         # Set up a list of widgets to be controlled
         self.editable_widgets = [self.entry_quantity, self.add_stock_btn]
-        self.entry_quantity.bind("<KeyRelease>", self._validate_quantity_input)
+        self.quantity_var.trace_add('write', self._on_quantity_changed)
         
         # Initialize display
         self._clear_details()
@@ -153,12 +184,24 @@ class StockReceivedWindow:
         """Helper to enable/disable widgets."""
         for widget in self.editable_widgets:
             widget.config(state=state)
+        self._button_state = state
+
+    def reset(self):
+        """Puts the window back to its freshly-opened state (called each time it is shown)."""
+        self.entry_part_num.delete(0, 'end')
+        # Locations may have been added since the window was built
+        self.location_combo.config(values=inventory_data.list_locations())
+        if self.location_var.get() not in self.location_combo['values']:
+            self.location_var.set(inventory_data.DEFAULT_LOCATION)
+        self._clear_details()
+        self.entry_part_num.focus_set()
 
     def _clear_details(self):
         """Resets all detail labels and state."""
         self.description_label.config(text="N/A")
         self.unit_price_label.config(text="N/A")
         self.current_qty_label.config(text="N/A", fg="red")
+        self.location_qty_label.config(text="N/A", fg="black")
         
         # Reset image preview 
         self.photo_preview_label.config(text="Image Preview", image='', compound=tk.NONE, width=math.ceil(PREVIEW_W / 8), height=math.ceil(PREVIEW_H / 16))
@@ -170,6 +213,7 @@ class StockReceivedWindow:
         self.entry_quantity.delete(0, 'end')
         self._set_form_state(tk.DISABLED)
 
+    @perf_metrics.timed('ui.image_display')
     def _display_image(self, image_path):
         """Loads, resizes, and displays an image from a given path.
         
@@ -224,116 +268,86 @@ class StockReceivedWindow:
         self._set_form_state(tk.DISABLED)
 
         if not part_num:
-            messagebox.showwarning("Input Missing", "Please enter a Part Number to search.")
+            notifications.warning("Input Missing", "Please enter a Part Number to search.")
             return
 
         # Fetch data from the database/dataframe
         part_data = inventory_data.get_part_data(part_num)
         
         if part_data and 'Description' in part_data:
-            # Update detail labels
-            self.description_label.config(text=part_data['Description'])
-            self.unit_price_label.config(text=part_data['UnitPrice'])
-            
-            # The quantity is an integer, display it clearly
-            qty = int(part_data.get('Quantity', 0))
-            self.current_qty_label.config(text=str(qty), fg="green")
-            
-            # Display image
-            # Note: ImagePath is expected to be a valid file path or an empty string.
-            image_path = part_data.get('ImagePath', '')
-            self._display_image(image_path)
-            
-            # Set state for processing
-            self.current_part_num = part_num
-            self.is_valid_part = True
-            self._set_form_state(tk.NORMAL)
+            self._show_part_details(part_num, part_data)
             self.entry_quantity.focus_set()
 
         else:
-            messagebox.showerror("Part Not Found", f"Part Number '{part_num}' not found in inventory.")
+            notifications.error("Part Not Found", f"Part Number '{part_num}' not found in inventory.")
             self._clear_details()
             self.entry_part_num.focus_set()
 
+    def _show_location_quantity(self, part_num):
+        try:
+            location_qty = inventory_data.INVENTORY_CACHE.get_location_quantity(part_num, self.location_var.get())
+        except KeyError:
+            self.location_qty_label.config(text="N/A", fg="black")
+            return
+        self.location_qty_label.config(text=f"{location_qty} ({self.location_var.get()})", fg="green")
+
+    def _on_location_changed(self, event=None):
+        """Another location was picked: show the part's stock there."""
+        if self.is_valid_part:
+            self._show_location_quantity(self.current_part_num)
 
-    def _validate_quantity_input(self, event=None):
+    def _validate_quantity_input(self):
         """Ensures the quantity input is a positive integer."""
+        self._validate_after_id = None
         if not self.is_valid_part:
-            self._set_form_state(tk.DISABLED) # Should already be disabled, but ensure safety
-            return
-
-        qty_str = self.entry_quantity.get().strip()
-        
-        if not qty_str:
-            self.add_stock_btn.config(state=tk.DISABLED)
-            return
+            return # The form is already disabled
 
-        try:
-            qty = int(qty_str)
-            if qty > 0:
-                self.add_stock_btn.config(state=tk.NORMAL)
-            else:
-                # Quantity must be positive
-                self.add_stock_btn.config(state=tk.DISABLED)
-        except ValueError:
-            # If it's not a valid integer
-            self.add_stock_btn.config(state=tk.DISABLED)
+        if parse_quantity(self.quantity_var.get()) is not None:
+            self._set_button_state(tk.NORMAL)
+        else:
+            self._set_button_state(tk.DISABLED)
 
     def _add_stock_to_inventory(self):
         """Processes the stock addition and updates the database."""
         if not self.is_valid_part or not self.current_part_num:
-            messagebox.showerror("Validation Error", "Please search and select a valid part number first.")
+            notifications.error("Validation Error", "Please search and select a valid part number first.")
             return
 
         part_num = self.current_part_num
         quantity_received = self.entry_quantity.get().strip()
         
         if not quantity_received:
-            messagebox.showwarning("Input Missing", "Please enter the quantity received.")
+            notifications.warning("Input Missing", "Please enter the quantity received.")
             return
 
         # The data function handles the final conversion and database update
-        result_message = inventory_data.update_stock_quantity(part_num, quantity_received)
+        result_message = inventory_data.update_stock_quantity(part_num, quantity_received, self.location_var.get())
 
+        # Results go to the notification bus (non-modal banners) so the operator can carry on
         if result_message.startswith("Error"):
-            messagebox.showerror("Update Error", result_message)
+            notifications.error("Update Error", result_message)
         elif result_message.startswith("Stock updated successfully"):
-            messagebox.showinfo("Stock Update", result_message)
+            notifications.info("Stock Update", result_message)
             
             # 1. Update the displayed current quantity label by re-fetching
             updated_part_data = inventory_data.get_part_data(part_num)
             if updated_part_data:
                 self.current_qty_label.config(text=str(updated_part_data['Quantity']), fg="green")
+                self._show_location_quantity(part_num)
+                perf_metrics.measure_redraw(self.window, 'ui.stock_redraw')
             
             # 2. Clear the received quantity input and disable the button until a new quantity is entered
             self.entry_quantity.delete(0, 'end')
-            self.add_stock_btn.config(state=tk.DISABLED)
+            self._set_button_state(tk.DISABLED)
 
             # 3. Refresh the inventory table in the main inventory window
             if hasattr(self.inventory_window_instance, 'refresh_inventory_table'):
                 self.inventory_window_instance.refresh_inventory_table()
 
     def _back_to_inventory_menu(self):
-        """Closes this window and returns focus to the parent Inventory Management window."""
-        self.window.destroy()
-        
-        # FIX: Deiconify the parent window (InventoryManagementWindow's Toplevel)
-        if self.inventory_window_instance and self.inventory_window_instance.inventory_window:
-            self.inventory_window_instance.inventory_window.deiconify()
+        """Hides this window and returns focus to the parent Inventory Management window."""
+        self.inventory_window_instance.return_to_inventory_menu(self.window)
 
     def _go_to_menu(self):
-        """Closes all sub-windows and returns to the main application menu."""
-        
-        # 1. Close this current window
-        self.window.destroy()
-        
-        # 2. Call the parent InventoryManagementWindow instance's method to close itself 
-        # and restore the main root. We assume the method is 'return_to_main_menu'.
-        if hasattr(self.inventory_window_instance, 'return_to_main_menu'):
-            # This method should destroy the InventoryManagementWindow Toplevel and deiconify the master_root
-            self.inventory_window_instance.return_to_main_menu()
-        else:
-            # Fallback if the expected method is missing
-            messagebox.showerror("Error", "Could not return to main menu. Parent window navigation method missing.")
-            # Attempt to manually restore root if the parent is still alive
-            self.master_root.deiconify()
\ No newline at end of file
+        """Hides this window and returns to the main application menu."""
+        self.inventory_window_instance.return_to_main_menu_from_sub(self.window)
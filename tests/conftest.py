@@ -0,0 +1,28 @@
+# -------------------------------------------#
+# conftest.py - Shared setup for the unit tests
+#
+# The tests cover pure logic only: no MySQL server and no Tk window is needed.
+# Modules that import NumPy/pandas/mysql.connector are skipped (not faked)
+# when those packages are not installed.
+# -------------------------------------------#
+
+import os
+
+import pytest
+
+# Importing inventory_data must not try to load the cache from MySQL
+os.environ.setdefault('INVENTORY_AUTOLOAD', '0')
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    """A small, empty InventoryCache installed as inventory_data.INVENTORY_CACHE."""
+    pytest.importorskip('numpy')
+    pytest.importorskip('pandas')
+    pytest.importorskip('mysql.connector')
+    import inventory_data
+    from inventory_cache import InventoryCache
+
+    fresh = InventoryCache(capacity=4)
+    monkeypatch.setattr(inventory_data, 'INVENTORY_CACHE', fresh)
+    return fresh
@@ -0,0 +1,39 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('pandas')
+pytest.importorskip('mysql.connector')
+
+from abc_classification import classify_by_share
+
+
+def test_part_crossing_the_a_line_is_still_a():
+    # Shares before each part: 0%, 70%, 90%
+    assert classify_by_share([70, 20, 10]).tolist() == ['A', 'A', 'B']
+
+
+def test_boundaries_are_exclusive():
+    # Shares before each part: 0%, 50%, 80%, 95%, 100%
+    assert classify_by_share([50, 30, 15, 5, 0]).tolist() == ['A', 'A', 'B', 'C', 'C']
+
+
+def test_classes_come_back_in_input_order():
+    assert classify_by_share([10, 70, 20]).tolist() == ['B', 'A', 'A']
+
+
+def test_zero_and_negative_measures_are_c():
+    classes = classify_by_share([0, 100, -5, 0])
+    assert classes.tolist() == ['C', 'A', 'C', 'C']
+
+
+def test_all_zero_total_is_all_c():
+    assert classify_by_share([0, 0, 0]).tolist() == ['C', 'C', 'C']
+    assert classify_by_share([]).tolist() == []
+
+
+def test_custom_shares():
+    assert classify_by_share([40, 30, 20, 10], a_share=0.5, b_share=0.75).tolist() == ['A', 'A', 'B', 'C']
+
+
+def test_result_dtype():
+    assert classify_by_share([1, 2]).dtype == np.dtype('<U1')
@@ -0,0 +1,46 @@
+import pytest
+
+pytest.importorskip('numpy')
+pytest.importorskip('pandas')
+pytest.importorskip('mysql.connector')
+
+from cycle_count import VARIANCE_COLUMNS, _variance_frame
+
+
+@pytest.fixture
+def priced_cache(cache):
+    cache.insert('A', 'Bolt', 2.5, 10, '')
+    cache.insert('B', 'Nut', 10.0, 5, '')
+    return cache
+
+
+def test_variance_is_counted_minus_expected_plus_moved(priced_cache):
+    # 10 expected at the snapshot, 1 received since, 12 counted: one unit over
+    frame = _variance_frame([('A', 10, 12, 1)])
+    assert list(frame.columns) == VARIANCE_COLUMNS
+    row = frame.loc['A']
+    assert (row['Expected'], row['Moved'], row['Counted']) == (10, 1, 12)
+    assert bool(row['IsCounted'])
+    assert row['Variance'] == 1
+    assert row['VarianceValue'] == 2.5
+
+
+def test_uncounted_lines_have_no_variance(priced_cache):
+    frame = _variance_frame([('B', 5, None, -2)])
+    row = frame.loc['B']
+    assert not bool(row['IsCounted'])
+    assert row['Counted'] == 0
+    assert row['Variance'] == 0
+    assert row['VarianceValue'] == 0.0
+
+
+def test_counted_zero_is_a_shortage(priced_cache):
+    frame = _variance_frame([('B', 5, 0, 0)])
+    assert frame.loc['B', 'Variance'] == -5
+    assert frame.loc['B', 'VarianceValue'] == -50.0
+
+
+def test_parts_missing_from_the_cache_are_valued_at_zero(priced_cache):
+    frame = _variance_frame([('A', 10, 9, 0), ('GONE', 3, 1, 0)])
+    assert frame['Variance'].tolist() == [-1, -2]
+    assert frame['VarianceValue'].tolist() == [-2.5, 0.0]
@@ -0,0 +1,108 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('pandas')
+
+from inventory_cache import InventoryCache
+
+
+def _insert(cache, part_num, qty=0, price=1.0):
+    return cache.insert(part_num, f"Part {part_num}", price, qty, f"images/{part_num}.png")
+
+
+def test_delete_frees_the_slot_for_the_next_insert():
+    cache = InventoryCache(capacity=4)
+    slots = [_insert(cache, part) for part in ('A', 'B', 'C')]
+    assert slots == [0, 1, 2]
+
+    assert cache.delete('B') is True
+    assert 'B' not in cache and len(cache) == 2
+    assert _insert(cache, 'D') == 1
+    assert cache.capacity == 4
+
+
+def test_free_list_is_reused_last_in_first_out():
+    cache = InventoryCache(capacity=4)
+    for part in ('A', 'B', 'C'):
+        _insert(cache, part)
+    cache.delete('A')
+    cache.delete('C')
+    assert _insert(cache, 'X') == 2
+    assert _insert(cache, 'Y') == 0
+    # Free list empty again: the next insert takes a new slot
+    assert _insert(cache, 'Z') == 3
+
+
+def test_deleting_twice_or_a_missing_part_is_a_no_op():
+    cache = InventoryCache(capacity=4)
+    _insert(cache, 'A')
+    assert cache.delete('A') is True
+    assert cache.delete('A') is False
+    assert cache.delete('nope') is False
+    # The slot went on the free list once only
+    assert _insert(cache, 'B') == 0
+    assert _insert(cache, 'C') == 1
+
+
+def test_reused_slot_does_not_inherit_old_values():
+    cache = InventoryCache(capacity=4)
+    _insert(cache, 'A', qty=10, price=9.5)
+    cache.adjust_location_quantity('A', 'SHELF-1', 4)
+    cache.adjust_reserved('A', 3)
+    cache.delete('A')
+
+    _insert(cache, 'B', qty=0, price=2.0)
+    row = cache.get('B')
+    assert row['Quantity'] == 0
+    assert row['UnitPrice'] == 2.0
+    assert row['ReservedQty'] == 0
+    assert row['Locations'] == {}
+    assert cache.get('A') is None
+
+
+def test_grow_doubles_capacity_and_keeps_rows():
+    cache = InventoryCache(capacity=2)
+    for qty, part in enumerate(('A', 'B', 'C')):
+        _insert(cache, part, qty=qty)
+    assert cache.capacity == 4
+    assert [cache.get_quantity(part) for part in ('A', 'B', 'C')] == [0, 1, 2]
+    assert cache.get('C')['ImagePath'] == 'images/C.png'
+
+
+def test_duplicate_insert_raises():
+    cache = InventoryCache(capacity=4)
+    _insert(cache, 'A')
+    with pytest.raises(KeyError):
+        _insert(cache, 'A')
+
+
+def test_to_frame_skips_deleted_slots():
+    cache = InventoryCache(capacity=4)
+    for part in ('A', 'B', 'C'):
+        _insert(cache, part)
+    cache.delete('B')
+    assert sorted(cache.to_frame().index) == ['A', 'C']
+    _insert(cache, 'D')
+    assert sorted(cache.to_frame().index) == ['A', 'C', 'D']
+
+
+def test_location_movements_update_the_total():
+    cache = InventoryCache(capacity=4)
+    _insert(cache, 'A', qty=0)
+    assert cache.adjust_location_quantity('A', 'MAIN', 5) == (5, 5)
+    assert cache.adjust_location_quantity('A', 'SHELF-1', 3) == (8, 3)
+    assert cache.adjust_location_quantity('A', 'MAIN', -2) == (6, 3)
+    assert cache.get_location_quantity('A', 'MAIN') == 3
+    assert cache.get_location_quantity('A', 'UNUSED') == 0
+    assert cache.get('A')['Locations'] == {'MAIN': 3, 'SHELF-1': 3}
+
+
+def test_available_many_marks_unknown_parts():
+    cache = InventoryCache(capacity=4)
+    _insert(cache, 'A', qty=10)
+    _insert(cache, 'B', qty=2)
+    cache.adjust_reserved('A', 4)
+    cache.adjust_reserved('B', 5)
+    available, known = cache.available_many(['A', 'Z', 'B'])
+    assert available.tolist() == [6, 0, -3]
+    assert known.tolist() == [True, False, True]
@@ -0,0 +1,50 @@
+import pytest
+
+pytest.importorskip('pandas')
+pytest.importorskip('mysql.connector')
+
+import inventory_data
+from inventory_data import (CHANGE_INSERT_SQL, CHANGE_STOCK, INSTANCE_ID, LEDGER_INSERT_SQL,
+                            LOCATION_DELTA_SQL, STOCK_DELTA_SQL)
+
+MOVEMENTS = [
+    ('B', 5, 'RECEIPT', 'MAIN'),
+    ('A', -2, 'ISSUE', 'MAIN'),
+    ('B', -1, 'ISSUE', 'SHELF-1'),
+    ('B', 2, 'RECEIPT', 'MAIN'),
+]
+
+
+def test_statement_order():
+    statements = inventory_data._movement_statements(MOVEMENTS)
+    assert [sql for sql, _ in statements] == [STOCK_DELTA_SQL, LOCATION_DELTA_SQL, LEDGER_INSERT_SQL, CHANGE_INSERT_SQL]
+
+
+def test_deltas_are_coalesced_and_sorted_by_part():
+    stock, location, _, _ = inventory_data._movement_statements(MOVEMENTS)
+    assert stock[1] == [(-2, 'A'), (6, 'B')]
+    assert location[1] == [('A', 'MAIN', -2), ('B', 'MAIN', 7), ('B', 'SHELF-1', -1)]
+
+
+def test_every_movement_keeps_its_ledger_row():
+    _, _, ledger, _ = inventory_data._movement_statements(MOVEMENTS)
+    assert ledger[1] == MOVEMENTS
+
+
+def test_one_change_row_per_part_and_location():
+    _, _, _, changes = inventory_data._movement_statements(MOVEMENTS)
+    assert changes[1] == [
+        ('A', CHANGE_STOCK, -2, INSTANCE_ID, 'MAIN'),
+        ('B', CHANGE_STOCK, 7, INSTANCE_ID, 'MAIN'),
+        ('B', CHANGE_STOCK, -1, INSTANCE_ID, 'SHELF-1'),
+    ]
+
+
+def test_movements_that_cancel_out_still_lock_the_row():
+    stock, location, ledger, _ = inventory_data._movement_statements([
+        ('A', 3, 'RECEIPT', 'MAIN'),
+        ('A', -3, 'ISSUE', 'MAIN'),
+    ])
+    assert stock[1] == [(0, 'A')]
+    assert location[1] == [('A', 'MAIN', 0)]
+    assert len(ledger[1]) == 2
@@ -0,0 +1,68 @@
+import math
+
+import pytest
+
+import perf_metrics
+from perf_metrics import BUCKET_COUNT, MIN_SECONDS, Histogram, _bucket_index, bucket_upper_bound
+
+
+@pytest.mark.parametrize('seconds, index', [
+    (0.0, 0),
+    (MIN_SECONDS, 0),
+    (1.1e-6, 1),     # [1.0, 1.25) us
+    (1.5e-6, 3),     # [1.5, 1.75) us
+    (2e-6, 5),       # [2.0, 2.5) us: a power of two starts a bucket
+    (3.9e-6, 8),     # [3.5, 4.0) us
+])
+def test_bucket_index_known_values(seconds, index):
+    assert _bucket_index(seconds) == index
+
+
+@pytest.mark.parametrize('seconds', [1.3e-6, 7.7e-6, 4.2e-4, 0.0123, 0.5, 3.0, 42.0])
+def test_duration_lies_inside_its_bucket(seconds):
+    index = _bucket_index(seconds)
+    assert bucket_upper_bound(index - 1) <= seconds < bucket_upper_bound(index)
+
+
+def test_bucket_bounds_grow_by_a_quarter_doubling():
+    bounds = [bucket_upper_bound(i) for i in range(BUCKET_COUNT)]
+    assert all(a < b for a, b in zip(bounds, bounds[1:]))
+    # Four buckets per doubling
+    assert math.isclose(bucket_upper_bound(4), 2 * MIN_SECONDS)
+    assert math.isclose(bucket_upper_bound(8), 4 * MIN_SECONDS)
+
+
+def test_slow_calls_saturate_in_the_last_bucket():
+    assert _bucket_index(10_000.0) == BUCKET_COUNT - 1
+    assert _bucket_index(1e9) == BUCKET_COUNT - 1
+
+
+def test_percentile_is_bucket_bound_capped_at_max():
+    histogram = Histogram()
+    for seconds in (1.1e-6, 1.1e-6, 1.1e-6, 3.9e-6):
+        histogram.add(seconds)
+    assert histogram.count == 4
+    assert histogram.percentile(50) == bucket_upper_bound(1)
+    # The p99 bucket ends at 4 us, but nothing slower than 3.9 us was seen
+    assert histogram.percentile(99) == 3.9e-6
+
+
+def test_empty_histogram_summary():
+    assert Histogram().summary() == {
+        'count': 0, 'mean_ms': 0.0, 'p50_ms': 0.0, 'p95_ms': 0.0, 'p99_ms': 0.0, 'max_ms': 0.0,
+    }
+
+
+def test_record_and_snapshot():
+    perf_metrics.reset()
+    try:
+        perf_metrics.record('b.op', 0.002)
+        perf_metrics.record('a.op', 0.001)
+        perf_metrics.record('a.op', 0.003)
+        snapshot = perf_metrics.snapshot()
+        assert list(snapshot) == ['a.op', 'b.op']
+        assert snapshot['a.op']['count'] == 2
+        assert snapshot['a.op']['mean_ms'] == 2.0
+        assert snapshot['a.op']['max_ms'] == 3.0
+    finally:
+        perf_metrics.reset()
@@ -0,0 +1,74 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('pandas')
+pytest.importorskip('mysql.connector')
+
+from price_update import (MAX_PRICE, MODE_ABSOLUTE, MODE_PERCENT, _parse_change, _price_error,
+                          _selection_error, new_prices)
+
+
+def test_percent_change_is_rounded_to_cents():
+    assert new_prices([10.0, 19.99, 0.0], MODE_PERCENT, 10).tolist() == [11.0, 21.99, 0.0]
+    assert new_prices([4.0], MODE_PERCENT, -50).tolist() == [2.0]
+
+
+def test_absolute_change():
+    assert new_prices([10.0, 0.25], MODE_ABSOLUTE, -0.5).tolist() == [9.5, -0.25]
+    assert new_prices([1.1], MODE_ABSOLUTE, 0.2).tolist() == [1.3]
+
+
+def test_price_error_none_when_all_prices_fit():
+    parts = np.array(['A', 'B'], dtype=object)
+    assert _price_error(parts, np.array([0.0, MAX_PRICE])) is None
+
+
+def test_price_error_lists_negative_prices():
+    parts = np.array(['A', 'B', 'C'], dtype=object)
+    message = _price_error(parts, np.array([1.0, -0.25, -2.0]))
+    assert message == "Error: 2 part(s) would get a negative price: B ($-0.25), C ($-2.00)"
+
+
+def test_price_error_too_large():
+    parts = np.array(['A', 'B'], dtype=object)
+    message = _price_error(parts, np.array([MAX_PRICE + 0.01, 5.0]))
+    assert message.startswith("Error: 1 part(s) would get a price above the maximum: A (")
+
+
+def test_price_error_caps_the_parts_listed():
+    parts = np.array([f"P{i}" for i in range(8)], dtype=object)
+    message = _price_error(parts, np.full(8, -1.0))
+    assert message.startswith("Error: 8 part(s) would get a negative price: P0 ($-1.00)")
+    assert "P4" in message and "P5" not in message
+    assert message.endswith(" and 3 more")
+
+
+@pytest.mark.parametrize('mode, amount, expected', [
+    (MODE_PERCENT, '3.5', 3.5),
+    (MODE_PERCENT, '-10%', -10.0),
+    (MODE_ABSOLUTE, '$1,000.50', 1000.5),
+    (MODE_ABSOLUTE, -0.2, -0.2),
+])
+def test_parse_change_valid(mode, amount, expected):
+    assert _parse_change(mode, amount) == (mode, expected, None)
+
+
+@pytest.mark.parametrize('mode, amount', [
+    ('bogus', 5),
+    (MODE_PERCENT, 'abc'),
+    (MODE_PERCENT, '0'),
+    (MODE_ABSOLUTE, 'nan'),
+    (MODE_PERCENT, '-100'),
+])
+def test_parse_change_invalid(mode, amount):
+    parsed_mode, parsed_amount, error = _parse_change(mode, amount)
+    assert parsed_mode is None and parsed_amount is None
+    assert error.startswith("Error:")
+
+
+def test_selection_needs_a_filter_or_all_parts():
+    assert _selection_error('', '', '', False).startswith("Error:")
+    assert _selection_error('  ', None, '', False).startswith("Error:")
+    assert _selection_error('', '', '', True) is None
+    assert _selection_error('BR-', '', '', False) is None
+    assert _selection_error('', 'Acme', '', False) is None
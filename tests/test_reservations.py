@@ -0,0 +1,54 @@
+import pytest
+
+pd = pytest.importorskip('pandas')
+pytest.importorskip('numpy')
+pytest.importorskip('mysql.connector')
+
+from reservations import _kit_frame, check_kit, kit_available
+
+
+def test_kit_frame_accepts_a_dict():
+    required = _kit_frame({'B': 2, 'A': 1})
+    assert required.to_dict() == {'A': 1, 'B': 2}
+    assert list(required.index) == ['A', 'B']
+
+
+def test_kit_frame_adds_up_repeated_parts():
+    required = _kit_frame([('B', 2), (' A ', 1), ('B', 3)])
+    assert required.to_dict() == {'A': 1, 'B': 5}
+
+
+def test_kit_frame_accepts_a_dataframe():
+    kit = pd.DataFrame({'PartNumber': ['A', 'A'], 'Quantity': [1, '2']})
+    assert _kit_frame(kit).to_dict() == {'A': 3}
+
+
+@pytest.mark.parametrize('qty', [0, -1, 1.5, 'x', None])
+def test_kit_frame_rejects_bad_quantities(qty):
+    with pytest.raises(ValueError, match="Quantity for A"):
+        _kit_frame([('B', 1), ('A', qty)])
+
+
+@pytest.fixture
+def stocked(cache):
+    cache.insert('A', 'Bolt', 1.0, 10, '')
+    cache.insert('B', 'Nut', 1.0, 2, '')
+    cache.insert('C', 'Washer', 1.0, 2, '')
+    cache.adjust_reserved('A', 4)   # 6 available
+    cache.adjust_reserved('C', 5)   # over-reserved: -3 available
+    return cache
+
+
+def test_check_kit_shortfalls(stocked):
+    report = check_kit({'A': 5, 'B': 3, 'C': 1, 'Z': 4})
+    assert list(report.index) == ['A', 'B', 'C', 'Z']
+    assert report['Available'].tolist() == [6, 2, -3, 0]
+    assert report['Known'].tolist() == [True, True, True, False]
+    # Unknown parts and over-reserved parts are short by the whole quantity
+    assert report['Shortfall'].tolist() == [0, 1, 1, 4]
+
+
+def test_kit_available(stocked):
+    assert kit_available({'A': 6, 'B': 2})
+    assert not kit_available({'A': 7})
+    assert not kit_available({'Z': 1})
@@ -0,0 +1,76 @@
+from types import SimpleNamespace
+
+from scanner_input import SCAN_MAX_GAP_MS, ScanDetector
+
+
+class FakeEntry:
+    """Just enough of a Tk Entry for ScanDetector."""
+
+    def __init__(self):
+        self.text = ''
+
+    def bind(self, sequence, func, add=None):
+        pass
+
+    def get(self):
+        return self.text
+
+
+def _key(char, time):
+    return SimpleNamespace(keysym=char, char=char, time=time)
+
+
+def _enter(time, keysym='Return'):
+    return SimpleNamespace(keysym=keysym, char='\r', time=time)
+
+
+def _type(detector, entry, text, start, gap):
+    time = start
+    for char in text:
+        entry.text += char
+        detector._on_key(_key(char, time))
+        time += gap
+    return time - gap
+
+
+def _detector():
+    entry = FakeEntry()
+    scans, enters = [], []
+    return entry, ScanDetector(entry, scans.append, on_enter=enters.append), scans, enters
+
+
+def test_fast_burst_is_a_scan():
+    entry, detector, scans, enters = _detector()
+    last = _type(detector, entry, 'P-1001', start=1000, gap=5)
+    assert detector._on_key(_enter(last + 5)) == "break"
+    assert scans == ['P-1001'] and enters == []
+
+
+def test_slow_typing_is_a_search():
+    entry, detector, scans, enters = _detector()
+    last = _type(detector, entry, 'P-1001', start=1000, gap=SCAN_MAX_GAP_MS + 100)
+    assert detector._on_key(_enter(last + 200)) == "break"
+    assert scans == [] and enters == ['P-1001']
+
+
+def test_typed_prefix_then_burst_is_not_a_scan():
+    # Only part of the field came in the burst
+    entry, detector, scans, enters = _detector()
+    last = _type(detector, entry, 'P-', start=1000, gap=300)
+    last = _type(detector, entry, '1001', start=last + 300, gap=5)
+    detector._on_key(_enter(last + 5))
+    assert scans == [] and enters == ['P-1001']
+
+
+def test_tab_after_typing_moves_focus():
+    entry, detector, scans, enters = _detector()
+    last = _type(detector, entry, 'P-1001', start=1000, gap=300)
+    assert detector._on_key(_enter(last + 300, keysym='Tab')) is None
+    assert scans == [] and enters == []
+
+
+def test_short_burst_is_not_a_scan():
+    entry, detector, scans, enters = _detector()
+    last = _type(detector, entry, 'P1', start=1000, gap=5)
+    detector._on_key(_enter(last + 5))
+    assert scans == [] and enters == ['P1']
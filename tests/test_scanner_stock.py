@@ -0,0 +1,77 @@
+import pytest
+
+pytest.importorskip('pandas')
+pytest.importorskip('mysql.connector')
+
+from scanner_stock import VALIDATE_DELAY_MS, ScanStockMixin, parse_quantity
+
+
+@pytest.mark.parametrize('text, qty', [
+    ('5', 5),
+    (' 12 ', 12),
+    ('007', 7),
+    ('', None),
+    ('   ', None),
+    ('0', None),
+    ('-3', None),
+    ('+3', None),
+    ('2.5', None),
+    ('1e3', None),
+    ('abc', None),
+])
+def test_parse_quantity(text, qty):
+    assert parse_quantity(text) == qty
+
+
+class FakeTkWindow:
+    """Records after()/after_cancel() instead of running a Tk event loop."""
+
+    def __init__(self):
+        self.pending = {}
+        self.cancelled = []
+        self._next_id = 0
+
+    def after(self, delay_ms, callback):
+        self._next_id += 1
+        after_id = f"after#{self._next_id}"
+        self.pending[after_id] = (delay_ms, callback)
+        return after_id
+
+    def after_cancel(self, after_id):
+        self.cancelled.append(after_id)
+        del self.pending[after_id]
+
+    def run_pending(self):
+        pending, self.pending = self.pending, {}
+        for _, callback in pending.values():
+            callback()
+
+
+class DebouncedForm(ScanStockMixin):
+    def __init__(self):
+        self.window = FakeTkWindow()
+        self._validate_after_id = None
+        self.validations = 0
+
+    def _validate_quantity_input(self):
+        self._validate_after_id = None
+        self.validations += 1
+
+
+def test_keystrokes_are_validated_once_after_the_last_one():
+    form = DebouncedForm()
+    for _ in range(4):  # e.g. a scanner typing "1000"
+        form._on_quantity_changed('quantity', '', 'write')
+
+    assert len(form.window.pending) == 1
+    assert form.window.cancelled == ['after#1', 'after#2', 'after#3']
+    (delay_ms, _), = form.window.pending.values()
+    assert delay_ms == VALIDATE_DELAY_MS
+    assert form.validations == 0
+
+    form.window.run_pending()
+    assert form.validations == 1
+
+    # After the validation ran, the next keystroke starts a new timer without cancelling
+    form._on_quantity_changed()
+    assert form.window.cancelled == ['after#1', 'after#2', 'after#3']
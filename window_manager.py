@@ -0,0 +1,100 @@
+# -------------------------------------------#
+# window_manager.py - Build-once screens that are hidden and shown again
+#
+# Building a Toplevel and its full widget tree is the slow part of navigating
+# on the shop-floor PCs, so every screen is built once, then withdrawn when the
+# operator leaves it and reset + deiconified when they come back.
+#
+# A screen is any object with a `window` (the Toplevel) and an optional
+# `reset()` that puts it back to its freshly-opened state. Screens that are
+# closed with the title-bar X (and so destroyed) are simply rebuilt next time.
+# -------------------------------------------#
+
+import tkinter as tk
+
+import perf_metrics
+
+# Wait this long after startup before prewarming, so the main menu paints first
+PREWARM_DELAY_MS = 1500
+# Gap between building two prewarmed screens, keeps the main menu responsive
+PREWARM_STEP_MS = 100
+# Retry interval for grab_set while a window is still being mapped
+GRAB_RETRY_MS = 50
+
+
+class Screen:
+    """Adapter for windows built inline (not by a window class with its own reset)."""
+    def __init__(self, window, reset=None):
+        self.window = window
+        if reset:
+            self.reset = reset
+
+
+class WindowManager:
+    def __init__(self, master_root):
+        self.master_root = master_root
+        self._factories = {} # name -> (factory, modal)
+        self._screens = {}   # name -> built screen
+        self._prewarm_queue = []
+
+    def register(self, name, factory, modal=False):
+        """factory() must build the screen and return it; modal screens take the input grab when shown."""
+        self._factories[name] = (factory, modal)
+
+    def is_built(self, name):
+        screen = self._screens.get(name)
+        return screen is not None and screen.window.winfo_exists()
+
+    def get(self, name):
+        """Returns the screen, building it (hidden) if it has not been built yet."""
+        if not self.is_built(name):
+            factory, _ = self._factories[name]
+            with perf_metrics.measure(f'ui.build.{name}'):
+                screen = factory()
+                # Withdrawn before Tk gets to draw it, so there is no flash
+                screen.window.withdraw()
+            self._screens[name] = screen
+        return self._screens[name]
+
+    def show(self, name):
+        """Resets the screen and brings it to the front. Returns the screen object."""
+        with perf_metrics.measure('ui.show'):
+            screen = self.get(name)
+            reset = getattr(screen, 'reset', None)
+            if reset:
+                reset()
+            screen.window.deiconify()
+            screen.window.lift()
+            if self._factories[name][1]:
+                self._grab(screen.window)
+        return screen
+
+    def hide(self, window):
+        """Hides a screen's window (releasing its grab) so it can be shown again later."""
+        if window.winfo_exists():
+            window.grab_release()
+            window.withdraw()
+
+    def _grab(self, window):
+        # grab_set fails until the window manager has actually mapped the window
+        try:
+            window.grab_set()
+        except tk.TclError:
+            if window.winfo_exists() and window.state() != 'withdrawn':
+                window.after(GRAB_RETRY_MS, lambda: self._grab(window))
+
+    # --- Prewarm ---
+
+    def prewarm(self, names, delay_ms=PREWARM_DELAY_MS):
+        """Builds the named screens in the background, one per event-loop turn, after `delay_ms`."""
+        self._prewarm_queue.extend(names)
+        self.master_root.after(delay_ms, self._prewarm_next)
+
+    def _prewarm_next(self):
+        while self._prewarm_queue:
+            name = self._prewarm_queue.pop(0)
+            if not self.is_built(name):
+                self.get(name)
+                break
+        if self._prewarm_queue:
+            self.master_root.after(PREWARM_STEP_MS, self._prewarm_next)